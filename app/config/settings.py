@@ -141,6 +141,12 @@ JQFILEUPLOAD_UPLOAD_SUBIDRECTORY = "jqfileupload"
 IMAGE_FILES_SUBDIRECTORY = "images"
 EVALUATION_FILES_SUBDIRECTORY = "evaluation"
 
+# The number of chunks of a staged upload that are fetched ahead of the
+# chunk that is being read
+JQFILEUPLOAD_READ_AHEAD_CHUNKS = int(
+    os.environ.get("JQFILEUPLOAD_READ_AHEAD_CHUNKS", "2")
+)
+
 AWS_S3_FILE_OVERWRITE = False
 # Note: deprecated in django storages 2.0
 AWS_BUCKET_ACL = "private"
@@ -717,6 +723,25 @@ COMPONENTS_DOCKER_TLSCERT = os.environ.get("COMPONENTS_DOCKER_TLSCERT", "")
 COMPONENTS_DOCKER_TLSKEY = os.environ.get("COMPONENTS_DOCKER_TLSKEY", "")
 COMPONENTS_MEMORY_LIMIT = os.environ.get("COMPONENTS_MEMORY_LIMIT", "4g")
 COMPONENTS_IO_IMAGE = "alpine:3.12"
+# The maximum total size in bytes of the image outputs of a job
+COMPONENTS_MAXIMUM_OUTPUT_SIZE = int(
+    os.environ.get("COMPONENTS_MAXIMUM_OUTPUT_SIZE", "10737418240")  # 10 gb
+)
+# Copy all of the inputs of a job to its container in a single tar stream,
+# rather than with one request per file
+COMPONENTS_BATCHED_INPUT_PROVISIONING = strtobool(
+    os.environ.get("COMPONENTS_BATCHED_INPUT_PROVISIONING", "True")
+)
+# The maximum number of jobs that are run in a single container. A batch must
+# finish within the time limit of a single celery task.
+COMPONENTS_MAXIMUM_JOB_BATCH_SIZE = int(
+    os.environ.get("COMPONENTS_MAXIMUM_JOB_BATCH_SIZE", "10")
+)
+# The disk budget in bytes for the component images that are kept on a docker
+# host, the least recently used images are removed when it is exceeded
+COMPONENTS_IMAGE_CACHE_MAX_SIZE = int(
+    os.environ.get("COMPONENTS_IMAGE_CACHE_MAX_SIZE", "107374182400")  # 100 gb
+)
 COMPONENTS_CPU_QUOTA = int(os.environ.get("COMPONENTS_CPU_QUOTA", "100000"))
 COMPONENTS_CPU_PERIOD = int(os.environ.get("COMPONENTS_CPU_PERIOD", "100000"))
 COMPONENTS_PIDS_LIMIT = int(os.environ.get("COMPONENTS_PIDS_LIMIT", "128"))
@@ -853,18 +878,37 @@ CELERY_BEAT_SCHEDULE = {
         "options": {"queue": "evaluation"},
         "schedule": timedelta(hours=1),
     },
-    "cache_retina_archive_data": {
-        "task": "grandchallenge.retina_api.tasks.cache_archive_data",
-        "schedule": timedelta(hours=1),
-    },
 }
 
 CELERY_TASK_ROUTES = {
     "grandchallenge.components.tasks.execute_job": "evaluation",
+    "grandchallenge.components.tasks.execute_job_batch": "evaluation",
     "grandchallenge.components.tasks.validate_docker_image": "images",
     "grandchallenge.cases.tasks.build_images": "images",
+    "grandchallenge.cases.tasks.generate_thumbnails": "images",
 }
 
+# The number of seconds that the metric table of a phase is kept in the cache
+# for ranking new evaluations, it is rebuilt when a phase is saved
+EVALUATION_RANKING_CACHE_TIMEOUT = int(
+    os.environ.get("EVALUATION_RANKING_CACHE_TIMEOUT", "86400")
+)
+
+# The number of seconds that the rendered pages of a leaderboard are cached,
+# they are invalidated when the phase is ranked again
+EVALUATION_LEADERBOARD_CACHE_TIMEOUT = int(
+    os.environ.get("EVALUATION_LEADERBOARD_CACHE_TIMEOUT", "600")
+)
+
+# The number of challenges that are cached by each process for resolving
+# subdomains, and the number of seconds that they are kept in the cache
+CHALLENGES_CONTEXT_CACHE_SIZE = int(
+    os.environ.get("CHALLENGES_CONTEXT_CACHE_SIZE", "128")
+)
+CHALLENGES_CONTEXT_CACHE_TIMEOUT = int(
+    os.environ.get("CHALLENGES_CONTEXT_CACHE_TIMEOUT", "3600")
+)
+
 # The name of the group whose members will be able to create algorithms
 ALGORITHMS_CREATORS_GROUP_NAME = "algorithm_creators"
 
@@ -907,6 +951,22 @@ MODALITY_IR = "Infrared Reflectance Imaging"  # Infrared Reflectance imaging
 # Maximum file size in bytes to be opened by SimpleITK.ReadImage in cases.models.Image.get_sitk_image()
 MAX_SITK_FILE_SIZE = 268_435_456  # 256 mb
 
+# Local disk cache for the image files that are loaded by
+# cases.models.Image.get_sitk_image()
+IMAGE_FILE_CACHE_DIR = os.environ.get(
+    "IMAGE_FILE_CACHE_DIR", "/tmp/image-file-cache"
+)
+# The maximum size of the image file cache in bytes, 0 disables the cache
+IMAGE_FILE_CACHE_MAX_SIZE = int(
+    os.environ.get("IMAGE_FILE_CACHE_MAX_SIZE", "2147483648")  # 2 gb
+)
+
+# The number of image thumbnails that are kept in memory by each process,
+# the thumbnails are also kept in storage
+IMAGE_THUMBNAIL_CACHE_SIZE = int(
+    os.environ.get("IMAGE_THUMBNAIL_CACHE_SIZE", "1024")
+)
+
 # The maximum size of all the files in an upload session in bytes
 UPLOAD_SESSION_MAX_BYTES = 10_737_418_240  # 10 gb
 
@@ -919,11 +979,48 @@ ITK_INTERNAL_FILE_FORMAT = os.environ.get(
     "ITK_INTERNAL_FILE_FORMAT", "mha"
 ).lower()
 
+# The number of processes used to build images from independent files in
+# cases.tasks.import_images, 1 builds all images in the calling process
+IMAGE_BUILDER_MAX_WORKERS = int(
+    os.environ.get("IMAGE_BUILDER_MAX_WORKERS", "1")
+)
+
+# The number of threads used to decode the slices of a dicom volume
+DICOM_DECODE_MAX_WORKERS = int(os.environ.get("DICOM_DECODE_MAX_WORKERS", "4"))
+
 # Tile size in pixels to be used when creating dzi for tif files
 DZI_TILE_SIZE = 2560
 
+# The number of whole slide images that are converted to pyramidal tiffs and
+# dzi tiles concurrently by the tiff image builder. The number of threads of
+# each libvips operation is set with VIPS_CONCURRENCY in the environment of
+# the workers, which libvips reads once when it starts.
+TIFF_BUILDER_MAX_WORKERS = int(os.environ.get("TIFF_BUILDER_MAX_WORKERS", "2"))
+
+# The number of dzi tiles that are uploaded to storage concurrently
+FOLDER_UPLOAD_MAX_WORKERS = int(
+    os.environ.get("FOLDER_UPLOAD_MAX_WORKERS", "8")
+)
+
+# The number of times a failed dzi tile upload is retried
+FOLDER_UPLOAD_MAX_RETRIES = int(
+    os.environ.get("FOLDER_UPLOAD_MAX_RETRIES", "3")
+)
+
+# Upload the dzi tiles of an image as a single zip archive with an index,
+# the tiles are then served from byte ranges of the archive
+FOLDER_UPLOAD_PACK = strtobool(os.environ.get("FOLDER_UPLOAD_PACK", "False"))
+
+# How long the index of a pack of dzi tiles is cached by the serving views
+SERVING_PACK_INDEX_CACHE_TIMEOUT = 3600
+
 # Default maximum width or height for thumbnails in retina workstation
 RETINA_DEFAULT_THUMBNAIL_SIZE = 128
+# The sizes of the thumbnails, as (width, height), that are kept in storage.
+# Thumbnails of other sizes are created on every request.
+IMAGE_THUMBNAIL_STORED_SIZES = {
+    (RETINA_DEFAULT_THUMBNAIL_SIZE, RETINA_DEFAULT_THUMBNAIL_SIZE)
+}
 
 # Retina specific settings
 RETINA_GRADERS_GROUP_NAME = "retina_graders"
@@ -42,6 +42,7 @@ class AlgorithmForm(WorkstationUserFilterMixin, SaveFormInitMixin, ModelForm):
             "workstation",
             "workstation_config",
             "credits_per_job",
+            "execution_batch_size",
             "detail_page_markdown",
             "job_create_page_markdown",
             "additional_terms_markdown",
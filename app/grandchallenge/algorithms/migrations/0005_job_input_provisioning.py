@@ -0,0 +1,31 @@
+# Generated by Django 3.1.1 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("algorithms", "0004_algorithm_social_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="input_provisioning_progress",
+            field=models.FloatField(
+                default=0.0,
+                editable=False,
+                help_text="The fraction of the input bytes copied to the container",
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="input_provisioning_rate",
+            field=models.FloatField(
+                editable=False,
+                help_text="The rate in bytes per second at which the inputs were copied",
+                null=True,
+            ),
+        ),
+    ]
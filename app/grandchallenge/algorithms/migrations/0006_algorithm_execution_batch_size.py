@@ -0,0 +1,30 @@
+# Generated by Django 3.1.1 on 2026-10-18 18:41
+
+import django.core.validators
+from django.db import migrations, models
+
+import grandchallenge.algorithms.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("algorithms", "0005_job_input_provisioning"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="algorithm",
+            name="execution_batch_size",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                help_text="The number of images that are processed by a single run of the container. If this is greater than 1 the inputs of each job are placed in /input/<job id>/, and the container must write the outputs of each job to /output/<job id>/. The whole batch must finish within the time limit of a single job, so the batch size is limited by the configuration of the site.",
+                validators=[
+                    django.core.validators.MinValueValidator(1),
+                    django.core.validators.MaxValueValidator(
+                        grandchallenge.algorithms.models.get_maximum_execution_batch_size
+                    ),
+                ],
+            ),
+        ),
+    ]
@@ -4,6 +4,7 @@ from datetime import timedelta
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import Min, Sum
 from django.db.models.signals import post_delete
@@ -43,6 +44,10 @@ DEFAULT_OUTPUT_INTERFACE_SLUG = "generic-overlay"
 JINJA_ENGINE = sandbox.ImmutableSandboxedEnvironment()
 
 
+def get_maximum_execution_batch_size():
+    return settings.COMPONENTS_MAXIMUM_JOB_BATCH_SIZE
+
+
 class Algorithm(UUIDModel, TitleSlugDescriptionModel):
     editors_group = models.OneToOneField(
         Group,
@@ -139,6 +144,21 @@ class Algorithm(UUIDModel, TitleSlugDescriptionModel):
             "The number of credits that are required for each execution of this algorithm."
         ),
     )
+    execution_batch_size = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[
+            MinValueValidator(1),
+            MaxValueValidator(get_maximum_execution_batch_size),
+        ],
+        help_text=(
+            "The number of images that are processed by a single run of the "
+            "container. If this is greater than 1 the inputs of each job are "
+            "placed in /input/<job id>/, and the container must write the "
+            "outputs of each job to /output/<job id>/. The whole batch must "
+            "finish within the time limit of a single job, so the batch size "
+            "is limited by the configuration of the site."
+        ),
+    )
 
     class Meta(UUIDModel.Meta, TitleSlugDescriptionModel.Meta):
         ordering = ("created",)
@@ -465,11 +485,15 @@ class Job(UUIDModel, ComponentJob):
             self.update_viewer_groups_for_public()
             self._public_orig = self.public
 
-    def init_viewers_group(self):
-        self.viewers = Group.objects.create(
-            name=f"{self._meta.app_label}_{self._meta.model_name}_{self.pk}_viewers"
+    @property
+    def viewers_group_name(self):
+        return (
+            f"{self._meta.app_label}_{self._meta.model_name}_{self.pk}_viewers"
         )
 
+    def init_viewers_group(self):
+        self.viewers = Group.objects.create(name=self.viewers_group_name)
+
     def init_permissions(self):
         # By default, only the viewers can view this job
         self.viewer_groups.set([self.viewers])
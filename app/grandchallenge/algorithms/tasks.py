@@ -1,6 +1,7 @@
 from celery import group, shared_task
 from django.apps import apps
 from django.conf import settings
+from django.contrib.auth.models import Group
 from django.contrib.sites.models import Site
 from django.core.mail import send_mail
 
@@ -16,6 +17,11 @@ from grandchallenge.components.models import (
     ComponentInterface,
     ComponentInterfaceValue,
 )
+from grandchallenge.core.guardian import (
+    BULK_CREATE_BATCH_SIZE,
+    bulk_assign_group_perms,
+    bulk_assign_user_perms,
+)
 from grandchallenge.credits.models import Credit
 from grandchallenge.evaluation.tasks import set_evaluation_inputs
 from grandchallenge.subdomains.utils import reverse
@@ -125,7 +131,19 @@ def execute_jobs(
     )
 
     if jobs:
-        workflow = group(j.signature for j in jobs)
+        # The batch shares the time limit of a single task
+        batch_size = min(
+            algorithm_image.algorithm.execution_batch_size,
+            settings.COMPONENTS_MAXIMUM_JOB_BATCH_SIZE,
+        )
+
+        if batch_size > 1:
+            workflow = group(
+                Job.batch_signature(jobs=jobs[i : i + batch_size])
+                for i in range(0, len(jobs), batch_size)
+            )
+        else:
+            workflow = group(j.signature for j in jobs)
 
         if linked_task is not None:
             linked_task.kwargs.update({"job_pks": [j.pk for j in jobs]})
@@ -164,28 +182,107 @@ def create_algorithm_jobs(
             ):
                 images = images[: remaining_jobs()]
 
-        for image in images:
-            if not ComponentInterfaceValue.objects.filter(
+        existing_image_pks = set(
+            ComponentInterfaceValue.objects.filter(
                 interface=default_input_interface,
-                image=image,
+                image__in=images,
                 algorithms_jobs_as_input__algorithm_image=algorithm_image,
                 algorithms_jobs_as_input__creator=creator,
-            ).exists():
-                j = Job.objects.create(
-                    creator=creator, algorithm_image=algorithm_image,
-                )
-                j.inputs.set(
-                    [
-                        ComponentInterfaceValue.objects.create(
-                            interface=default_input_interface, image=image
-                        )
-                    ]
-                )
-
-                if extra_viewer_groups is not None:
-                    j.viewer_groups.add(*extra_viewer_groups)
-
-                jobs.append(j)
+            ).values_list("image__pk", flat=True)
+        )
+        new_images = {
+            image.pk: image
+            for image in images
+            if image.pk not in existing_image_pks
+        }
+
+        jobs = _bulk_create_jobs(
+            algorithm_image=algorithm_image,
+            images=[*new_images.values()],
+            creator=creator,
+            input_interface=default_input_interface,
+            extra_viewer_groups=extra_viewer_groups or [],
+        )
+
+    return jobs
+
+
+def _bulk_create_jobs(
+    *, algorithm_image, images, creator, input_interface, extra_viewer_groups,
+):
+    """
+    Creates a job for each image with a constant number of queries.
+
+    This does what Job.save and the m2m signals would do for each job:
+    create the viewers group, add the inputs and viewer groups, and assign
+    the permissions for the jobs and their input images.
+    """
+    if not images:
+        return []
+
+    jobs = [
+        Job(creator=creator, algorithm_image=algorithm_image) for _ in images
+    ]
+
+    viewers = Group.objects.bulk_create(
+        [Group(name=j.viewers_group_name) for j in jobs],
+        batch_size=BULK_CREATE_BATCH_SIZE,
+    )
+    for job, viewers_group in zip(jobs, viewers):
+        job.viewers = viewers_group
+
+    Job.objects.bulk_create(jobs, batch_size=BULK_CREATE_BATCH_SIZE)
+
+    civs = ComponentInterfaceValue.objects.bulk_create(
+        [
+            ComponentInterfaceValue(interface=input_interface, image=image)
+            for image in images
+        ],
+        batch_size=BULK_CREATE_BATCH_SIZE,
+    )
+    Job.inputs.through.objects.bulk_create(
+        [
+            Job.inputs.through(job=job, componentinterfacevalue=civ)
+            for job, civ in zip(jobs, civs)
+        ],
+        batch_size=BULK_CREATE_BATCH_SIZE,
+    )
+
+    viewer_groups = [
+        (job, image, viewer_group)
+        for job, image in zip(jobs, images)
+        for viewer_group in [job.viewers, *extra_viewer_groups]
+    ]
+    Job.viewer_groups.through.objects.bulk_create(
+        [
+            Job.viewer_groups.through(job=job, group=viewer_group)
+            for job, _, viewer_group in viewer_groups
+        ],
+        batch_size=BULK_CREATE_BATCH_SIZE,
+    )
+    bulk_assign_group_perms(
+        codename="view_job",
+        model=Job,
+        pairs=(
+            (viewer_group.pk, job.pk) for job, _, viewer_group in viewer_groups
+        ),
+    )
+    bulk_assign_group_perms(
+        codename="view_image",
+        model=Image,
+        pairs={
+            (viewer_group.pk, image.pk)
+            for _, image, viewer_group in viewer_groups
+        },
+    )
+
+    if creator:
+        creator.groups.add(*viewers)
+        bulk_assign_user_perms(
+            codename="change_job",
+            model=Job,
+            pairs=((creator.pk, job.pk) for job in jobs),
+        )
 
     return jobs
 
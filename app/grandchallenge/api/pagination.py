@@ -1,5 +1,16 @@
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
 
 
 class MaxLimit1000OffsetPagination(LimitOffsetPagination):
     max_limit = 1000
+
+
+class MaxLimit1000CursorPagination(CursorPagination):
+    """
+    Paginates by the primary key, so the cost of a page does not depend on
+    its position, which makes it suitable for walking large tables.
+    """
+
+    ordering = "pk"
+    page_size_query_param = "limit"
+    max_page_size = 1000
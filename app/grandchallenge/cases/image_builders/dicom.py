@@ -1,12 +1,16 @@
 import tempfile
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from math import isclose
 from pathlib import Path
-from typing import Set
+from typing import Dict, List, Set
 
 import SimpleITK
 import numpy as np
 import pydicom
+from django.conf import settings
 
 from grandchallenge.cases.image_builders.types import ImageBuilderResult
 from grandchallenge.cases.image_builders.utils import convert_itk_to_internal
@@ -47,10 +51,30 @@ def pixel_data_reached(tag, vr, length):
     return pydicom.datadict.keyword_for_tag(tag) == "PixelData"
 
 
+@dataclass
+class DicomHeader:
+    __slots__ = ("file", "data")
+
+    file: Path
+    # The dataset up to, but not including, the pixel data
+    data: pydicom.Dataset
+
+
+@dataclass
+class DicomSeries:
+    __slots__ = ("headers", "index")
+
+    headers: List[DicomHeader]
+    # The position of the dimensions of this series within its study
+    index: int
+
+
 def _get_headers_by_study(files: Set[Path]):
     """
     Gets all headers from dicom files found in path.
 
+    Each file is read once, up to the pixel data.
+
     Parameters
     ----------
     path
@@ -59,12 +83,12 @@ def _get_headers_by_study(files: Set[Path]):
 
     Returns
     -------
-    A dictionary of sorted headers for all dicom image files found within path,
-    grouped by study id.
+    A dictionary of `DicomSeries` with the sorted headers for all dicom image
+    files found within path, grouped by study id and dimensions.
     """
-    studies = {}
+    studies: Dict[str, DicomSeries] = {}
     errors = {}
-    indices = {}
+    indices: Dict[str, Dict[str, int]] = {}
 
     for file in files:
         if not file.is_file():
@@ -76,28 +100,22 @@ def _get_headers_by_study(files: Set[Path]):
                 )
                 dims = f"{ds.Rows}x{ds.Columns}"
                 key = f"{ds.StudyInstanceUID}-{dims}"
-                studies[key] = studies.get(key, {})
-                indices[ds.StudyInstanceUID] = indices.get(
-                    ds.StudyInstanceUID, {}
-                )
-                index = indices[ds.StudyInstanceUID].get(dims)
-                if index is None:
-                    index = (
-                        max(list(indices[ds.StudyInstanceUID].values()) + [-1])
-                        + 1
+
+                if key not in studies:
+                    study_indices = indices.setdefault(ds.StudyInstanceUID, {})
+                    # Indices are assigned in order of appearance of the
+                    # dimensions in the study
+                    study_indices[dims] = len(study_indices)
+                    studies[key] = DicomSeries(
+                        headers=[], index=study_indices[dims]
                     )
-                    indices[ds.StudyInstanceUID][dims] = index
-                headers = studies[key].get("headers", [])
-                headers.append({"file": file, "data": ds})
-                studies[key]["index"] = index
-                studies[key]["headers"] = headers
+
+                studies[key].headers.append(DicomHeader(file=file, data=ds))
             except Exception as e:
                 errors[file] = format_error(e)
 
-    for key in studies:
-        studies[key]["headers"].sort(
-            key=lambda x: int(x["data"].InstanceNumber)
-        )
+    for series in studies.values():
+        series.headers.sort(key=lambda x: int(x.data.InstanceNumber))
     return studies, errors
 
 
@@ -105,6 +123,45 @@ def format_error(message):
     return f"Dicom image builder: {message}"
 
 
+def group_files_by_study(files: Set[Path]) -> List[Set[Path]]:
+    """
+    Groups dicom files by StudyInstanceUID, so that each group can be passed
+    to the image builder independently of the others.
+
+    Files whose headers cannot be read are placed in a separate group so that
+    the image builder can still report errors for them.
+
+    Parameters
+    ----------
+    files
+        Paths to the files that were uploaded during an upload session.
+
+    Returns
+    -------
+    A list of sets of files, ordered by StudyInstanceUID.
+    """
+    groups = {}
+    unreadable = set()
+
+    for file in sorted(files):
+        try:
+            ds = pydicom.dcmread(
+                str(file),
+                stop_before_pixels=True,
+                specific_tags=["StudyInstanceUID"],
+            )
+            groups.setdefault(str(ds.StudyInstanceUID), set()).add(file)
+        except Exception:
+            unreadable.add(file)
+
+    result = [groups[key] for key in sorted(groups)]
+
+    if unreadable:
+        result.append(unreadable)
+
+    return result
+
+
 def _validate_dicom_files(files: Set[Path]):
     """
     Gets the headers for all dicom files on path and validates them.
@@ -129,12 +186,12 @@ def _validate_dicom_files(files: Set[Path]):
     dicom_dataset = namedtuple(
         "dicom_dataset", ["headers", "n_time", "n_slices", "index"]
     )
-    for key in studies:
-        headers = studies[key]["headers"]
-        index = studies[key]["index"]
+    for series in studies.values():
+        headers = series.headers
+        index = series.index
         if not headers:
             continue
-        n_time = getattr(headers[-1]["data"], "TemporalPositionIndex", None)
+        n_time = getattr(headers[-1].data, "TemporalPositionIndex", None)
         # Not a 4d dicom file
         if n_time is None:
             result.append(
@@ -148,7 +205,7 @@ def _validate_dicom_files(files: Set[Path]):
             continue
         if len(headers) % n_time > 0:
             for d in headers:
-                errors[d["file"]] = format_error(
+                errors[d.file] = format_error(
                     "Number of slices per time point differs"
                 )
             continue
@@ -163,21 +220,34 @@ def _validate_dicom_files(files: Set[Path]):
 
 
 def _extract_direction(dicom_ds, direction):
+    """
+    Sets the direction cosines of the slices in direction.
+
+    The direction of the rows and columns is given by ImageOrientationPatient,
+    the slice direction is perpendicular to both.
+    """
     try:
-        # Try to extract the direction from the file
-        sitk_ref = SimpleITK.ReadImage(str(dicom_ds.headers[0]["file"]))
+        orientation = np.array(
+            dicom_ds.headers[0].data.ImageOrientationPatient, dtype=float
+        )
+        row_direction, column_direction = orientation[:3], orientation[3:]
+        slice_direction = np.cross(row_direction, column_direction)
+
+        if not isclose(np.linalg.norm(slice_direction), 1.0, abs_tol=1e-3):
+            raise ValueError("ImageOrientationPatient is not orthonormal")
+
         # The direction per slice is a 3x3 matrix, so we add the time
         # dimension ourselves
-        dims = sitk_ref.GetDimension()
-        _direction = np.reshape(sitk_ref.GetDirection(), (dims, dims))
-        direction[:dims, :dims] = _direction
+        direction[:3, :3] = np.column_stack(
+            (row_direction, column_direction, slice_direction)
+        )
     except Exception:
         pass
     return direction
 
 
 def _process_dicom_file(*, dicom_ds, created_image_prefix):  # noqa: C901
-    ref_file = pydicom.dcmread(str(dicom_ds.headers[0]["file"]))
+    ref_file = dicom_ds.headers[0].data
     ref_origin = tuple(
         float(i) for i in getattr(ref_file, "ImagePositionPatient", (0, 0, 0))
     )
@@ -199,8 +269,8 @@ def _process_dicom_file(*, dicom_ds, created_image_prefix):  # noqa: C901
     origin = None
     origin_diff = np.array((0, 0, 0), dtype=float)
     n_diffs = 0
-    for partial in dicom_ds.headers:
-        ds = partial["data"]
+    for header in dicom_ds.headers:
+        ds = header.data
         if "ImagePositionPatient" in ds:
             file_origin = np.array(ds.ImagePositionPatient, dtype=float)
             if origin is not None:
@@ -255,7 +325,7 @@ def _process_dicom_file(*, dicom_ds, created_image_prefix):  # noqa: C901
     # Convert the SimpleITK image to our internal representation
     return convert_itk_to_internal(
         img,
-        name=f"{created_image_prefix}-{dicom_ds.headers[0]['data'].StudyInstanceUID}-{dicom_ds.index}",
+        name=f"{created_image_prefix}-{dicom_ds.headers[0].data.StudyInstanceUID}-{dicom_ds.index}",
     )
 
 
@@ -263,11 +333,11 @@ def _create_itk_from_dcm(
     *, content_times, dicom_ds, dimensions, exposures, pixel_dims, z_i
 ):
     apply_slope = any(
-        not isclose(float(getattr(h["data"], "RescaleSlope", 1.0)), 1.0)
+        not isclose(float(getattr(h.data, "RescaleSlope", 1.0)), 1.0)
         for h in dicom_ds.headers
     )
     apply_intercept = any(
-        not isclose(float(getattr(h["data"], "RescaleIntercept", 0.0)), 0.0)
+        not isclose(float(getattr(h.data, "RescaleIntercept", 0.0)), 0.0)
         for h in dicom_ds.headers
     )
     apply_scaling = apply_slope or apply_intercept
@@ -279,52 +349,100 @@ def _create_itk_from_dcm(
         np_dtype = np.short
         sitk_dtype = SimpleITK.sitkInt16
 
-    dcm_array = np.zeros(pixel_dims, dtype=np_dtype)
-
-    for index, partial in enumerate(dicom_ds.headers):
-        ds = pydicom.dcmread(str(partial["file"]))
+    first = pydicom.dcmread(str(dicom_ds.headers[0].file))
+    if len(first.pixel_array.shape) == dimensions:
+        # The whole volume is stored in a single file
+        pixel_dims = first.pixel_array.shape
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The volume is assembled in a memory mapped file, so only the slices
+        # that are being decoded need to be kept in memory
+        dcm_array = np.memmap(
+            Path(tmp_dir) / "volume",
+            dtype=np_dtype,
+            mode="w+",
+            shape=pixel_dims,
+        )
 
-        if apply_scaling:
-            pixel_array = float(
-                getattr(ds, "RescaleSlope", 1)
-            ) * ds.pixel_array + float(getattr(ds, "RescaleIntercept", 0))
-        else:
-            pixel_array = ds.pixel_array
-
-        if len(ds.pixel_array.shape) == dimensions:
-            dcm_array = pixel_array
-            break
-
-        z_index = index if z_i >= 0 else len(dicom_ds.headers) - index - 1
-        if dimensions == 4:
-            dcm_array[
-                index // dicom_ds.n_slices, z_index % dicom_ds.n_slices, :, :
-            ] = pixel_array
-            if index % dicom_ds.n_slices == 0:
-                content_times.append(str(ds.ContentTime))
-                exposures.append(str(ds.Exposure))
+        if len(first.pixel_array.shape) == dimensions:
+            dcm_array[...] = _rescaled_pixel_array(
+                ds=first, apply_scaling=apply_scaling
+            )
         else:
-            dcm_array[z_index % dicom_ds.n_slices, :, :] = pixel_array
+            place_slice = partial(
+                _place_dcm_slice,
+                dcm_array=dcm_array,
+                dicom_ds=dicom_ds,
+                dimensions=dimensions,
+                apply_scaling=apply_scaling,
+                z_i=z_i,
+            )
 
-        del ds
+            slice_metadata = [place_slice(first, 0)]
+
+            with ThreadPoolExecutor(
+                max_workers=settings.DICOM_DECODE_MAX_WORKERS
+            ) as executor:
+                slice_metadata += executor.map(
+                    lambda index: place_slice(
+                        pydicom.dcmread(str(dicom_ds.headers[index].file)),
+                        index,
+                    ),
+                    range(1, len(dicom_ds.headers)),
+                )
 
-    shape = dcm_array.shape[::-1]
-    # Write the numpy array to a file, so there is no need to keep it in memory
-    # anymore. Then create a SimpleITK image from it.
-    with tempfile.NamedTemporaryFile() as temp:
-        temp.seek(0)
-        temp.write(dcm_array.tobytes())
-        temp.flush()
-        temp.seek(0)
+            if dimensions == 4:
+                for index, (content_time, exposure) in enumerate(
+                    slice_metadata
+                ):
+                    if index % dicom_ds.n_slices == 0:
+                        content_times.append(content_time)
+                        exposures.append(exposure)
 
-        del dcm_array
+        del first
 
-        img = SimpleITK.Image(shape, sitk_dtype, 1)
-        SimpleITK._SimpleITK._SetImageFromArray(temp.read(), img)
+        dcm_array.flush()
+
+        # SimpleITK copies directly from the buffer of the memory map,
+        # without an intermediate copy of the volume as bytes
+        img = SimpleITK.Image(dcm_array.shape[::-1], sitk_dtype, 1)
+        SimpleITK._SimpleITK._SetImageFromArray(dcm_array, img)
+
+        del dcm_array
 
     return img
 
 
+def _rescaled_pixel_array(*, ds, apply_scaling):
+    if apply_scaling:
+        return float(getattr(ds, "RescaleSlope", 1)) * ds.pixel_array + float(
+            getattr(ds, "RescaleIntercept", 0)
+        )
+    else:
+        return ds.pixel_array
+
+
+def _place_dcm_slice(
+    ds, index, *, dcm_array, dicom_ds, dimensions, apply_scaling, z_i
+):
+    """
+    Writes the pixel data of the slice at index into dcm_array.
+
+    Returns the ContentTime and Exposure of the slice for 4D volumes.
+    """
+    z_index = index if z_i >= 0 else len(dicom_ds.headers) - index - 1
+    if dimensions == 4:
+        dcm_array[
+            index // dicom_ds.n_slices, z_index % dicom_ds.n_slices, :, :
+        ] = _rescaled_pixel_array(ds=ds, apply_scaling=apply_scaling)
+        return str(ds.ContentTime), str(ds.Exposure)
+    else:
+        dcm_array[z_index % dicom_ds.n_slices, :, :] = _rescaled_pixel_array(
+            ds=ds, apply_scaling=apply_scaling
+        )
+        return None
+
+
 def image_builder_dicom(
     *, files: Set[Path], created_image_prefix: str = ""
 ) -> ImageBuilderResult:
@@ -356,10 +474,10 @@ def image_builder_dicom(
             )
             new_images.add(n_image)
             new_image_files |= set(n_image_files)
-            consumed_files |= {d["file"] for d in dicom_ds.headers}
+            consumed_files |= {d.file for d in dicom_ds.headers}
         except Exception as e:
             for d in dicom_ds.headers:
-                file_errors[d["file"]] = format_error(e)
+                file_errors[d.file] = format_error(e)
 
     return ImageBuilderResult(
         consumed_files=consumed_files,
@@ -1,8 +1,8 @@
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from tempfile import TemporaryFile
 from typing import Dict, List, Optional, Set
 from uuid import UUID, uuid4
 
@@ -11,10 +11,10 @@ import pyvips
 import tifffile
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.files import File
 
 from grandchallenge.cases.image_builders.types import ImageBuilderResult
 from grandchallenge.cases.models import FolderUpload, Image, ImageFile
+from grandchallenge.core.utils.transfer import file_from_path
 
 
 @dataclass
@@ -187,32 +187,25 @@ def _get_color_space(*, color_space_string) -> Image.COLOR_SPACES:
 
 
 def _create_image_file(*, path: str, image: Image) -> ImageFile:
-    temp_file = TemporaryFile()
-    with open(path, "rb") as open_file:
-        buffer = True
-        while buffer:
-            buffer = open_file.read(1024)
-            temp_file.write(buffer)
-
     if path.lower().endswith("dzi"):
         return ImageFile(
             image=image,
             image_type=ImageFile.IMAGE_TYPE_DZI,
-            file=File(temp_file, name=f"{image.pk}.dzi"),
+            file=file_from_path(path, name=f"{image.pk}.dzi"),
         )
     else:
         return ImageFile(
             image=image,
             image_type=ImageFile.IMAGE_TYPE_TIFF,
-            file=File(temp_file, name=f"{image.pk}.tif"),
+            file=file_from_path(path, name=f"{image.pk}.tif"),
         )
 
 
 def _load_with_tiff(
     *, gc_file: GrandChallengeTiffFile
 ) -> GrandChallengeTiffFile:
-    tiff_file = tifffile.TiffFile(str(gc_file.path.absolute()))
-    gc_file = _extract_tags(gc_file=gc_file, pages=tiff_file.pages)
+    with tifffile.TiffFile(str(gc_file.path.absolute())) as tiff_file:
+        gc_file = _extract_tags(gc_file=gc_file, pages=tiff_file.pages)
     return gc_file
 
 
@@ -296,28 +289,41 @@ def _get_vms_files(vms_file: Path):
         return file_matched
 
 
+def _convert_file(
+    file: Path, *, associated_files_getter: Optional[callable], converter
+) -> GrandChallengeTiffFile:
+    gc_file = GrandChallengeTiffFile(file)
+    if associated_files_getter:
+        gc_file.associated_files = associated_files_getter(gc_file.path)
+    gc_file.path = _convert_to_tiff(
+        path=file, pk=gc_file.pk, converter=converter
+    )
+    gc_file.associated_files.append(file)
+    return gc_file
+
+
 def _convert(
     files: List[Path], associated_files_getter: Optional[callable], converter
 ) -> (List[GrandChallengeTiffFile], Dict):
     compiled_files: List[GrandChallengeTiffFile] = []
-    associated_files: List[Path] = []
     errors = {}
-    for file in files:
-        try:
-            gc_file = GrandChallengeTiffFile(file)
-            if associated_files_getter:
-                associated_files = associated_files_getter(gc_file.path)
-            tiff_file = _convert_to_tiff(
-                path=file, pk=gc_file.pk, converter=converter
+    with ThreadPoolExecutor(
+        max_workers=settings.TIFF_BUILDER_MAX_WORKERS
+    ) as executor:
+        futures = {
+            file: executor.submit(
+                _convert_file,
+                file,
+                associated_files_getter=associated_files_getter,
+                converter=converter,
             )
-        except Exception as e:
-            errors[file] = str(e)
-            continue
-        else:
-            gc_file.path = tiff_file
-            gc_file.associated_files = associated_files
-            gc_file.associated_files.append(file)
-            compiled_files.append(gc_file)
+            for file in files
+        }
+        for file, future in futures.items():
+            try:
+                compiled_files.append(future.result())
+            except Exception as e:
+                errors[file] = str(e)
     return compiled_files, errors
 
 
@@ -380,6 +386,33 @@ def _load_gc_files(
     return loaded_files, errors
 
 
+def _build_slide(
+    gc_file: GrandChallengeTiffFile,
+) -> (GrandChallengeTiffFile, Optional[str], str):
+    """
+    Reads the tags of a (converted) tiff file and creates its dzi tiles.
+
+    Returns the updated file, the dzi output location and the errors that
+    were encountered as a single message.
+    """
+    dzi_output = None
+    error = ""
+
+    # try and load image with tiff file
+    try:
+        gc_file = _load_with_tiff(gc_file=gc_file)
+    except Exception as e:
+        error += f"Load error: {e}. "
+
+    # try and load image with open_slide
+    try:
+        dzi_output, gc_file = _load_and_create_dzi(gc_file=gc_file)
+    except Exception as e:
+        error += f"Dzi error: {e}. "
+
+    return gc_file, dzi_output, error
+
+
 def image_builder_tiff(  # noqa: C901
     *, files: Set[Path], **_
 ) -> ImageBuilderResult:
@@ -393,23 +426,16 @@ def image_builder_tiff(  # noqa: C901
         return f"Tiff image builder: {message}"
 
     loaded_files, errors = _load_gc_files(files=files, converter=pyvips)
-    for gc_file in loaded_files:
-        dzi_output = None
-        error = ""
-        if gc_file.path in errors:
-            error = errors[gc_file.path]
 
-        # try and load image with tiff file
-        try:
-            gc_file = _load_with_tiff(gc_file=gc_file)
-        except Exception as e:
-            error += f"Load error: {e}. "
+    # The slides are independent, libvips and openslide release the GIL
+    # while decoding so the slides are processed in a thread pool
+    with ThreadPoolExecutor(
+        max_workers=settings.TIFF_BUILDER_MAX_WORKERS
+    ) as executor:
+        slides = list(executor.map(_build_slide, loaded_files))
 
-        # try and load image with open_slide
-        try:
-            dzi_output, gc_file = _load_and_create_dzi(gc_file=gc_file)
-        except Exception as e:
-            error += f"Dzi error: {e}. "
+    for gc_file, dzi_output, slide_error in slides:
+        error = errors.get(gc_file.path, "") + slide_error
 
         # validate
         try:
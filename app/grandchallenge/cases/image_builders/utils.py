@@ -1,13 +1,13 @@
 from pathlib import Path
-from tempfile import TemporaryDirectory, TemporaryFile
+from tempfile import TemporaryDirectory
 from typing import AnyStr, Optional, Sequence, Tuple
 from uuid import uuid4
 
 import SimpleITK
 from django.conf import settings
-from django.core.files import File
 
 from grandchallenge.cases.models import Image, ImageFile
+from grandchallenge.core.utils.transfer import file_from_path
 
 
 def convert_itk_to_internal(
@@ -72,16 +72,11 @@ def convert_itk_to_internal(
         )
         db_image_files = []
         for _file in work_dir.iterdir():
-            temp_file = TemporaryFile()
-            with open(str(_file), "rb") as open_file:
-                buffer = True
-                while buffer:
-                    buffer = open_file.read(1024)
-                    temp_file.write(buffer)
+            # The open file remains readable after work_dir is removed
             db_image_file = ImageFile(
                 image=db_image,
                 image_type=ImageFile.IMAGE_TYPE_MHD,
-                file=File(temp_file, name=_file.name),
+                file=file_from_path(_file),
             )
             db_image_files.append(db_image_file)
 
@@ -0,0 +1,274 @@
+import io
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from grandchallenge.cases.image_builders.metaio_utils import (
+    extract_header_listing,
+    parse_mh_header,
+)
+
+# The number of bytes that is initially read to parse a MetaIO header,
+# this is doubled until the header is complete
+MH_HEADER_READ_SIZE = 0x10000  # 64 KiB
+MH_HEADER_MAX_READ_SIZE = 0x1000000  # 16 MiB
+
+METAIO_NUMPY_TYPES = {
+    "MET_CHAR": np.int8,
+    "MET_UCHAR": np.uint8,
+    "MET_SHORT": np.int16,
+    "MET_USHORT": np.uint16,
+    "MET_INT": np.int32,
+    "MET_UINT": np.uint32,
+    "MET_LONG": np.int64,
+    "MET_ULONG": np.uint64,
+    "MET_FLOAT": np.float32,
+    "MET_DOUBLE": np.float64,
+}
+
+
+class ImageFileCache:
+    """
+    A least recently used cache of image files on the local disk.
+
+    The entries are keyed by the pk of the ImageFile and the etag of its file
+    in storage, so changed files are downloaded again. The least recently
+    used entries are removed when the entries exceed max_size bytes.
+    """
+
+    def __init__(self, *, directory, max_size):
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    def link(self, image_file, *, to: Path):
+        """Creates a hard link to the cached copy of image_file at to."""
+        storage = image_file.file.storage
+        etag = storage.get_etag(name=image_file.file.name)
+        path = self.directory / f"{image_file.pk}-{etag}"
+
+        try:
+            # Update the modification time which marks the recent use
+            os.utime(path)
+            os.link(path, to)
+        except FileNotFoundError:
+            self._download(image_file, to=path, link=to)
+            self._evict()
+
+    def _download(self, image_file, *, to: Path, link: Path):
+        with NamedTemporaryFile(
+            dir=self.directory, prefix=".", delete=False
+        ) as f:
+            try:
+                image_file.file.storage.download_fileobj(
+                    name=image_file.file.name, fileobj=f
+                )
+            except Exception:
+                os.unlink(f.name)
+                raise
+
+        try:
+            # The link is made before the entry is visible, so another
+            # process cannot evict it before it is linked
+            os.link(f.name, link)
+        except Exception:
+            os.unlink(f.name)
+            raise
+
+        # Other processes only see complete entries
+        os.replace(f.name, to)
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            # Skips the downloads in progress and the linked directories
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                # Removed by another process
+                pass
+
+            total_size -= size
+
+
+def get_image_file_cache() -> Optional[ImageFileCache]:
+    if settings.IMAGE_FILE_CACHE_MAX_SIZE <= 0:
+        return None
+
+    cache = ImageFileCache(
+        directory=settings.IMAGE_FILE_CACHE_DIR,
+        max_size=settings.IMAGE_FILE_CACHE_MAX_SIZE,
+    )
+    cache.directory.mkdir(parents=True, exist_ok=True)
+
+    return cache
+
+
+@contextmanager
+def local_image_files(image_files: Iterable):
+    """
+    Yields a directory that contains local copies of image_files.
+
+    The files keep the names that they have in storage, so a mhd file can
+    find its raw file. The copies are hard links into the image file cache
+    when that is enabled, so files that are used repeatedly are only
+    downloaded once.
+    """
+    cache = get_image_file_cache()
+
+    with TemporaryDirectory(
+        dir=cache.directory if cache else None
+    ) as directory:
+        directory = Path(directory)
+
+        for image_file in image_files:
+            to = directory / Path(image_file.file.name).name
+
+            if cache:
+                cache.link(image_file, to=to)
+            else:
+                with open(to, "wb") as f:
+                    image_file.file.storage.download_fileobj(
+                        name=image_file.file.name, fileobj=f
+                    )
+
+        yield directory
+
+
+def _find_mh_data_offset(content: bytes) -> Optional[int]:
+    """
+    Returns the offset of the first byte after the ElementDataFile line, or
+    None if that line is not complete in content.
+    """
+    f = io.BytesIO(content)
+    for line in iter(f.readline, b""):
+        if line.startswith(b"ElementDataFile") and line.endswith(b"\n"):
+            return f.tell()
+    return None
+
+
+def read_mh_header(image_file) -> Tuple[Dict, Optional[int]]:
+    """
+    Reads the header of a mha or mhd file with ranged reads.
+
+    Parameters
+    ----------
+    image_file
+        The ImageFile that contains the mha or mhd file.
+
+    Returns
+    -------
+        The header as key value pairs and the offset of the element data in
+        the file, which is None if the data is not stored in the file.
+
+    Raises
+    ------
+    ValueError
+        Raised when the header cannot be parsed.
+    """
+    storage = image_file.file.storage
+    name = image_file.file.name
+    length = MH_HEADER_READ_SIZE
+
+    while True:
+        content = storage.read_range(name=name, offset=0, length=length)
+        data_offset = _find_mh_data_offset(content)
+
+        if data_offset is not None or len(content) < length:
+            break
+
+        if length >= MH_HEADER_MAX_READ_SIZE:
+            raise ValueError("Header is too large")
+
+        length *= 2
+
+    headers = parse_mh_header(ContentFile(content))
+
+    if headers.get("ElementDataFile", "").strip() != "LOCAL":
+        data_offset = None
+
+    return headers, data_offset
+
+
+def read_mh_slice(
+    *, headers: Dict, data_file, data_offset: int, index: Optional[int]
+) -> Optional[np.ndarray]:
+    """
+    Reads a single 2D slice of a MetaIO image with a ranged read.
+
+    Parameters
+    ----------
+    headers
+        The MetaIO header of the image.
+    data_file
+        The ImageFile that contains the element data.
+    data_offset
+        The offset of the element data in data_file.
+    index
+        The index of the slice along the z axis, defaults to the center
+        slice.
+
+    Returns
+    -------
+        The slice in NumPy ordering [y, x, (components)], or None if the
+        slice cannot be read on its own, for instance, because the data is
+        compressed.
+    """
+    ndims = int(headers["NDims"])
+    element_type = headers["ElementType"].replace("_ARRAY", "")
+
+    if (
+        ndims not in (2, 3)
+        or headers.get("CompressedData", "False") == "True"
+        or element_type not in METAIO_NUMPY_TYPES
+        or int(headers.get("HeaderSize", 0)) != 0
+    ):
+        return None
+
+    shape = extract_header_listing("DimSize", headers=headers, dtype=int)
+    n_slices = shape[2] if ndims == 3 else 1
+    n_components = int(headers.get("ElementNumberOfChannels", 1))
+
+    if index is None:
+        index = n_slices // 2
+    if not 0 <= index < n_slices:
+        raise IndexError(f"Slice {index} is out of range")
+
+    dtype = np.dtype(METAIO_NUMPY_TYPES[element_type])
+    if headers.get("BinaryDataByteOrderMSB", "False") == "True":
+        dtype = dtype.newbyteorder(">")
+
+    slice_shape = [shape[1], shape[0]]
+    if n_components > 1:
+        slice_shape.append(n_components)
+    slice_size = int(np.prod(slice_shape)) * dtype.itemsize
+
+    content = data_file.file.storage.read_range(
+        name=data_file.file.name,
+        offset=data_offset + index * slice_size,
+        length=slice_size,
+    )
+
+    if len(content) != slice_size:
+        raise ValueError("Image data is truncated")
+
+    return (
+        np.frombuffer(content, dtype=dtype)
+        .reshape(slice_shape)
+        .astype(dtype.newbyteorder("="))
+    )
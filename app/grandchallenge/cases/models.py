@@ -1,22 +1,36 @@
+import json
 import logging
 import os
+import struct
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from tempfile import TemporaryDirectory
+from tempfile import TemporaryFile
 from typing import List, Mapping, Union
 
+import SimpleITK
+from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.base import ContentFile
 from django.db import models
-from django.db.models import Q
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 from django.utils.text import get_valid_filename
-from guardian.shortcuts import assign_perm, get_groups_with_perms, remove_perm
+from guardian.shortcuts import assign_perm
 
-from grandchallenge.cases.image_builders.metaio_utils import (
-    load_sitk_image,
-    parse_mh_header,
+from grandchallenge.cases.image_builders.metaio_utils import load_sitk_image
+from grandchallenge.cases.image_files import (
+    local_image_files,
+    read_mh_header,
+    read_mh_slice,
+)
+from grandchallenge.cases.thumbnails import delete_thumbnails
+from grandchallenge.core.guardian import (
+    BULK_CREATE_BATCH_SIZE,
+    reconcile_group_perms,
 )
 from grandchallenge.core.models import UUIDModel
 from grandchallenge.core.storage import protected_s3_storage
@@ -26,6 +40,13 @@ from grandchallenge.subdomains.utils import reverse
 
 logger = logging.getLogger(__name__)
 
+# The size of the fixed part of a zip local file header
+ZIP_LOCAL_FILE_HEADER_SIZE = 30
+
+# The delay in seconds before the first retry of a failed upload, this is
+# doubled for every subsequent attempt
+FOLDER_UPLOAD_RETRY_DELAY = 0.5
+
 
 class RawImageUploadSession(UUIDModel):
     """
@@ -378,19 +399,18 @@ class Image(UUIDModel):
         ):
             raise FileNotFoundError(f"No file found for {mh_file.file}")
 
-        return parse_mh_header(mh_file.file)
+        headers, _ = read_mh_header(mh_file)
 
-    def get_sitk_image(self):
-        """
-        Return the image that belongs to this model as an SimpleITK image.
+        return headers
 
-        Requires that exactly one MHD/RAW file pair is associated with the model.
-        Otherwise it wil raise a MultipleObjectsReturned or ObjectDoesNotExist
-        exception.
+    def _get_metaimage_files(self):
+        """
+        Return the mha file, or the mhd/raw file pair, of this image.
 
         Returns
         -------
-            A SimpleITK image
+            The ImageFile that contains the header and all of the ImageFiles
+            of the image, the last of which contains the element data.
         """
         # self.files should contain 1 .mhd file
 
@@ -409,6 +429,22 @@ class Image(UUIDModel):
             )
             files = [mhd_file, raw_file]
 
+        return mhd_file, files
+
+    def get_sitk_image(self):
+        """
+        Return the image that belongs to this model as an SimpleITK image.
+
+        Requires that exactly one MHD/RAW file pair is associated with the model.
+        Otherwise it wil raise a MultipleObjectsReturned or ObjectDoesNotExist
+        exception.
+
+        Returns
+        -------
+            A SimpleITK image
+        """
+        mhd_file, files = self._get_metaimage_files()
+
         file_size = 0
         for file in files:
             if not file.file.storage.exists(name=file.file.name):
@@ -423,18 +459,9 @@ class Image(UUIDModel):
                 f"File exceeds maximum file size. (Size: {file_size}, Max: {settings.MAX_SITK_FILE_SIZE})"
             )
 
-        with TemporaryDirectory() as tempdirname:
-            for file in files:
-                with file.file.open("rb") as infile, open(
-                    Path(tempdirname) / Path(file.file.name).name, "wb"
-                ) as outfile:
-                    buffer = True
-                    while buffer:
-                        buffer = infile.read(1024)
-                        outfile.write(buffer)
-
+        with local_image_files(files) as directory:
             try:
-                hdr_path = Path(tempdirname) / Path(mhd_file.file.name).name
+                hdr_path = directory / Path(mhd_file.file.name).name
                 sitk_image = load_sitk_image(mhd_file=hdr_path)
             except RuntimeError as e:
                 logging.error(
@@ -444,6 +471,44 @@ class Image(UUIDModel):
 
         return sitk_image
 
+    def get_slice_array(self, index=None):
+        """
+        Return a 2D slice of the image as a NumPy array.
+
+        Only the bytes of the slice are read from storage for uncompressed 2D
+        and 3D images, other images are loaded in full.
+
+        Parameters
+        ----------
+        index
+            The index of the slice along the z axis, defaults to the center
+            slice.
+
+        Returns
+        -------
+            The slice in NumPy ordering [y, x, (components)]
+        """
+        mhd_file, files = self._get_metaimage_files()
+        headers, data_offset = read_mh_header(mhd_file)
+
+        slice_array = read_mh_slice(
+            headers=headers,
+            data_file=files[-1],
+            data_offset=data_offset or 0,
+            index=index,
+        )
+
+        if slice_array is None:
+            sitk_image = self.get_sitk_image()
+            slice_array = SimpleITK.GetArrayFromImage(sitk_image)
+            depth = sitk_image.GetDepth()
+            if depth > 0:
+                slice_array = slice_array[
+                    depth // 2 if index is None else index
+                ]
+
+        return slice_array
+
     def permit_viewing_by_retina_users(self):
         """Set object level view permissions for retina_graders and retina_admins."""
         for group_name in (
@@ -466,48 +531,10 @@ class Image(UUIDModel):
             image from the results image set, and is used when the pre_clear
             signal is sent.
         """
-        if exclude_jobs is None:
-            exclude_jobs = []
-
-        algorithm_jobs_groups = (
-            Q(job__inputs__image=self) | Q(job__outputs__image=self)
-        ) & ~Q(job__in=exclude_jobs)
-        reader_studies_groups = Q(
-            editors_of_readerstudy__images__id__exact=self.pk
-        ) | Q(readers_of_readerstudy__images__id__exact=self.pk)
-        archive_groups = (
-            Q(editors_of_archive__images__id__exact=self.pk)
-            | Q(uploaders_of_archive__images__id__exact=self.pk)
-            | Q(users_of_archive__images__id__exact=self.pk)
+        update_viewer_groups_permissions(
+            image_pks=[self.pk], exclude_jobs=exclude_jobs
         )
 
-        expected_groups = {
-            *Group.objects.filter(
-                algorithm_jobs_groups | reader_studies_groups | archive_groups
-            ).distinct()
-        }
-
-        # Reader study editors for reader studies that have answers that
-        # include this image.
-        for answer in self.answer_set.all():
-            expected_groups.add(answer.question.reader_study.editors_group)
-
-        current_groups = get_groups_with_perms(self, attach_perms=True)
-        current_groups = {
-            group
-            for group, perms in current_groups.items()
-            if "view_image" in perms
-        }
-
-        groups_missing_perms = expected_groups - current_groups
-        groups_with_extra_perms = current_groups - expected_groups
-
-        for g in groups_missing_perms:
-            assign_perm("view_image", g, self)
-
-        for g in groups_with_extra_perms:
-            remove_perm("view_image", g, self)
-
     def assign_view_perm_to_creator(self):
         for answer in self.answer_set.all():
             assign_perm("view_image", answer.creator, self)
@@ -520,6 +547,71 @@ class Image(UUIDModel):
         ordering = ("name",)
 
 
+def _get_expected_viewer_groups(*, image_pks, exclude_job_pks):
+    """Returns the (group pk, image pk) pairs that should view the images."""
+    expected = set()
+
+    for lookup in ("job__inputs__image", "job__outputs__image"):
+        for job_pk, group_pk, image_pk in Group.objects.filter(
+            **{f"{lookup}__in": image_pks}
+        ).values_list("job", "pk", lookup):
+            if job_pk not in exclude_job_pks:
+                expected.add((group_pk, image_pk))
+
+    lookups = (
+        "editors_of_readerstudy__images",
+        "readers_of_readerstudy__images",
+        # Reader study editors for reader studies that have answers that
+        # include this image
+        "editors_of_readerstudy__questions__answer__answer_image",
+        "editors_of_archive__images",
+        "uploaders_of_archive__images",
+        "users_of_archive__images",
+    )
+    querysets = [
+        Group.objects.filter(**{f"{lookup}__in": image_pks}).values_list(
+            "pk", lookup
+        )
+        for lookup in lookups
+    ]
+    expected.update(querysets[0].union(*querysets[1:]))
+
+    return expected
+
+
+def update_viewer_groups_permissions(*, image_pks, exclude_jobs=None):
+    """
+    Update the permissions of the viewer groups of the algorithm jobs,
+    reader studies and archives to view the images.
+
+    The expected and current permissions are compared for batches of images,
+    so only a few queries are needed for each batch.
+
+    Parameters
+    ----------
+    image_pks
+        The pks of the images whose permissions are updated.
+    exclude_jobs
+        Exclude these results from being considered. This is useful
+        when a many to many relationship is being cleared to remove the
+        images from the results image set, and is used when the pre_clear
+        signal is sent.
+    """
+    image_pks = list(image_pks)
+    exclude_job_pks = {job.pk for job in exclude_jobs or []}
+
+    for idx in range(0, len(image_pks), BULK_CREATE_BATCH_SIZE):
+        batch = image_pks[idx : idx + BULK_CREATE_BATCH_SIZE]
+        reconcile_group_perms(
+            codename="view_image",
+            model=Image,
+            object_pks=batch,
+            expected_pairs=_get_expected_viewer_groups(
+                image_pks=batch, exclude_job_pks=exclude_job_pks
+            ),
+        )
+
+
 class ImageFile(UUIDModel):
     IMAGE_TYPE_MHD = "MHD"
     IMAGE_TYPE_TIFF = "TIFF"
@@ -542,6 +634,12 @@ class ImageFile(UUIDModel):
     )
 
 
+@receiver(post_delete, sender=Image)
+def delete_image_thumbnails(*_, instance: Image, **__):
+    """Deletes the stored thumbnails of the image."""
+    delete_thumbnails(image_pk=instance.pk)
+
+
 @receiver(post_delete, sender=ImageFile)
 def delete_image_files(*_, instance: ImageFile, **__):
     """
@@ -554,29 +652,167 @@ def delete_image_files(*_, instance: ImageFile, **__):
 
 
 class FolderUpload:
-    def __init__(self, image, folder):
+    """
+    Uploads the files in a folder, such as the tiles of a dzi, to storage.
+
+    Parameters
+    ----------
+    image
+        The image that the files belong to.
+    folder
+        The folder that contains the files.
+    pack
+        Upload the files as a single uncompressed zip archive with an index
+        of the byte range of each file, rather than as separate objects.
+        Defaults to ``settings.FOLDER_UPLOAD_PACK``.
+    """
+
+    def __init__(self, image, folder, *, pack=None):
         self.image = image
         self.folder = folder
+        self.pack = settings.FOLDER_UPLOAD_PACK if pack is None else pack
 
-    def destination_filename(self, file_path):
+    @property
+    def _destination_prefix(self):
         return (
             f"{settings.IMAGE_FILES_SUBDIRECTORY}/"
             f"{str(self.image.pk)[0:2]}/"
             f"{str(self.image.pk)[2:4]}/"
-            f"{self.image.pk}/"
+            f"{self.image.pk}"
+        )
+
+    def destination_filename(self, file_path):
+        return (
+            f"{self._destination_prefix}/"
             f"{file_path.parent.parent.stem}/"
             f"{file_path.parent.stem}/"
             f"{file_path.name}"
         )
 
-    def save(self):
-        # Saves all the files in the folder, respecting the parents folder structure
-        # 2 directories deep
-        for root, _, files in os.walk(self.folder):
-            for file in files:
-                source_filename = Path(root) / file
-                destination_filename = self.destination_filename(
-                    source_filename
+    @property
+    def pack_filename(self):
+        return f"{self._destination_prefix}/{Path(self.folder).name}.zip"
+
+    @property
+    def pack_index_filename(self):
+        return f"{self._destination_prefix}/{Path(self.folder).name}.json"
+
+    def _source_filenames(self):
+        return [
+            Path(root) / file
+            for root, _, files in os.walk(self.folder)
+            for file in files
+        ]
+
+    def save(self, *, progress_callback=None):
+        """
+        Saves all the files in the folder, respecting the parents folder
+        structure 2 directories deep.
+
+        Parameters
+        ----------
+        progress_callback
+            Optional callable that is called with the number of files that
+            have been uploaded and the total number of files.
+        """
+        source_filenames = self._source_filenames()
+
+        if self.pack:
+            self._save_pack(
+                source_filenames=source_filenames,
+                progress_callback=progress_callback,
+            )
+        else:
+            self._save_files(
+                source_filenames=source_filenames,
+                progress_callback=progress_callback,
+            )
+
+    def _save_files(self, *, source_filenames, progress_callback):
+        # Every save is a separate round trip to the storage, so the files
+        # are uploaded concurrently
+        with ThreadPoolExecutor(
+            max_workers=settings.FOLDER_UPLOAD_MAX_WORKERS
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self._save_file,
+                    name=self.destination_filename(source_filename),
+                    source_filename=source_filename,
                 )
-                with open(source_filename, "rb") as open_file:
-                    protected_s3_storage.save(destination_filename, open_file)
+                for source_filename in source_filenames
+            ]
+
+            try:
+                for n_uploaded, future in enumerate(
+                    as_completed(futures), start=1
+                ):
+                    future.result()
+
+                    if progress_callback is not None:
+                        progress_callback(n_uploaded, len(futures))
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _save_pack(self, *, source_filenames, progress_callback):
+        index = {}
+
+        with TemporaryFile() as pack:
+            with zipfile.ZipFile(pack, "w", zipfile.ZIP_STORED) as zf:
+                for source_filename in source_filenames:
+                    zf.write(
+                        source_filename,
+                        arcname=source_filename.relative_to(
+                            self.folder
+                        ).as_posix(),
+                    )
+
+            # The local file headers have a variable length so the offsets
+            # of the data are read back from the archive
+            with zipfile.ZipFile(pack) as zf:
+                for info in zf.infolist():
+                    pack.seek(info.header_offset)
+                    header = pack.read(ZIP_LOCAL_FILE_HEADER_SIZE)
+                    name_length, extra_length = struct.unpack(
+                        "<HH", header[26:30]
+                    )
+                    index[info.filename] = [
+                        info.header_offset
+                        + ZIP_LOCAL_FILE_HEADER_SIZE
+                        + name_length
+                        + extra_length,
+                        info.file_size,
+                    ]
+
+            pack.seek(0)
+            self._save_file(name=self.pack_filename, content=pack)
+
+        # The index is saved last so that the pack is only used once it
+        # is complete
+        self._save_file(
+            name=self.pack_index_filename,
+            content=ContentFile(json.dumps(index).encode("utf-8")),
+        )
+
+        if progress_callback is not None:
+            progress_callback(len(source_filenames), len(source_filenames))
+
+    @staticmethod
+    def _save_file(*, name, source_filename=None, content=None):
+        for attempt in range(settings.FOLDER_UPLOAD_MAX_RETRIES + 1):
+            try:
+                if source_filename is not None:
+                    with open(source_filename, "rb") as open_file:
+                        protected_s3_storage.save(name, open_file)
+                else:
+                    content.seek(0)
+                    protected_s3_storage.save(name, content)
+                return
+            except (BotoCoreError, ClientError) as e:
+                if attempt == settings.FOLDER_UPLOAD_MAX_RETRIES:
+                    raise
+
+                logger.warning(f"Retrying upload of {name} after error: {e}")
+                time.sleep(FOLDER_UPLOAD_RETRY_DELAY * 2 ** attempt)
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import CharField, SerializerMethodField
@@ -7,7 +9,7 @@ from rest_framework.relations import (
     SlugRelatedField,
 )
 
-from grandchallenge.algorithms.models import Algorithm
+from grandchallenge.algorithms.models import Algorithm, Job
 from grandchallenge.api.swagger import swagger_schema_fields_for_charfield
 from grandchallenge.archives.models import Archive
 from grandchallenge.cases.models import (
@@ -17,6 +19,7 @@ from grandchallenge.cases.models import (
     RawImageUploadSession,
 )
 from grandchallenge.reader_studies.models import Answer, ReaderStudy
+from grandchallenge.subdomains.utils import reverse
 
 
 class ImageFileSerializer(serializers.ModelSerializer):
@@ -25,7 +28,49 @@ class ImageFileSerializer(serializers.ModelSerializer):
         fields = ("pk", "image", "file", "image_type")
 
 
+def get_requested_fields(*, request):
+    """Returns the fields in the fields query parameter of request, if any."""
+    if request is None or not request.query_params.get("fields"):
+        return None
+
+    return {f.strip() for f in request.query_params["fields"].split(",")}
+
+
+def get_job_urls(*, image_pks):
+    """Returns the api urls of the jobs that use each image as an input."""
+    job_urls = defaultdict(list)
+
+    for image_pk, job_pk in (
+        Job.objects.filter(inputs__image__in=image_pks)
+        .values_list("inputs__image", "pk")
+        .order_by("created")
+    ):
+        job_urls[image_pk].append(
+            reverse("api:algorithms-job-detail", kwargs={"pk": job_pk})
+        )
+
+    return job_urls
+
+
+class ImageListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        images = list(data.all() if hasattr(data, "all") else data)
+
+        if "job_set" in self.child.fields:
+            # Resolve the jobs of the whole page at once
+            self.child.job_urls = get_job_urls(
+                image_pks=[image.pk for image in images]
+            )
+
+        return super().to_representation(images)
+
+
 class HyperlinkedImageSerializer(serializers.ModelSerializer):
+    """
+    Serializes images, the fields can be selected with a comma separated
+    list in the fields query parameter of the request.
+    """
+
     files = ImageFileSerializer(many=True, read_only=True)
     job_set = SerializerMethodField()
     archive_set = HyperlinkedRelatedField(
@@ -38,14 +83,24 @@ class HyperlinkedImageSerializer(serializers.ModelSerializer):
         view_name="api:reader-study-detail",
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        fields = get_requested_fields(request=self.context.get("request"))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
     def get_job_set(self, obj):
-        return [
-            job.api_url
-            for civ in obj.componentinterfacevalue_set.all()
-            for job in civ.algorithms_jobs_as_input.all()
-        ]
+        try:
+            job_urls = self.job_urls
+        except AttributeError:
+            job_urls = get_job_urls(image_pks=[obj.pk])
+
+        return job_urls.get(obj.pk, [])
 
     class Meta:
+        list_serializer_class = ImageListSerializer
         model = Image
         fields = (
             "pk",
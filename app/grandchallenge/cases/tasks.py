@@ -3,20 +3,34 @@ import tarfile
 import zipfile
 from collections import defaultdict
 from datetime import timedelta
-from itertools import chain
+from itertools import chain, repeat
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import Callable, Dict, Iterable, List, Sequence, Set, Tuple
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
+from billiard.pool import Pool
 from celery import shared_task
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
+from django.core.files import File
 from django.db import transaction
 from django.utils import timezone
 
 from grandchallenge.cases.emails import send_failed_file_import
-from grandchallenge.cases.image_builders.dicom import image_builder_dicom
+from grandchallenge.cases.image_builders.dicom import (
+    group_files_by_study,
+    image_builder_dicom,
+)
 from grandchallenge.cases.image_builders.fallback import image_builder_fallback
 from grandchallenge.cases.image_builders.metaio_mhd_mha import (
     image_builder_mhd,
@@ -35,6 +49,8 @@ from grandchallenge.cases.models import (
     RawImageFile,
     RawImageUploadSession,
 )
+from grandchallenge.cases.thumbnails import THUMBNAIL_ERRORS, get_thumbnail
+from grandchallenge.core.utils.transfer import copy_fileobj
 from grandchallenge.jqfileupload.widgets.uploader import (
     NotFoundError,
     StagedAjaxFile,
@@ -68,6 +84,10 @@ def populate_provisioning_directory(
     Provisions provisioning_dir with the files associated using the given
     list of RawImageFile objects.
 
+    The files are streamed directly from the staged uploads, one at a time.
+    Zip and tar archives are extracted as they are read, so the archive
+    itself is never written to the provisioning directory.
+
     Parameters
     ----------
     raw_files:
@@ -84,32 +104,35 @@ def populate_provisioning_directory(
     """
     provisioning_dir = Path(provisioning_dir)
 
-    def copy_to_tmpdir(image_file: RawImageFile):
-        staged_file = StagedAjaxFile(image_file.staged_file_id)
-        if not staged_file.exists:
-            raise ValueError(
-                f"staged file {image_file.staged_file_id} does not exist"
-            )
-
-        with open(provisioning_dir / staged_file.name, "wb") as dest_file:
-            with staged_file.open() as src_file:
-                buffer_size = 0x10000
-                first = True
-                buffer = b""
-                while first or (len(buffer) >= buffer_size):
-                    first = False
-                    buffer = src_file.read(buffer_size)
-                    dest_file.write(buffer)
-
     exceptions_raised = 0
+    archives = []
+
     for raw_file in raw_files:
         try:
-            copy_to_tmpdir(raw_file)
+            archive_type = _provision_file(
+                raw_file=raw_file, provisioning_dir=provisioning_dir
+            )
         except Exception:
-            logger.exception(
-                f"populate_provisioning_directory exception "
-                f"for file: '{raw_file.filename}'"
+            _log_provisioning_exception(raw_file=raw_file)
+            exceptions_raised += 1
+        else:
+            if archive_type is not None:
+                archives.append((raw_file, archive_type))
+
+    # Archives are extracted after the other files have been provisioned,
+    # and in order, so that files with the same name are always resolved
+    # in the same way
+    for raw_file, archive_type in archives:
+        try:
+            _provision_archive(
+                raw_file=raw_file,
+                archive_type=archive_type,
+                provisioning_dir=provisioning_dir,
             )
+        except ValidationError:
+            raise
+        except Exception:
+            _log_provisioning_exception(raw_file=raw_file)
             exceptions_raised += 1
 
     if exceptions_raised > 0:
@@ -119,6 +142,101 @@ def populate_provisioning_directory(
         )
 
 
+def _log_provisioning_exception(*, raw_file):
+    logger.exception(
+        f"populate_provisioning_directory exception "
+        f"for file: '{raw_file.filename}'"
+    )
+
+
+def _get_staged_file(*, raw_file) -> StagedAjaxFile:
+    staged_file = StagedAjaxFile(raw_file.staged_file_id)
+
+    if not staged_file.exists:
+        raise ValueError(
+            f"staged file {raw_file.staged_file_id} does not exist"
+        )
+
+    return staged_file
+
+
+def _provision_file(*, raw_file, provisioning_dir: Path) -> Optional[str]:
+    """
+    Copies the staged file of raw_file to provisioning_dir, unless it is an
+    archive.
+
+    Returns
+    -------
+        The type of the archive, or None if the file was copied.
+    """
+    staged_file = _get_staged_file(raw_file=raw_file)
+
+    with staged_file.open() as src:
+        archive_type = _get_archive_type(src)
+
+        if archive_type is None:
+            _copy_to_file(src, provisioning_dir / staged_file.name)
+
+    return archive_type
+
+
+def _provision_archive(*, raw_file, archive_type, provisioning_dir: Path):
+    staged_file = _get_staged_file(raw_file=raw_file)
+
+    with staged_file.open() as src:
+        _stream_extract(
+            src=src,
+            dest=provisioning_dir / staged_file.name,
+            archive_type=archive_type,
+            provisioning_dir=provisioning_dir,
+        )
+
+
+def _copy_to_file(src, dest: Path):
+    with open(dest, "wb") as dest_file:
+        copy_fileobj(src, dest_file)
+
+
+def _get_archive_type(src) -> Optional[str]:
+    """Returns "zip" or "tar" if src is an archive, otherwise None."""
+    try:
+        if zipfile.is_zipfile(src):
+            return "zip"
+
+        src.seek(0)
+
+        try:
+            with tarfile.open(fileobj=src, mode="r|*"):
+                return "tar"
+        except (tarfile.TarError, EOFError):
+            return None
+    finally:
+        src.seek(0)
+
+
+def _stream_extract(*, src, dest: Path, archive_type: str, provisioning_dir):
+    if archive_type == "zip":
+        with zipfile.ZipFile(src) as zf:
+            extracted = extract(zf, provisioning_dir)
+    else:
+        # The tar file is read as a stream, so members are extracted in the
+        # order in which they are stored rather than sorted by name
+        extracted = False
+        with tarfile.open(fileobj=src, mode="r|*") as tf:
+            for info in tf:
+                if info.isdir():
+                    continue
+
+                _check_sanity(info, True, provisioning_dir)
+                tf.extract(info, provisioning_dir)
+                extracted = True
+
+    if not extracted:
+        # Keep the archive as a file, as happens for on disk archives
+        src.seek(0)
+        _copy_to_file(src, dest)
+
+
 DEFAULT_IMAGE_BUILDERS = [
     image_builder_mhd,
     image_builder_nifti,
@@ -128,6 +246,21 @@ DEFAULT_IMAGE_BUILDERS = [
 ]
 
 
+def _group_files_individually(files: Set[Path]) -> List[Set[Path]]:
+    return [{file} for file in sorted(files)]
+
+
+# Builders that can process independent groups of files in parallel, mapped
+# to the function that splits their input files into these groups. Builders
+# that are not listed here always process all of their files in one go.
+PARALLEL_IMAGE_BUILDER_GROUPERS = {
+    image_builder_mhd: _group_files_individually,
+    image_builder_nifti: _group_files_individually,
+    image_builder_dicom: group_files_by_study,
+    image_builder_fallback: _group_files_individually,
+}
+
+
 def remove_duplicate_files(
     session_files: Sequence[RawImageFile],
 ) -> Tuple[Sequence[RawImageFile], Sequence[RawImageFile]]:
@@ -253,8 +386,11 @@ def check_compressed_and_extract(file_path, target_path, checked_paths=None):
 
 def extract_files(source_path: Path):
     checked_paths = []
-    for file_path in source_path.iterdir():
-        check_compressed_and_extract(file_path, source_path, checked_paths)
+    for root, _, files in os.walk(source_path):
+        for file in files:
+            check_compressed_and_extract(
+                Path(os.path.join(root, file)), root, checked_paths
+            )
 
 
 @shared_task
@@ -321,6 +457,37 @@ def build_images(*, upload_session_pk):
             upload_session.status = upload_session.SUCCESS
             upload_session.save()
 
+    image_pks = upload_session.image_set.values_list("pk", flat=True)
+    if image_pks:
+        generate_thumbnails.apply_async(
+            kwargs={"image_pks": [str(pk) for pk in image_pks]}
+        )
+
+
+@shared_task
+def generate_thumbnails(*, image_pks, width=None, height=None):
+    """
+    Stores the thumbnails of the images so that they do not need to be
+    created when they are first requested.
+
+    Parameters
+    ----------
+    image_pks
+        The pks of the images.
+    width, height
+        The maximum size of the thumbnails, defaults to the size of the
+        thumbnails that are requested by the retina workstation.
+    """
+    width = width or settings.RETINA_DEFAULT_THUMBNAIL_SIZE
+    height = height or settings.RETINA_DEFAULT_THUMBNAIL_SIZE
+
+    for image in Image.objects.filter(pk__in=image_pks):
+        try:
+            get_thumbnail(image=image, width=width, height=height)
+        except THUMBNAIL_ERRORS as e:
+            # Not every image has a slice that can be shown as a thumbnail
+            logger.warning(f"Could not create thumbnail for {image.pk}: {e}")
+
 
 def _handle_raw_image_files(tmp_dir, upload_session):
     input_files = {
@@ -362,6 +529,7 @@ def import_images(
     files: Set[Path],
     origin: RawImageUploadSession = None,
     builders: Iterable[Callable] = None,
+    max_workers: int = None,
 ) -> ImporterResult:
     """
     Creates Image objects from a set of files.
@@ -374,6 +542,12 @@ def import_images(
         The RawImageUploadSession (if any) that was the source of these files
     builders
         The Image Builders to use to try and convert these files into Images
+    max_workers
+        The number of processes to use for building the images, defaults to
+        settings.IMAGE_BUILDER_MAX_WORKERS. If this is greater than 1, the
+        builders in PARALLEL_IMAGE_BUILDER_GROUPERS will process independent
+        groups of files in parallel. The builders themselves are still run
+        one after the other.
 
     Returns
     -------
@@ -390,27 +564,36 @@ def import_images(
 
     created_image_prefix = str(origin.pk)[:8] if origin is not None else ""
     builders = builders if builders is not None else DEFAULT_IMAGE_BUILDERS
+    max_workers = (
+        max_workers
+        if max_workers is not None
+        else settings.IMAGE_BUILDER_MAX_WORKERS
+    )
 
-    for builder in builders:
-        builder_result: ImageBuilderResult = builder(
-            files=files - consumed_files,
-            created_image_prefix=created_image_prefix,
-        )
+    with TemporaryDirectory(prefix="import_images-") as spool_dir:
+        for builder in builders:
+            builder_result = _run_builder(
+                builder=builder,
+                files=files - consumed_files,
+                created_image_prefix=created_image_prefix,
+                max_workers=max_workers,
+                spool_dir=spool_dir,
+            )
 
-        new_images |= builder_result.new_images
-        new_image_files |= builder_result.new_image_files
-        new_folders |= builder_result.new_folders
-        consumed_files |= builder_result.consumed_files
+            new_images |= builder_result.new_images
+            new_image_files |= builder_result.new_image_files
+            new_folders |= builder_result.new_folders
+            consumed_files |= builder_result.consumed_files
 
-        for filepath, msg in builder_result.file_errors.items():
-            file_errors[filepath].append(msg)
+            for filepath, msg in builder_result.file_errors.items():
+                file_errors[filepath].append(msg)
 
-    _store_images(
-        origin=origin,
-        images=new_images,
-        image_files=new_image_files,
-        folders=new_folders,
-    )
+        _store_images(
+            origin=origin,
+            images=new_images,
+            image_files=new_image_files,
+            folders=new_folders,
+        )
 
     return ImporterResult(
         new_images=new_images,
@@ -419,6 +602,87 @@ def import_images(
     )
 
 
+def _run_builder(
+    *,
+    builder: Callable,
+    files: Set[Path],
+    created_image_prefix: str,
+    max_workers: int,
+    spool_dir: str,
+) -> ImageBuilderResult:
+    grouper = PARALLEL_IMAGE_BUILDER_GROUPERS.get(builder)
+
+    if grouper is None or max_workers <= 1 or len(files) <= 1:
+        return builder(files=files, created_image_prefix=created_image_prefix)
+
+    file_groups = grouper(files)
+
+    result = ImageBuilderResult(
+        new_images=set(),
+        new_image_files=set(),
+        new_folders=set(),
+        consumed_files=set(),
+        file_errors={},
+    )
+
+    # The pool of billiard is used as the tasks run in the daemonic
+    # processes of the celery prefork pool, which the pools of the standard
+    # library do not allow to have children
+    with Pool(processes=min(max_workers, len(file_groups))) as pool:
+        # starmap returns the results in the order of the groups, so the
+        # merged result does not depend on which process finishes first
+        for group_result, spooled_files in pool.starmap(
+            _build_file_group,
+            zip(
+                repeat(builder),
+                file_groups,
+                repeat(created_image_prefix),
+                repeat(spool_dir),
+            ),
+        ):
+            for image_file, name, path in spooled_files:
+                image_file.file = File(open(path, "rb"), name=name)
+                result.new_image_files.add(image_file)
+
+            result.new_images |= group_result.new_images
+            result.new_folders |= group_result.new_folders
+            result.consumed_files |= group_result.consumed_files
+            result.file_errors.update(group_result.file_errors)
+
+    return result
+
+
+def _build_file_group(
+    builder: Callable,
+    files: Set[Path],
+    created_image_prefix: str,
+    spool_dir: str,
+):
+    """
+    Runs the builder on a group of files in a worker process.
+
+    The image files created by the builder are backed by anonymous temporary
+    files which cannot be sent back to the parent process, so their contents
+    are spooled to named files in spool_dir, and the parent reopens them.
+    """
+    result = builder(files=files, created_image_prefix=created_image_prefix)
+
+    spooled_files = []
+    for image_file in result.new_image_files:
+        with NamedTemporaryFile(dir=spool_dir, delete=False) as spool:
+            image_file.file.seek(0)
+            copy_fileobj(image_file.file, spool)
+
+        spooled_files.append((image_file, image_file.file.name, spool.name))
+
+        image_file.file.close()
+        image_file.file = None
+
+    result.new_image_files = set()
+
+    return result, spooled_files
+
+
 def _store_images(
     *,
     origin: RawImageUploadSession,
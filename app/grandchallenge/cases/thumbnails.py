@@ -0,0 +1,89 @@
+from functools import lru_cache
+from io import BytesIO
+
+from PIL import Image as PILImage
+from django.conf import settings
+from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
+from django.core.files.base import ContentFile
+
+from grandchallenge.core.storage import private_s3_storage
+
+THUMBNAIL_FORMAT = "png"
+
+# The errors that are raised when an image has no slice that can be shown.
+# The image files could be missing, the header could not be parsed, the
+# slice could be out of range or PIL could not convert the slice to png.
+THUMBNAIL_ERRORS = (
+    ObjectDoesNotExist,
+    MultipleObjectsReturned,
+    OSError,
+    ValueError,
+    IndexError,
+    TypeError,
+    NotImplementedError,
+)
+
+
+def get_thumbnail_directory(*, image_pk) -> str:
+    return f"thumbnails/{image_pk}"
+
+
+def get_thumbnail_name(*, image_pk, width: int, height: int) -> str:
+    return f"{get_thumbnail_directory(image_pk=image_pk)}/{width}x{height}.{THUMBNAIL_FORMAT}"
+
+
+def create_thumbnail(*, image, width: int, height: int) -> bytes:
+    """
+    Creates a png thumbnail of the center slice of image that fits within
+    width x height.
+    """
+    pil_image = PILImage.fromarray(image.get_slice_array())
+    pil_image.thumbnail((width, height), PILImage.ANTIALIAS)
+
+    buffer = BytesIO()
+    pil_image.save(buffer, format=THUMBNAIL_FORMAT)
+
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=settings.IMAGE_THUMBNAIL_CACHE_SIZE)
+def _read_thumbnail(name: str) -> bytes:
+    # Images do not change, so the stored thumbnails never go stale.
+    # Misses raise and are not cached.
+    return private_s3_storage.read(name=name)
+
+
+def get_thumbnail(*, image, width: int, height: int) -> bytes:
+    """
+    Returns the png thumbnail of image that fits within width x height.
+
+    The thumbnails of the sizes in IMAGE_THUMBNAIL_STORED_SIZES are kept in
+    storage and the most recently used ones are also kept in memory, they
+    are only created when they are not in storage. Other sizes are created
+    on every call, so that clients cannot fill the storage with sizes.
+
+    Raises
+    ------
+    THUMBNAIL_ERRORS
+        Raised when the image has no slice that can be shown.
+    """
+    if (width, height) not in settings.IMAGE_THUMBNAIL_STORED_SIZES:
+        return create_thumbnail(image=image, width=width, height=height)
+
+    name = get_thumbnail_name(image_pk=image.pk, width=width, height=height)
+
+    try:
+        return _read_thumbnail(name)
+    except FileNotFoundError:
+        content = create_thumbnail(image=image, width=width, height=height)
+        private_s3_storage.save(name, ContentFile(content))
+        return content
+
+
+def delete_thumbnails(*, image_pk):
+    """Removes all of the stored thumbnails of an image."""
+    directory = get_thumbnail_directory(image_pk=image_pk)
+    _, files = private_s3_storage.listdir(directory)
+
+    for file in files:
+        private_s3_storage.delete(f"{directory}/{file}")
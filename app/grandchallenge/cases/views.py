@@ -24,6 +24,7 @@ from rest_framework_csv.renderers import PaginatedCSVRenderer
 from rest_framework_guardian.filters import ObjectPermissionsFilter
 
 from grandchallenge.algorithms.tasks import create_algorithm_jobs_for_session
+from grandchallenge.api.pagination import MaxLimit1000CursorPagination
 from grandchallenge.archives.tasks import add_images_to_archive
 from grandchallenge.cases.models import (
     Image,
@@ -36,6 +37,7 @@ from grandchallenge.cases.serializers import (
     RawImageFileSerializer,
     RawImageUploadSessionPatchSerializer,
     RawImageUploadSessionSerializer,
+    get_requested_fields,
 )
 from grandchallenge.core.permissions.rest_framework import (
     DjangoObjectOnlyWithCustomPostPermissions,
@@ -100,13 +102,14 @@ class OSDImageDetail(
 
 
 class ImageViewSet(ReadOnlyModelViewSet):
+    """
+    Lists the images, a cursor based pagination is used when the cursor
+    query parameter is set, e.g. ?cursor=&limit=1000 for the first page,
+    which has a constant cost per page for walking large archives.
+    """
+
     serializer_class = HyperlinkedImageSerializer
-    queryset = Image.objects.all().prefetch_related(
-        "files",
-        "archive_set",
-        "componentinterfacevalue_set__algorithms_jobs_as_input",
-        "readerstudies",
-    )
+    queryset = Image.objects.all()
     permission_classes = (DjangoObjectPermissions,)
     filter_backends = (
         DjangoFilterBackend,
@@ -121,6 +124,35 @@ class ImageViewSet(ReadOnlyModelViewSet):
         *api_settings.DEFAULT_RENDERER_CLASSES,
         PaginatedCSVRenderer,
     )
+    prefetch_fields = {
+        "files": "files",
+        "archive_set": "archive_set",
+        "reader_study_set": "readerstudies",
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = get_requested_fields(request=self.request)
+
+        return queryset.prefetch_related(
+            *(
+                prefetch
+                for field, prefetch in self.prefetch_fields.items()
+                if fields is None or field in fields
+            )
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if (
+                self.request is not None
+                and "cursor" in self.request.query_params
+            ):
+                self._paginator = MaxLimit1000CursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
 
 
 class RawImageUploadSessionViewSet(
@@ -0,0 +1,124 @@
+import pickle
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from guardian.shortcuts import get_perms
+
+from grandchallenge.challenges.models import Challenge
+
+
+def _challenge_version_key(*, short_name):
+    return f"challenges:context:{short_name.lower()}:version"
+
+
+def _user_version_key(*, user_pk):
+    return f"challenges:context:user:{user_pk}:version"
+
+
+def _get_version(key) -> str:
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def _set_new_version(key):
+    cache.set(key, uuid.uuid4().hex, timeout=None)
+
+
+def _invalidate(key):
+    _set_new_version(key)
+    # A request could cache the data before the transaction is committed,
+    # so the version is changed again after the commit
+    transaction.on_commit(lambda: _set_new_version(key))
+
+
+def invalidate_challenge(*, short_name):
+    """Changes the version of the cached context of a challenge."""
+    _invalidate(_challenge_version_key(short_name=short_name))
+
+
+def invalidate_user(*, user_pk):
+    """Changes the version of the cached permissions of a user."""
+    _invalidate(_user_version_key(user_pk=user_pk))
+
+
+@lru_cache(maxsize=settings.CHALLENGES_CONTEXT_CACHE_SIZE)
+def _get_challenge_data(short_name: str, version: str) -> bytes:
+    # The pickled data is kept, rather than the instance, so that every
+    # request gets its own copy of the challenge
+    key = f"challenges:context:{short_name}:{version}"
+    data = cache.get(key)
+
+    if data is None:
+        challenge = (
+            Challenge.objects.select_related("forum")
+            .prefetch_related("phase_set", "page_set")
+            .get(short_name__iexact=short_name)
+        )
+        data = pickle.dumps(challenge)
+        cache.set(key, data, timeout=settings.CHALLENGES_CONTEXT_CACHE_TIMEOUT)
+
+    return data
+
+
+def get_challenge(*, short_name) -> Challenge:
+    """
+    Gets the challenge with its forum, phases and pages for a subdomain.
+
+    The challenges are cached in this process and in the django cache, the
+    caches are invalidated when the challenge, its phases or its pages
+    change.
+
+    Raises
+    ------
+    Challenge.DoesNotExist
+        Raised when there is no challenge with this short name.
+    """
+    short_name = short_name.lower()
+    version = _get_version(_challenge_version_key(short_name=short_name))
+    return pickle.loads(_get_challenge_data(short_name, version))
+
+
+def get_challenge_user_context(*, challenge, user):
+    """
+    Gets the permissions of the user for the challenge and whether they
+    participate in it.
+
+    The result is cached until the challenge or the groups of the user
+    change.
+    """
+    challenge_version_key = _challenge_version_key(
+        short_name=challenge.short_name
+    )
+    user_version_key = _user_version_key(user_pk=user.pk)
+
+    versions = cache.get_many([challenge_version_key, user_version_key])
+    if len(versions) != 2:
+        versions = {
+            challenge_version_key: _get_version(challenge_version_key),
+            user_version_key: _get_version(user_version_key),
+        }
+
+    key = (
+        f"challenges:context:{challenge.pk}:user:{user.pk}:"
+        f"{versions[challenge_version_key]}:{versions[user_version_key]}"
+    )
+    context = cache.get(key)
+
+    if context is None:
+        context = {
+            "challenge_perms": get_perms(user, challenge),
+            "user_is_participant": challenge.is_participant(user),
+        }
+        cache.set(
+            key, context, timeout=settings.CHALLENGES_CONTEXT_CACHE_TIMEOUT
+        )
+
+    return context
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+from guardian.models import GroupObjectPermission, UserObjectPermission
+
+from grandchallenge.challenges.cache import (
+    invalidate_challenge,
+    invalidate_user,
+)
+from grandchallenge.challenges.models import Challenge
+from grandchallenge.evaluation.models import Phase
+from grandchallenge.pages.models import Page
+
+
+@receiver(pre_save, sender=Challenge)
+def store_previous_short_name(*_, instance: Challenge, **__):
+    # The challenge could be renamed, then the context that is cached for
+    # the previous subdomain needs to be invalidated as well
+    instance._previous_short_name = (
+        None
+        if instance._state.adding
+        else Challenge.objects.filter(pk=instance.pk)
+        .values_list("short_name", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+def invalidate_challenge_context(*_, instance: Challenge, **__):
+    invalidate_challenge(short_name=instance.short_name)
+
+    previous_short_name = getattr(instance, "_previous_short_name", None)
+    if previous_short_name not in (None, instance.short_name):
+        invalidate_challenge(short_name=previous_short_name)
+
+
+@receiver(post_save, sender=Phase)
+@receiver(post_delete, sender=Phase)
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Page)
+def invalidate_challenge_context_for_child(*_, instance, **__):
+    try:
+        short_name = instance.challenge.short_name
+    except ObjectDoesNotExist:
+        # The challenge is deleted, which invalidates the context itself
+        return
+
+    invalidate_challenge(short_name=short_name)
+
+
+@receiver(post_save, sender=UserObjectPermission)
+@receiver(post_delete, sender=UserObjectPermission)
+@receiver(post_save, sender=GroupObjectPermission)
+@receiver(post_delete, sender=GroupObjectPermission)
+def invalidate_challenge_context_for_permission(*_, instance, **__):
+    if instance.content_type_id != (
+        ContentType.objects.get_for_model(Challenge).pk
+    ):
+        return
+
+    short_name = (
+        Challenge.objects.filter(pk=instance.object_pk)
+        .values_list("short_name", flat=True)
+        .first()
+    )
+
+    if short_name is not None:
+        invalidate_challenge(short_name=short_name)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_context(*_, instance, **__):
+    # For instance, the user could have become a superuser
+    invalidate_user(user_pk=instance.pk)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def invalidate_user_context_for_groups(
+    *_, instance, action, reverse, pk_set, **__
+):
+    if action not in ["post_add", "post_remove", "pre_clear"]:
+        # nothing to do for the other actions
+        return
+
+    if not reverse:
+        user_pks = [instance.pk]
+    elif pk_set is None:
+        # When using a _clear action, pk_set is None
+        # https://docs.djangoproject.com/en/2.2/ref/signals/#m2m-changed
+        user_pks = instance.user_set.values_list("pk", flat=True)
+    else:
+        user_pks = pk_set
+
+    for user_pk in user_pks:
+        invalidate_user(user_pk=user_pk)
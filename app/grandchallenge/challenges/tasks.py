@@ -2,6 +2,7 @@ from celery import shared_task
 from django.core.mail import mail_managers
 from requests import exceptions, get
 
+from grandchallenge.challenges.cache import invalidate_challenge
 from grandchallenge.challenges.models import Challenge, ExternalChallenge
 from grandchallenge.evaluation.models import Evaluation
 from grandchallenge.subdomains.utils import reverse
@@ -32,6 +33,7 @@ def update_challenge_results_cache():
             )
 
         Challenge.objects.filter(pk=c.pk).update(**kwargs)
+        invalidate_challenge(short_name=c.short_name)
 
 
 @shared_task
@@ -5,23 +5,30 @@ import tarfile
 from contextlib import contextmanager
 from pathlib import Path
 from random import randint
-from shutil import copyfileobj
 from tempfile import SpooledTemporaryFile
-from time import sleep
-from typing import Tuple
+from time import monotonic, sleep
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 import docker
 from django.conf import settings
 from django.core.files import File
 from django.db.models import Model, QuerySet
+from django.utils._os import safe_join
 from docker.api.container import ContainerApiMixin
 from docker.errors import APIError, ImageNotFound
 from docker.tls import TLSConfig
 from docker.types import LogConfig
 from requests import HTTPError
 
+from grandchallenge.components.backends.image_cache import DockerImageCache
+from grandchallenge.core.utils.transfer import (
+    TRANSFER_BUFFER_SIZE,
+    copy_fileobj,
+)
+
 MAX_SPOOL_SIZE = 1_000_000_000  # 1GB
 LOGLINES = 2000  # The number of loglines to keep
+PROGRESS_UPDATE_INTERVAL = 5  # The seconds between progress updates on a job
 
 # Docker logline error message with optional RFC3339 timestamp
 LOGLINE_REGEX = r"^(?P<timestamp>([\d]+)-(0[1-9]|1[012])-(0[1-9]|[12][\d]|3[01])[Tt]([01][\d]|2[0-3]):([0-5][\d]):([0-5][\d]|60)(\.[\d]+)?(([Zz])|([\+|\-]([01][\d]|2[0-3]):[0-5][\d])))?(?P<error_message>.*)$"
@@ -166,21 +173,9 @@ class DockerConnection:
         self.stop_and_cleanup()
 
     def _pull_images(self):
-        try:
-            self._client.images.get(name=self._exec_image_sha256)
-        except ImageNotFound:
-            # This can take a long time so increase the default timeout #1330
-            old_timeout = self._client.api.timeout
-            self._client.api.timeout = 600  # 10 minutes
-
-            with SpooledTemporaryFile(
-                max_size=MAX_SPOOL_SIZE
-            ) as fdst, self._exec_image.open("rb") as fsrc:
-                copyfileobj(fsrc=fsrc, fdst=fdst)
-                fdst.seek(0)
-                self._client.images.load(fdst)
-
-            self._client.api.timeout = old_timeout
+        DockerImageCache(client=self._client).load(
+            image_sha256=self._exec_image_sha256, image=self._exec_image
+        )
 
 
 class Executor(DockerConnection):
@@ -203,6 +198,9 @@ class Executor(DockerConnection):
         self._stderr = ""
         self._result = {}
 
+        self._provisioning_started = None
+        self._provisioning_reported = None
+
     def execute(self):
         self._pull_images()
         self._create_io_volumes()
@@ -251,13 +249,53 @@ class Executor(DockerConnection):
         ) as writer:
             self._copy_input_files(writer=writer)
 
+    @property
+    def _job_ids(self) -> List[str]:
+        """The ids of the jobs that are run by this executor."""
+        return [self._job_id]
+
+    @property
+    def _input_members(self) -> Dict[str, File]:
+        """The input files keyed by their paths relative to /input/."""
+        return {Path(file.name).name: file for file in self._input_files}
+
     def _copy_input_files(self, writer):
-        for file in self._input_files:
-            put_file(
+        self._put_input_files(
+            writer=writer, src_files=self._input_members, dest="/input/"
+        )
+
+    def _put_input_files(self, *, writer, src_files: Dict[str, File], dest):
+        """Copies the files, keyed by name, to the directory dest."""
+        if settings.COMPONENTS_BATCHED_INPUT_PROVISIONING:
+            self._provisioning_started = monotonic()
+            put_files(
                 container=writer,
-                src=file,
-                dest=f"/input/{Path(file.name).name}",
+                src_files=src_files,
+                dest=dest,
+                progress_callback=self._update_provisioning_progress,
             )
+        else:
+            for name, file in src_files.items():
+                put_file(container=writer, src=file, dest=f"{dest}{name}")
+
+    def _update_provisioning_progress(self, copied: int, total: int):
+        """Records the progress and rate of the input copy on the job."""
+        now = monotonic()
+
+        if (
+            copied < total
+            and self._provisioning_reported is not None
+            and now - self._provisioning_reported < PROGRESS_UPDATE_INTERVAL
+        ):
+            return
+
+        self._provisioning_reported = now
+        elapsed = now - self._provisioning_started
+
+        self._job_class.objects.filter(pk__in=self._job_ids).update(
+            input_provisioning_progress=copied / total if total else 1.0,
+            input_provisioning_rate=copied / elapsed if elapsed else None,
+        )
 
     def _chmod_volumes(self):
         """Ensure that the i/o directories are writable."""
@@ -312,9 +350,6 @@ class Executor(DockerConnection):
 
     def _get_outputs(self):
         """Create ComponentInterfaceValues from the output interfaces"""
-        job = self._job_class.objects.get(pk=self._job_id)
-        output_interfaces = self._output_interfaces.all()
-
         with cleanup(
             self._client.containers.run(
                 image=self._io_image,
@@ -328,10 +363,64 @@ class Executor(DockerConnection):
                 **self._run_kwargs,
             )
         ) as reader:
-            for output in output_interfaces:
-                output.create_component_interface_values(
-                    reader=reader, job=job
-                )
+            self._create_outputs(reader=reader)
+
+    def _create_outputs(self, *, reader):
+        job = self._job_class.objects.get(pk=self._job_id)
+
+        for output in self._output_interfaces.all():
+            output.create_component_interface_values(reader=reader, job=job)
+
+
+class BatchExecutor(Executor):
+    """
+    Runs a batch of jobs for the same container image in a single container.
+
+    The volumes and the io, executor and reader containers are created once
+    for the whole batch. The inputs of each job are placed in
+    /input/<job id>/, and the container must write the outputs of each job
+    to /output/<job id>/. The outputs are then added to the separate jobs.
+    """
+
+    def __init__(self, *args, jobs: Dict[str, Tuple[File, ...]], **kwargs):
+        """
+        Parameters
+        ----------
+        jobs
+            The input files of each job in the batch, keyed by the job id
+        """
+        super().__init__(*args, input_files=(), **kwargs)
+        self._jobs = jobs
+        self._errors = {}
+
+    @property
+    def errors(self) -> Dict[str, str]:
+        """The errors of the jobs whose outputs could not be created."""
+        return self._errors
+
+    @property
+    def _job_ids(self) -> List[str]:
+        return [*self._jobs]
+
+    @property
+    def _input_members(self) -> Dict[str, File]:
+        return {
+            f"{job_id}/{Path(file.name).name}": file
+            for job_id, files in self._jobs.items()
+            for file in files
+        }
+
+    def _create_outputs(self, *, reader):
+        output_interfaces = self._output_interfaces.all()
+
+        for job in self._job_class.objects.filter(pk__in=self._job_ids):
+            try:
+                for output in output_interfaces:
+                    output.create_component_interface_values(
+                        reader=reader, job=job, output_dir=f"/output/{job.pk}"
+                    )
+            except ComponentException as e:
+                self._errors[str(job.pk)] = str(e)
 
 
 class Service(DockerConnection):
@@ -460,6 +549,174 @@ def put_file(*, container: ContainerApiMixin, src: File, dest: str) -> ():
         container.put_archive(os.path.dirname(dest), tar_b)
 
 
+def put_files(
+    *,
+    container: ContainerApiMixin,
+    src_files: Dict[str, File],
+    dest: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+):
+    """
+    Puts files from storage into a container with a single request.
+
+    The tar archive is generated on the fly while the files are streamed
+    from storage, so it is never held in memory or spooled to disk.
+
+    Parameters
+    ----------
+    container
+        The container to write to
+    src_files
+        The files to copy keyed by their paths relative to dest
+    dest
+        The directory in the container where the files are extracted
+    progress_callback
+        Called with the number of bytes that have been copied and the total
+        number of bytes to copy
+    """
+    container.put_archive(
+        dest, tar_stream(files=src_files, progress_callback=progress_callback),
+    )
+
+
+def tar_stream(
+    *,
+    files: Dict[str, File],
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Iterator[bytes]:
+    """Yields an uncompressed tar archive of files, keyed by name, in chunks."""
+    sizes = {name: file.size for name, file in files.items()}
+    total = sum(sizes.values())
+    copied = 0
+
+    for name, file in files.items():
+        size = sizes[name]
+        tarinfo = tarfile.TarInfo(name=name)
+        tarinfo.size = size
+        yield tarinfo.tobuf()
+
+        file_copied = 0
+        for chunk in _stream_file(file):
+            yield chunk
+
+            file_copied += len(chunk)
+            copied += len(chunk)
+
+            if progress_callback is not None:
+                progress_callback(copied, total)
+
+        if file_copied != size:
+            raise OSError(f"File {file.name} changed size while copying.")
+
+        # Members are padded to whole blocks
+        remainder = size % tarfile.BLOCKSIZE
+        if remainder:
+            yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+
+    # The end of the archive is marked by two empty blocks
+    yield tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+
+    if progress_callback is not None:
+        progress_callback(copied, total)
+
+
+def _stream_file(file: File) -> Iterator[bytes]:
+    """Yields the content of a stored or an in memory file in chunks."""
+    storage = getattr(file, "storage", None)
+
+    if hasattr(storage, "stream"):
+        yield from storage.stream(
+            name=file.name, chunk_size=TRANSFER_BUFFER_SIZE
+        )
+    else:
+        # Uploaded files are not stored, so are read directly. They are not
+        # closed as an in memory file cannot be reopened.
+        file.open("rb")
+        yield from file.chunks(chunk_size=TRANSFER_BUFFER_SIZE)
+
+
+class _ChunkReader(io.RawIOBase):
+    """A readable file object over an iterator of bytes."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+
+        return n
+
+
+def extract_directory(
+    *, container: ContainerApiMixin, src: Path, dest: Path, max_size: int
+) -> Iterator[Path]:
+    """
+    Copies the regular files in directory src of a container to dest.
+
+    The directory is pulled as a single archive that is extracted while it
+    is streamed, so it is never held in memory.
+
+    Parameters
+    ----------
+    container
+        The container to read from
+    src
+        The path of the directory in the container
+    dest
+        The local directory to extract the files to, the files keep their
+        paths relative to src
+    max_size
+        The maximum total size of the files in bytes
+
+    Yields
+    ------
+        The paths of the extracted files as they arrive
+
+    Raises
+    ------
+    ComponentException
+        Raised when the files are larger than max_size
+    """
+    tarstrm, _ = container.get_archive(str(src))
+    total_size = 0
+
+    with io.BufferedReader(
+        _ChunkReader(iter(tarstrm)), buffer_size=TRANSFER_BUFFER_SIZE
+    ) as f, tarfile.open(fileobj=f, mode="r|") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+
+            total_size += member.size
+            if total_size > max_size:
+                raise ComponentException(
+                    f"The files in {src} are larger than the limit of "
+                    f"{max_size} bytes."
+                )
+
+            # The members are prefixed with the name of src
+            parts = Path(member.name).parts
+            path = Path(safe_join(dest, *(parts[1:] or parts)))
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(path, "wb") as outfile:
+                copy_fileobj(tar.extractfile(member), outfile)
+
+            yield path
+
+
 def get_file(*, container: ContainerApiMixin, src: Path):
     tarstrm, info = container.get_archive(src)
 
@@ -0,0 +1,137 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from docker import DockerClient
+from docker.errors import APIError, ImageNotFound
+
+logger = logging.getLogger(__name__)
+
+# Loading an image can take a long time #1330
+IMAGE_LOAD_TIMEOUT = 3600
+IMAGE_LOAD_CHUNK_SIZE = 0x100000  # 1 MiB
+
+METRICS = ("hits", "misses", "evictions")
+
+
+class DockerImageCache:
+    """
+    Loads the container images of the components on a docker host.
+
+    The images are kept on the host after they have been used. Loads are
+    single-flight: the jobs that need an image that is not yet on the host
+    wait for the one job that loads it. The least recently used images are
+    removed from the host when the cached images exceed max_size bytes.
+
+    The state of the cache is kept in the django cache, keyed by the
+    id of the docker daemon, so it is shared by all workers on the node.
+    """
+
+    def __init__(self, *, client: DockerClient, max_size=None):
+        self._client = client
+        self._max_size = (
+            settings.COMPONENTS_IMAGE_CACHE_MAX_SIZE
+            if max_size is None
+            else max_size
+        )
+        self._daemon_id = client.info()["ID"]
+
+    def _key(self, *parts):
+        return ":".join(["components", "image-cache", self._daemon_id, *parts])
+
+    def _incr(self, metric):
+        key = self._key("metrics", metric)
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+    @property
+    def metrics(self):
+        """The number of hits, misses and evictions on this docker host."""
+        values = cache.get_many([self._key("metrics", m) for m in METRICS])
+        return {m: values.get(self._key("metrics", m), 0) for m in METRICS}
+
+    def _is_loaded(self, image_sha256):
+        try:
+            self._client.images.get(name=image_sha256)
+        except ImageNotFound:
+            return False
+        else:
+            return True
+
+    def _load(self, *, image: File):
+        # Stream the tarball from storage into the docker api rather than
+        # spooling the whole file first
+        old_timeout = self._client.api.timeout
+        self._client.api.timeout = IMAGE_LOAD_TIMEOUT
+
+        try:
+            self._client.images.load(
+                image.storage.stream(
+                    name=image.name, chunk_size=IMAGE_LOAD_CHUNK_SIZE
+                )
+            )
+        finally:
+            self._client.api.timeout = old_timeout
+
+    def load(self, *, image_sha256: str, image: File):
+        """
+        Ensures that the image with image_sha256 is on the docker host.
+
+        Parameters
+        ----------
+        image_sha256
+            The sha256 of the image, which is the image id on the host.
+        image
+            The tarball of the image, which is loaded on a cache miss.
+        """
+        if self._is_loaded(image_sha256):
+            self._incr("hits")
+        else:
+            with cache.lock(
+                self._key("load", image_sha256),
+                timeout=IMAGE_LOAD_TIMEOUT,
+                blocking_timeout=IMAGE_LOAD_TIMEOUT,
+            ):
+                # Another job could have loaded the image in the meantime
+                if self._is_loaded(image_sha256):
+                    self._incr("hits")
+                else:
+                    self._incr("misses")
+                    self._load(image=image)
+
+        cache.set(self._key("used", image_sha256), time.time(), timeout=None)
+
+        self._evict(keep=image_sha256)
+
+    def _evict(self, *, keep: str):
+        images = {i.id: i for i in self._client.images.list()}
+        last_used = cache.get_many([self._key("used", i) for i in images])
+
+        # Only the images that were loaded by this cache are evicted
+        cached = sorted(
+            (last_used[self._key("used", image_id)], image_id)
+            for image_id in images
+            if self._key("used", image_id) in last_used
+        )
+
+        total_size = sum(images[i].attrs["Size"] for _, i in cached)
+
+        for _, image_id in cached:
+            if total_size <= self._max_size:
+                break
+
+            if image_id == keep:
+                continue
+
+            try:
+                self._client.images.remove(image=image_id)
+            except APIError as e:
+                # For instance, the image is used by a running container
+                logger.info(f"Could not evict image {image_id}: {e}")
+                continue
+
+            cache.delete(self._key("used", image_id))
+            self._incr("evictions")
+            total_size -= images[image_id].attrs["Size"]
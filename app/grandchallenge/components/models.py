@@ -26,9 +26,14 @@ from grandchallenge.cases.tasks import import_images
 from grandchallenge.components.backends.docker import (
     ComponentException,
     Executor,
+    extract_directory,
     get_file,
 )
-from grandchallenge.components.tasks import execute_job, validate_docker_image
+from grandchallenge.components.tasks import (
+    execute_job,
+    execute_job_batch,
+    validate_docker_image,
+)
 from grandchallenge.components.validators import validate_safe_path
 from grandchallenge.core.storage import (
     private_s3_storage,
@@ -125,50 +130,46 @@ class ComponentInterface(models.Model):
     class Meta:
         ordering = ("pk",)
 
-    def create_component_interface_values(self, *, reader, job):
+    def create_component_interface_values(
+        self, *, reader, job, output_dir="/output"
+    ):
         # TODO JM These functions rely on docker specific code (reader)
+        output_path = Path(safe_join(output_dir, self.relative_path))
+
         if self.kind in (
             InterfaceKindChoices.HEAT_MAP,
             InterfaceKindChoices.IMAGE,
         ):
-            self._create_images_result(reader=reader, job=job)
+            self._create_images_result(
+                reader=reader, job=job, output_path=output_path
+            )
 
         if self.kind == InterfaceKindChoices.JSON:
-            self._create_json_result(reader=reader, job=job)
+            self._create_json_result(
+                reader=reader, job=job, output_path=output_path
+            )
 
-    def _create_images_result(self, *, reader, job):
+    def _create_images_result(self, *, reader, job, output_path):
         # TODO JM in the future this will be a file, not a directory
-        base_dir = Path(self.output_path)
-        found_files = reader.exec_run(f"find {base_dir} -type f")
-
-        if found_files.exit_code != 0:
-            logger.warning(f"Error listing {base_dir}")
-            return
-
-        output_files = [
-            base_dir / Path(f)
-            for f in found_files.output.decode().splitlines()
-        ]
-
-        if not output_files:
-            logger.warning("Output directory is empty")
-            return
+        base_dir = output_path
 
         with TemporaryDirectory() as tmpdir:
-            input_files = set()
-            for file in output_files:
-                temp_file = Path(safe_join(tmpdir, file.relative_to(base_dir)))
-                temp_file.parent.mkdir(parents=True, exist_ok=True)
-
-                with open(temp_file, "wb") as outfile:
-                    infile = get_file(container=reader, src=file)
-
-                    buffer = True
-                    while buffer:
-                        buffer = infile.read(1024)
-                        outfile.write(buffer)
-
-                input_files.add(temp_file)
+            try:
+                input_files = set(
+                    extract_directory(
+                        container=reader,
+                        src=base_dir,
+                        dest=Path(tmpdir),
+                        max_size=settings.COMPONENTS_MAXIMUM_OUTPUT_SIZE,
+                    )
+                )
+            except NotFound:
+                logger.warning(f"Error listing {base_dir}")
+                return
+
+            if not input_files:
+                logger.warning("Output directory is empty")
+                return
 
             importer_result = import_images(
                 files=input_files,
@@ -181,9 +182,9 @@ class ComponentInterface(models.Model):
             )
             job.outputs.add(civ)
 
-    def _create_json_result(self, reader, job):
+    def _create_json_result(self, *, reader, job, output_path):
         try:
-            result = get_file(container=reader, src=Path(self.output_path))
+            result = get_file(container=reader, src=output_path)
         except NotFound:
             # The container exited without error, but no results file was
             # produced. This shouldn't happen, but does with poorly programmed
@@ -281,6 +282,16 @@ class ComponentJob(models.Model):
     error_message = models.CharField(max_length=1024, default="")
     started_at = models.DateTimeField(null=True)
     completed_at = models.DateTimeField(null=True)
+    input_provisioning_progress = models.FloatField(
+        default=0.0,
+        editable=False,
+        help_text="The fraction of the input bytes copied to the container",
+    )
+    input_provisioning_rate = models.FloatField(
+        null=True,
+        editable=False,
+        help_text="The rate in bytes per second at which the inputs were copied",
+    )
 
     inputs = models.ManyToManyField(
         to=ComponentInterfaceValue,
@@ -354,7 +365,7 @@ class ComponentJob(models.Model):
         return Executor
 
     @property
-    def signature(self):
+    def _signature_options(self):
         options = {}
 
         if self.container.requires_gpu:
@@ -363,13 +374,33 @@ class ComponentJob(models.Model):
         if getattr(self.container, "queue_override", None):
             options.update({"queue": self.container.queue_override})
 
+        return options
+
+    @property
+    def signature(self):
         return execute_job.signature(
             kwargs={
                 "job_pk": self.pk,
                 "job_app_label": self._meta.app_label,
                 "job_model_name": self._meta.model_name,
             },
-            options=options,
+            options=self._signature_options,
+        )
+
+    @classmethod
+    def batch_signature(cls, *, jobs):
+        """
+        The signature of a task that executes jobs in a single container.
+
+        All of the jobs must use the same container.
+        """
+        return execute_job_batch.signature(
+            kwargs={
+                "job_pks": [j.pk for j in jobs],
+                "job_app_label": cls._meta.app_label,
+                "job_model_name": cls._meta.model_name,
+            },
+            options=jobs[0]._signature_options,
         )
 
     class Meta:
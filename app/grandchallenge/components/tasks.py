@@ -2,7 +2,7 @@ import json
 import tarfile
 import uuid
 from datetime import timedelta
-from typing import Dict
+from typing import Dict, List
 
 from billiard.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
 from celery import shared_task
@@ -14,7 +14,10 @@ from django.db import OperationalError
 from django.db.models import DateTimeField, ExpressionWrapper, F
 from django.utils.timezone import now
 
-from grandchallenge.components.backends.docker import ComponentException
+from grandchallenge.components.backends.docker import (
+    BatchExecutor,
+    ComponentException,
+)
 from grandchallenge.components.emails import send_invalid_dockerfile_email
 from grandchallenge.jqfileupload.widgets.uploader import StagedAjaxFile
 
@@ -206,6 +209,73 @@ def execute_job(
         )
 
 
+@shared_task
+def execute_job_batch(
+    *_, job_pks: List[uuid.UUID], job_app_label: str, job_model_name: str
+) -> None:
+    """
+    Executes a batch of jobs for the same container with a BatchExecutor.
+
+    The jobs are updated separately, so a job fails on its own if its
+    outputs could not be created.
+    """
+    Job = apps.get_model(  # noqa: N806
+        app_label=job_app_label, model_name=job_model_name
+    )
+    jobs = [
+        j
+        for j in Job.objects.filter(pk__in=job_pks)
+        if j.status in [j.PENDING, j.RETRY]
+    ]
+
+    if not jobs:
+        raise RuntimeError("Jobs are not set to be executed.")
+
+    if len({j.container.pk for j in jobs}) != 1:
+        raise ValueError("The jobs in a batch must use the same container.")
+
+    container = jobs[0].container
+
+    for j in jobs:
+        j.update_status(status=j.STARTED)
+
+    if not container.ready:
+        msg = f"Method {container.pk} was not ready to be used."
+        for j in jobs:
+            j.update_status(status=j.FAILURE, error_message=msg)
+        raise RuntimeError(msg)
+
+    error_message = ""
+
+    try:
+        with BatchExecutor(
+            job_id=f"batch-{jobs[0].pk}",
+            job_class=Job,
+            jobs={str(j.pk): j.input_files for j in jobs},
+            output_interfaces=jobs[0].output_interfaces,
+            exec_image=container.image,
+            exec_image_sha256=container.image_sha256,
+        ) as ev:
+            # This call is potentially very long
+            ev.execute()
+    except ComponentException as e:
+        error_message = str(e)
+    except (SoftTimeLimitExceeded, TimeLimitExceeded):
+        error_message = "Time limit exceeded."
+    except Exception:
+        error_message = "An unexpected error occurred."
+        raise
+    finally:
+        for j in Job.objects.filter(pk__in=[j.pk for j in jobs]):
+            job_error = error_message or ev.errors.get(str(j.pk), "")
+            j.update_status(
+                status=j.FAILURE if job_error else j.SUCCESS,
+                stdout=ev.stdout,
+                stderr=ev.stderr,
+                error_message=job_error,
+            )
+
+
 @shared_task
 def mark_long_running_jobs_failed(
     *, app_label: str, model_name: str, extra_filters: Dict[str, str] = None
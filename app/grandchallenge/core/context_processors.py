@@ -1,10 +1,10 @@
 import logging
 
 from django.conf import settings
-from guardian.shortcuts import get_perms
 from guardian.utils import get_anonymous_user
 
 from grandchallenge.blogs.models import Post
+from grandchallenge.challenges.cache import get_challenge_user_context
 from grandchallenge.policies.models import Policy
 
 logger = logging.getLogger(__name__)
@@ -28,8 +28,7 @@ def challenge(request):
 
     return {
         "challenge": challenge,
-        "challenge_perms": get_perms(user, challenge),
-        "user_is_participant": challenge.is_participant(user),
+        **get_challenge_user_context(challenge=challenge, user=user),
         "pages": challenge.page_set.all(),
     }
 
@@ -0,0 +1,145 @@
+from typing import Any, Iterable, Tuple, Type
+
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model
+from guardian.models import GroupObjectPermission, UserObjectPermission
+
+# The number of rows that are inserted per query, this keeps the number of
+# query parameters well below the limit of postgres
+BULK_CREATE_BATCH_SIZE = 1000
+
+
+def _get_permission(*, codename: str, model: Type[Model]):
+    content_type = ContentType.objects.get_for_model(model)
+    permission = Permission.objects.get(
+        content_type=content_type, codename=codename
+    )
+    return content_type, permission
+
+
+def bulk_assign_group_perms(
+    *, codename: str, model: Type[Model], pairs: Iterable[Tuple[Any, Any]]
+):
+    """
+    Assigns an object permission to many groups and objects at once.
+
+    Parameters
+    ----------
+    codename
+        The codename of the permission, e.g. "view_job"
+    model
+        The model of the objects
+    pairs
+        The (group pk, object pk) pairs that get the permission, existing
+        permissions are ignored
+    """
+    content_type, permission = _get_permission(codename=codename, model=model)
+
+    GroupObjectPermission.objects.bulk_create(
+        [
+            GroupObjectPermission(
+                permission=permission,
+                content_type=content_type,
+                group_id=group_pk,
+                object_pk=str(object_pk),
+            )
+            for group_pk, object_pk in pairs
+        ],
+        batch_size=BULK_CREATE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def bulk_assign_user_perms(
+    *, codename: str, model: Type[Model], pairs: Iterable[Tuple[Any, Any]]
+):
+    """
+    Assigns an object permission to many users and objects at once.
+
+    Parameters
+    ----------
+    codename
+        The codename of the permission, e.g. "change_job"
+    model
+        The model of the objects
+    pairs
+        The (user pk, object pk) pairs that get the permission, existing
+        permissions are ignored
+    """
+    content_type, permission = _get_permission(codename=codename, model=model)
+
+    UserObjectPermission.objects.bulk_create(
+        [
+            UserObjectPermission(
+                permission=permission,
+                content_type=content_type,
+                user_id=user_pk,
+                object_pk=str(object_pk),
+            )
+            for user_pk, object_pk in pairs
+        ],
+        batch_size=BULK_CREATE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def reconcile_group_perms(
+    *,
+    codename: str,
+    model: Type[Model],
+    object_pks: Iterable[Any],
+    expected_pairs: Iterable[Tuple[Any, Any]],
+):
+    """
+    Sets the object permission of the groups for many objects at once.
+
+    Parameters
+    ----------
+    codename
+        The codename of the permission, e.g. "view_image"
+    model
+        The model of the objects
+    object_pks
+        The pks of the objects that are reconciled
+    expected_pairs
+        The (group pk, object pk) pairs that should have the permission,
+        the permissions of the other groups for object_pks are removed
+    """
+    content_type, permission = _get_permission(codename=codename, model=model)
+
+    object_pks = {str(pk) for pk in object_pks}
+    expected_pairs = {
+        (group_pk, str(object_pk)) for group_pk, object_pk in expected_pairs
+    }
+
+    current = {
+        (group_pk, object_pk): pk
+        for pk, group_pk, object_pk in GroupObjectPermission.objects.filter(
+            permission=permission,
+            content_type=content_type,
+            object_pk__in=object_pks,
+        ).values_list("pk", "group_id", "object_pk")
+    }
+
+    extra_pks = [
+        pk for pair, pk in current.items() if pair not in expected_pairs
+    ]
+    for idx in range(0, len(extra_pks), BULK_CREATE_BATCH_SIZE):
+        GroupObjectPermission.objects.filter(
+            pk__in=extra_pks[idx : idx + BULK_CREATE_BATCH_SIZE]
+        ).delete()
+
+    GroupObjectPermission.objects.bulk_create(
+        [
+            GroupObjectPermission(
+                permission=permission,
+                content_type=content_type,
+                group_id=group_pk,
+                object_pk=object_pk,
+            )
+            for group_pk, object_pk in expected_pairs - current.keys()
+        ],
+        batch_size=BULK_CREATE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
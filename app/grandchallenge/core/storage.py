@@ -1,6 +1,7 @@
 import copy
 import datetime
 
+from botocore.exceptions import ClientError
 from botocore.signers import CloudFrontSigner
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
@@ -14,6 +15,11 @@ from django.utils.text import get_valid_filename
 from django.utils.timezone import now
 from storages.backends.s3boto3 import S3Boto3Storage
 
+# Limits on the parts of multipart uploads, see
+# https://docs.aws.amazon.com/AmazonS3/latest/dev/qfacts.html
+S3_MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024
+S3_MULTIPART_MAX_PARTS = 10_000
+
 
 class S3Storage(S3Boto3Storage):
     """
@@ -41,6 +47,115 @@ class S3Storage(S3Boto3Storage):
             Key=to_name,
         )
 
+    def concatenate(self, *, from_names, to_name):
+        """
+        Concatenates the objects in from_names into a new object called
+        to_name using a multipart copy, so the data stays in the bucket.
+
+        All of the objects except the last one must be at least
+        S3_MULTIPART_MIN_PART_SIZE bytes long.
+        """
+        if len(from_names) > S3_MULTIPART_MAX_PARTS:
+            raise ValueError(
+                f"Cannot concatenate more than {S3_MULTIPART_MAX_PARTS} objects"
+            )
+
+        client = self.connection.meta.client
+        to_name = self._normalize_name(self._clean_name(to_name))
+
+        upload = client.create_multipart_upload(
+            Bucket=self.bucket_name, Key=to_name
+        )
+
+        try:
+            parts = []
+            for part_number, from_name in enumerate(from_names, start=1):
+                from_name = self._normalize_name(self._clean_name(from_name))
+                part = client.upload_part_copy(
+                    Bucket=self.bucket_name,
+                    Key=to_name,
+                    UploadId=upload["UploadId"],
+                    PartNumber=part_number,
+                    CopySource=f"{self.bucket_name}/{from_name}",
+                )
+                parts.append(
+                    {
+                        "ETag": part["CopyPartResult"]["ETag"],
+                        "PartNumber": part_number,
+                    }
+                )
+
+            client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=to_name,
+                UploadId=upload["UploadId"],
+                MultipartUpload={"Parts": parts},
+            )
+        except Exception:
+            client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=to_name,
+                UploadId=upload["UploadId"],
+            )
+            raise
+
+    def get_etag(self, *, name):
+        """Returns the etag of the object name, this changes with its content."""
+        name = self._normalize_name(self._clean_name(name))
+
+        try:
+            response = self.connection.meta.client.head_object(
+                Bucket=self.bucket_name, Key=name
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in {"404", "NoSuchKey"}:
+                raise FileNotFoundError(f"No file found for {name}")
+            raise
+
+        return response["ETag"].strip('"')
+
+    def download_fileobj(self, *, name, fileobj):
+        """Downloads the object name to fileobj with concurrent ranged gets."""
+        name = self._normalize_name(self._clean_name(name))
+        self.bucket.download_fileobj(Key=name, Fileobj=fileobj)
+
+    def stream(self, *, name, chunk_size):
+        """Yields the content of the object name in chunks of chunk_size."""
+        name = self._normalize_name(self._clean_name(name))
+
+        response = self.connection.meta.client.get_object(
+            Bucket=self.bucket_name, Key=name
+        )
+
+        yield from response["Body"].iter_chunks(chunk_size=chunk_size)
+
+    def read(self, *, name):
+        """Reads the whole content of the object name."""
+        name = self._normalize_name(self._clean_name(name))
+
+        try:
+            response = self.connection.meta.client.get_object(
+                Bucket=self.bucket_name, Key=name
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in {"404", "NoSuchKey"}:
+                raise FileNotFoundError(f"No file found for {name}")
+            raise
+
+        return response["Body"].read()
+
+    def read_range(self, *, name, offset, length):
+        """Reads length bytes starting at offset from the object name."""
+        name = self._normalize_name(self._clean_name(name))
+
+        response = self.connection.meta.client.get_object(
+            Bucket=self.bucket_name,
+            Key=name,
+            Range=f"bytes={offset}-{offset + length - 1}",
+        )
+
+        return response["Body"].read()
+
 
 @deconstructible
 class PrivateS3Storage(S3Storage):
@@ -0,0 +1,108 @@
+import io
+import os
+import shutil
+import stat
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from django.core.files import File
+
+# The size of the chunks used when a copy goes through python
+TRANSFER_BUFFER_SIZE = 0x100000  # 1 MiB
+
+# The maximum number of bytes handed to the kernel in a single call
+_KERNEL_COPY_BLOCK_SIZE = 0x40000000  # 1 GiB
+
+
+def _regular_file_descriptor(f) -> Optional[int]:
+    try:
+        fd = f.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+    try:
+        if stat.S_ISREG(os.fstat(fd).st_mode):
+            return fd
+    except OSError:
+        pass
+
+    return None
+
+
+def _kernel_copy(*, fsrc: BinaryIO, fdst: BinaryIO) -> bool:
+    """
+    Copies the remainder of fsrc to fdst in the kernel.
+
+    Returns False if nothing was copied and the copy should go through
+    python instead.
+    """
+    src_fd = _regular_file_descriptor(fsrc)
+    dst_fd = _regular_file_descriptor(fdst)
+
+    if src_fd is None or dst_fd is None:
+        return False
+
+    # The python file objects could have buffered data, so the kernel
+    # works from their logical positions
+    fdst.flush()
+    offset = fsrc.tell()
+    dst_offset = fdst.tell()
+    size = os.fstat(src_fd).st_size
+
+    use_copy_file_range = hasattr(os, "copy_file_range")
+
+    if not use_copy_file_range:
+        if not hasattr(os, "sendfile"):
+            return False
+        os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+
+    copied = 0
+    try:
+        while offset + copied < size:
+            count = min(size - offset - copied, _KERNEL_COPY_BLOCK_SIZE)
+            if use_copy_file_range:
+                sent = os.copy_file_range(
+                    src_fd, dst_fd, count, offset + copied, dst_offset + copied
+                )
+            else:
+                sent = os.sendfile(dst_fd, src_fd, offset + copied, count)
+            if sent == 0:
+                break
+            copied += sent
+    except OSError:
+        if copied == 0:
+            # For instance, the file systems do not support it
+            return False
+        raise
+
+    # Resynchronise the python file objects with the kernel positions
+    fsrc.seek(offset + copied)
+    fdst.seek(dst_offset + copied)
+
+    return True
+
+
+def copy_fileobj(
+    fsrc: BinaryIO, fdst: BinaryIO, *, buffer_size=TRANSFER_BUFFER_SIZE
+):
+    """
+    Copies the remainder of fsrc to fdst.
+
+    When both are regular local files the data is copied by the kernel,
+    otherwise (e.g. for files in storage or in memory) the data is copied
+    through python in chunks of buffer_size.
+    """
+    if not _kernel_copy(fsrc=fsrc, fdst=fdst):
+        shutil.copyfileobj(fsrc, fdst, buffer_size)
+
+
+def file_from_path(path: Union[str, Path], *, name: Optional[str] = None):
+    """
+    Returns a django File that reads directly from path.
+
+    This replaces copying the file into a TemporaryFile: the open file stays
+    readable after path, or the temporary directory that contains it, has
+    been removed.
+    """
+    path = Path(path)
+    return File(open(path, "rb"), name=name or path.name)
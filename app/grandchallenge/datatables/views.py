@@ -24,45 +24,62 @@ class PaginatedTableListView(ListView):
         )
         return context
 
+    def get_row_context(self, *, object_list):
+        """The context that is shared by the rows of a page."""
+        return self.get_context_data(object_list=object_list)
+
     def render_row(self, *, object_, page_context):
         return render_to_string(
             self.row_template, context={**page_context, "object": object_},
         ).split("<split/>")
 
     def render_rows(self, *, object_list):
-        page_context = self.get_context_data(object_list=object_list)
+        page_context = self.get_row_context(object_list=object_list)
         return [
             self.render_row(object_=o, page_context=page_context)
             for o in object_list
         ]
 
+    def is_table_request(self, request):
+        return request.META.get("HTTP_X_REQUESTED_WITH") == "XMLHttpRequest"
+
+    def get_table_data(self, request):
+        """The rendered rows of a page of the table and the record counts."""
+        start = int(request.GET.get("start", 0))
+        page_size = int(request.GET.get("length"))
+        search = request.GET.get("search[value]")
+        page = start // page_size + 1
+        order_by = request.GET.get("order[0][column]")
+        order_by = (
+            self.columns[int(order_by)].sort_field
+            if order_by
+            else self.order_by
+        )
+        order_dir = request.GET.get("order[0][dir]", "desc")
+        order_by = f"{'-' if order_dir == 'desc' else ''}{order_by}"
+        data = self.filter_queryset(self.object_list, search, order_by)
+        paginator = self.get_paginator(queryset=data, per_page=page_size)
+        objects = paginator.page(page)
+        return {
+            # Without a search the filtered records are all of the records
+            "recordsTotal": self.object_list.count()
+            if search
+            else paginator.count,
+            "recordsFiltered": paginator.count,
+            "data": self.render_rows(object_list=objects),
+        }
+
     def get(self, request, *args, **kwargs):
-        response = super().get(request, *args, **kwargs)
-        if request.META.get("HTTP_X_REQUESTED_WITH") == "XMLHttpRequest":
-            start = int(request.GET.get("start", 0))
-            page_size = int(request.GET.get("length"))
-            search = request.GET.get("search[value]")
-            page = start // page_size + 1
-            order_by = request.GET.get("order[0][column]")
-            order_by = (
-                self.columns[int(order_by)].sort_field
-                if order_by
-                else self.order_by
-            )
-            order_dir = request.GET.get("order[0][dir]", "desc")
-            order_by = f"{'-' if order_dir == 'desc' else ''}{order_by}"
-            data = self.filter_queryset(self.object_list, search, order_by)
-            paginator = self.get_paginator(queryset=data, per_page=page_size)
-            objects = paginator.page(page)
+        if self.is_table_request(request):
+            # The context of the whole page is not needed for the rows
+            self.object_list = self.get_queryset()
             return JsonResponse(
                 {
                     "draw": int(request.GET.get("draw")),
-                    "recordsTotal": self.object_list.count(),
-                    "recordsFiltered": paginator.count,
-                    "data": self.render_rows(object_list=objects),
+                    **self.get_table_data(request),
                 }
             )
-        return response
+        return super().get(request, *args, **kwargs)
 
     def filter_queryset(self, queryset, search, order_by):
         if search:
@@ -0,0 +1,91 @@
+# Generated by Django 3.1.1 on 2026-10-18 18:20
+
+from collections import OrderedDict
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+# The functions below are frozen copies of get_leaderboard_paths and
+# get_metrics_projection from grandchallenge.evaluation.utils, so that
+# this migration does not change when those do
+def get_leaderboard_paths(*, phase):
+    paths = [phase.score_jsonpath, phase.score_error_jsonpath]
+
+    for col in phase.extra_results_columns:
+        paths.extend([col["path"], col.get("error_path", "")])
+
+    return tuple(OrderedDict.fromkeys(p for p in paths if p))
+
+
+def get_metrics_projection(*, evaluation, paths):
+    metrics = [
+        o.value
+        for o in evaluation.outputs.all()
+        if o.interface.slug == "metrics-json-file"
+    ]
+
+    if len(metrics) != 1:
+        return {}
+
+    projection = {}
+
+    for path in paths:
+        value = metrics[0]
+
+        try:
+            for key in str(path).split("."):
+                value = value[key]
+        except (KeyError, TypeError):
+            continue
+
+        if value not in ["", None]:
+            projection[path] = value
+
+    return projection
+
+
+def populate_metrics(apps, schema_editor):
+    Phase = apps.get_model("evaluation", "Phase")  # noqa: N806
+    Evaluation = apps.get_model("evaluation", "Evaluation")  # noqa: N806
+
+    for phase in Phase.objects.all():
+        paths = get_leaderboard_paths(phase=phase)
+        evaluations = list(
+            Evaluation.objects.filter(
+                submission__phase=phase, status=4  # Success
+            ).prefetch_related("outputs__interface")
+        )
+
+        for evaluation in evaluations:
+            evaluation.metrics = get_metrics_projection(
+                evaluation=evaluation, paths=paths
+            )
+
+        Evaluation.objects.bulk_update(evaluations, ["metrics"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evaluation", "0004_evaluation_input_provisioning"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="evaluation",
+            name="metrics",
+            field=models.JSONField(
+                default=dict,
+                editable=False,
+                help_text="The values of the metrics that are displayed on the leaderboard, keyed by their path in metrics.json",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="evaluation",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["metrics"], name="evaluation_metrics"
+            ),
+        ),
+        migrations.RunPython(populate_metrics, elidable=True),
+    ]
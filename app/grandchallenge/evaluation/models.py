@@ -4,6 +4,7 @@ from urllib.parse import parse_qs, urljoin, urlparse
 
 from django.conf import settings
 from django.contrib.auth.models import Group
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.validators import RegexValidator
@@ -18,10 +19,7 @@ from grandchallenge.algorithms.tasks import (
 )
 from grandchallenge.archives.models import Archive
 from grandchallenge.challenges.models import Challenge
-from grandchallenge.components.backends.docker import (
-    Executor,
-    put_file,
-)
+from grandchallenge.components.backends.docker import Executor
 from grandchallenge.components.models import (
     ComponentImage,
     ComponentInterface,
@@ -641,9 +639,14 @@ class Submission(UUIDModel):
 
 class SubmissionEvaluator(Executor):
     def _copy_input_files(self, writer):
-        for file in self._input_files:
-            dest_file = "/tmp/submission-src"
-            put_file(container=writer, src=file, dest=dest_file)
+        src_files = {
+            f"submission-src-{idx}": file
+            for idx, file in enumerate(self._input_files)
+        }
+        self._put_input_files(writer=writer, src_files=src_files, dest="/tmp/")
+
+        for name, file in src_files.items():
+            dest_file = f"/tmp/{name}"
 
             if hasattr(file, "content_type"):
                 mimetype = file.content_type
@@ -701,6 +704,17 @@ class Evaluation(UUIDModel, ComponentJob):
     )
     rank_score = models.FloatField(default=0.0)
     rank_per_metric = models.JSONField(default=dict)
+    metrics = models.JSONField(
+        default=dict,
+        editable=False,
+        help_text=(
+            "The values of the metrics that are displayed on the "
+            "leaderboard, keyed by their path in metrics.json"
+        ),
+    )
+
+    class Meta:
+        indexes = (GinIndex(fields=["metrics"], name="evaluation_metrics"),)
 
     def save(self, *args, **kwargs):
         adding = self._state.adding
@@ -713,7 +727,10 @@ class Evaluation(UUIDModel, ComponentJob):
         self.assign_permissions()
 
         calculate_ranks.apply_async(
-            kwargs={"phase_pk": self.submission.phase.pk}
+            kwargs={
+                "phase_pk": self.submission.phase.pk,
+                "evaluation_pk": self.pk,
+            }
         )
 
     @property
@@ -1,10 +1,25 @@
 import uuid
 from statistics import mean, median
+from typing import Callable, Tuple
 
 from celery import shared_task
 from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
 
-from grandchallenge.evaluation.utils import Metric, rank_results
+from grandchallenge.evaluation.utils import (
+    Metric,
+    MetricRow,
+    MetricTable,
+    absolute_score,
+    get_leaderboard_paths,
+    get_metric_values,
+    get_metrics_projection,
+    invalidate_leaderboard,
+)
+
+# The maximum time in seconds that ranking a phase can hold its lock
+RANKING_LOCK_TIMEOUT = 600
 
 
 @shared_task
@@ -64,56 +79,8 @@ def set_evaluation_inputs(evaluation_pk, job_pks):
         evaluation.signature.apply_async()
 
 
-def filter_by_creators_most_recent(*, evaluations):
-    # Go through the evaluations and only pass through the most recent
-    # submission for each user
-    users_seen = set()
-    filtered_qs = []
-
-    for e in evaluations:
-        creator = e.submission.creator
-
-        if creator not in users_seen:
-            users_seen.add(creator)
-            filtered_qs.append(e)
-
-    return filtered_qs
-
-
-def filter_by_creators_best(*, evaluations, ranks):
-    best_result_per_user = {}
-
-    for e in evaluations:
-        creator = e.submission.creator
-
-        try:
-            this_rank = ranks[e.pk]
-        except KeyError:
-            # This result was not ranked
-            continue
-
-        if creator not in best_result_per_user or (
-            this_rank < ranks[best_result_per_user[creator].pk]
-        ):
-            best_result_per_user[creator] = e
-
-    return [r for r in best_result_per_user.values()]
-
-
-@shared_task  # noqa: C901
-def calculate_ranks(*, phase_pk: uuid.UUID):  # noqa: C901
-    Phase = apps.get_model(  # noqa: N806
-        app_label="evaluation", model_name="Phase"
-    )
-    Evaluation = apps.get_model(  # noqa: N806
-        app_label="evaluation", model_name="Evaluation"
-    )
-
-    phase = Phase.objects.get(pk=phase_pk)
-    display_choice = phase.result_display_choice
-    score_method_choice = phase.scoring_method_choice
-
-    metrics = (
+def _get_metrics(*, phase) -> Tuple[Metric, ...]:
+    return (
         Metric(
             path=phase.score_jsonpath,
             reverse=(phase.score_default_sort == phase.DESCENDING),
@@ -124,11 +91,12 @@ def calculate_ranks(*, phase_pk: uuid.UUID):  # noqa: C901
         ],
     )
 
-    if score_method_choice == phase.ABSOLUTE:
 
-        def score_method(x):
-            return list(x)[0]
+def _get_score_method(*, phase) -> Callable:
+    score_method_choice = phase.scoring_method_choice
 
+    if score_method_choice == phase.ABSOLUTE:
+        score_method = absolute_score
     elif score_method_choice == phase.MEAN:
         score_method = mean
     elif score_method_choice == phase.MEDIAN:
@@ -136,64 +104,213 @@ def calculate_ranks(*, phase_pk: uuid.UUID):  # noqa: C901
     else:
         raise NotImplementedError
 
-    valid_evaluations = (
+    return score_method
+
+
+def _metric_row(*, evaluation, metrics) -> MetricRow:
+    return MetricRow(
+        creator=evaluation.submission.creator_id,
+        created=evaluation.created,
+        values=get_metric_values(evaluation=evaluation, metrics=metrics),
+    )
+
+
+def _update_metrics_projections(*, evaluations, paths):
+    """Stores the values of the leaderboard metrics on the evaluations."""
+    Evaluation = apps.get_model(  # noqa: N806
+        app_label="evaluation", model_name="Evaluation"
+    )
+
+    changed = []
+
+    for evaluation in evaluations:
+        projection = get_metrics_projection(evaluation=evaluation, paths=paths)
+
+        if projection != evaluation.metrics:
+            evaluation.metrics = projection
+            changed.append(evaluation)
+
+    Evaluation.objects.bulk_update(changed, ["metrics"])
+
+
+def _build_metric_table(*, phase, metrics) -> MetricTable:
+    Evaluation = apps.get_model(  # noqa: N806
+        app_label="evaluation", model_name="Evaluation"
+    )
+
+    table = MetricTable(metrics=metrics)
+
+    valid_evaluations = list(
         Evaluation.objects.filter(
             submission__phase=phase, published=True, status=Evaluation.SUCCESS,
         )
-        .order_by("-created")
-        .select_related("submission__creator")
+        .select_related("submission")
         .prefetch_related("outputs__interface")
     )
 
-    if display_choice == phase.MOST_RECENT:
-        valid_evaluations = filter_by_creators_most_recent(
-            evaluations=valid_evaluations
+    _update_metrics_projections(
+        evaluations=valid_evaluations, paths=get_leaderboard_paths(phase=phase)
+    )
+
+    for evaluation in valid_evaluations:
+        table.add(
+            pk=evaluation.pk,
+            row=_metric_row(evaluation=evaluation, metrics=metrics),
         )
-    elif display_choice == phase.BEST:
-        all_positions = rank_results(
-            evaluations=valid_evaluations,
-            metrics=metrics,
-            score_method=score_method,
+
+    table.written = {
+        pk: (rank, rank_score, rank_per_metric)
+        for pk, rank, rank_score, rank_per_metric in Evaluation.objects.filter(
+            submission__phase=phase
+        ).values_list("pk", "rank", "rank_score", "rank_per_metric")
+    }
+
+    return table
+
+
+def _update_metric_table(*, table, evaluation_pk) -> bool:
+    """
+    Updates the row of one evaluation in the table.
+
+    Returns False if the table no longer matches the database, for instance,
+    because evaluations were deleted, so it needs to be rebuilt.
+    """
+    Evaluation = apps.get_model(  # noqa: N806
+        app_label="evaluation", model_name="Evaluation"
+    )
+
+    try:
+        evaluation = (
+            Evaluation.objects.select_related("submission__phase")
+            .prefetch_related("outputs__interface")
+            .get(pk=evaluation_pk)
         )
-        valid_evaluations = filter_by_creators_best(
-            evaluations=valid_evaluations, ranks=all_positions.ranks
+    except Evaluation.DoesNotExist:
+        return False
+
+    if evaluation.status == Evaluation.SUCCESS:
+        _update_metrics_projections(
+            evaluations=[evaluation],
+            paths=get_leaderboard_paths(phase=evaluation.submission.phase),
         )
 
-    final_positions = rank_results(
-        evaluations=valid_evaluations,
-        metrics=metrics,
-        score_method=score_method,
+    if evaluation.published and evaluation.status == Evaluation.SUCCESS:
+        table.add(
+            pk=evaluation.pk,
+            row=_metric_row(evaluation=evaluation, metrics=table.metrics),
+        )
+    else:
+        table.remove(pk=evaluation.pk)
+
+    table.written[evaluation.pk] = (
+        evaluation.rank,
+        evaluation.rank_score,
+        evaluation.rank_per_metric,
     )
 
-    evaluations = Evaluation.objects.filter(submission__phase=phase)
+    # An evaluation could have been deleted and another one added since the
+    # table was built, so the rows are compared rather than counted
+    valid_pks = Evaluation.objects.filter(
+        submission__phase=evaluation.submission.phase_id,
+        published=True,
+        status=Evaluation.SUCCESS,
+    ).values_list("pk", flat=True)
+
+    return set(valid_pks) == table.rows.keys()
+
+
+def _ranking_cache_key(*, phase_pk):
+    return f"evaluation:ranking:{phase_pk}"
 
-    _update_evaluations(
-        evaluations=evaluations, final_positions=final_positions
+
+@shared_task
+def calculate_ranks(*, phase_pk: uuid.UUID, evaluation_pk: uuid.UUID = None):
+    """
+    Calculates the positions of the evaluations on the leaderboard of a phase.
+
+    The metric table of the phase is kept in the cache. If evaluation_pk is
+    given only the row of that evaluation is updated, otherwise the table is
+    rebuilt from the database. Only the evaluations whose positions change
+    are written. The values of the leaderboard metrics are stored on the
+    evaluations that are read, so that the leaderboard can sort by them.
+    The cached pages of the leaderboard are invalidated.
+    """
+    Phase = apps.get_model(  # noqa: N806
+        app_label="evaluation", model_name="Phase"
     )
 
+    phase = Phase.objects.get(pk=phase_pk)
+    display_choice = phase.result_display_choice
+    metrics = _get_metrics(phase=phase)
+    score_method = _get_score_method(phase=phase)
+
+    key = _ranking_cache_key(phase_pk=phase_pk)
+
+    with cache.lock(f"{key}:lock", timeout=RANKING_LOCK_TIMEOUT):
+        table = cache.get(key) if evaluation_pk is not None else None
+
+        if (
+            table is None
+            or table.metrics != metrics
+            or not _update_metric_table(
+                table=table, evaluation_pk=evaluation_pk
+            )
+        ):
+            table = _build_metric_table(phase=phase, metrics=metrics)
+
+        if display_choice == phase.MOST_RECENT:
+            pks = table.most_recent_per_creator()
+        elif display_choice == phase.BEST:
+            all_positions = table.rank(score_method=score_method)
+            pks = table.best_per_creator(ranks=all_positions.ranks)
+        else:
+            pks = None
+
+        final_positions = table.rank(score_method=score_method, pks=pks)
+
+        _update_evaluations(table=table, final_positions=final_positions)
+
+        invalidate_leaderboard(
+            challenge_pk=phase.challenge_id, phase_slug=phase.slug
+        )
 
-def _update_evaluations(*, evaluations, final_positions):
+        cache.set(
+            key, table, timeout=settings.EVALUATION_RANKING_CACHE_TIMEOUT
+        )
+
+
+def _update_evaluations(*, table, final_positions):
     Evaluation = apps.get_model(  # noqa: N806
         app_label="evaluation", model_name="Evaluation"
     )
 
-    for e in evaluations:
+    changed = []
+
+    for pk, written in table.written.items():
         try:
-            rank = final_positions.ranks[e.pk]
-            rank_score = final_positions.rank_scores[e.pk]
-            rank_per_metric = final_positions.rank_per_metric[e.pk]
+            position = (
+                final_positions.ranks[pk],
+                final_positions.rank_scores[pk],
+                final_positions.rank_per_metric[pk],
+            )
         except KeyError:
             # This result will be excluded from the display
-            rank = 0
-            rank_score = 0.0
-            rank_per_metric = {}
-
-        e.rank = rank
-        e.rank_score = rank_score
-        e.rank_per_metric = rank_per_metric
+            position = (0, 0.0, {})
+
+        if position != written:
+            table.written[pk] = position
+            rank, rank_score, rank_per_metric = position
+            changed.append(
+                Evaluation(
+                    pk=pk,
+                    rank=rank,
+                    rank_score=rank_score,
+                    rank_per_metric=rank_per_metric,
+                )
+            )
 
     Evaluation.objects.bulk_update(
-        evaluations, ["rank", "rank_score", "rank_per_metric"]
+        changed, ["rank", "rank_score", "rank_per_metric"]
     )
 
 
@@ -1,6 +1,21 @@
+import uuid
+from bisect import bisect_left, insort
 from collections import OrderedDict
-from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+from datetime import datetime
+from statistics import mean, median
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
+import numpy as np
+from django.core.cache import cache
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 
 from grandchallenge.evaluation.templatetags.evaluation_extras import (
@@ -8,6 +23,10 @@ from grandchallenge.evaluation.templatetags.evaluation_extras import (
 )
 
 
+# Integers up to this size are represented exactly as floats
+FLOAT_EXACT_INTEGER_LIMIT = 2 ** 53
+
+
 class Metric(NamedTuple):
     path: str
     reverse: bool
@@ -19,6 +38,12 @@ class Positions(NamedTuple):
     rank_per_metric: Dict[str, Dict[str, float]]
 
 
+class MetricRow(NamedTuple):
+    creator: Any
+    created: datetime
+    values: Optional[Tuple]
+
+
 def get(inputs):
     """Substitute for queryset.get when the qs already exists."""
     if len(inputs) == 1:
@@ -29,18 +54,68 @@ def get(inputs):
         raise MultipleObjectsReturned
 
 
+def absolute_score(ranks: Iterable) -> float:
+    """The score for absolute ranking, which is the rank of the first metric."""
+    return list(ranks)[0]
+
+
 def rank_results(
     *, evaluations: Tuple, metrics: Tuple[Metric, ...], score_method: Callable,
 ) -> Positions:
     """Determine the overall rank for each result."""
-    evaluations = _filter_valid_results(
-        evaluations=evaluations, metrics=metrics
+    values = {}
+    for e in evaluations:
+        metric_values = get_metric_values(evaluation=e, metrics=metrics)
+
+        # Ensure that all of the metrics are in every result
+        if metric_values is not None:
+            values[e.pk] = metric_values
+
+    if _is_numeric(values=values):
+        rank_values = _rank_values_numpy
+    else:
+        rank_values = _rank_values_python
+
+    return rank_values(
+        values=values, metrics=metrics, score_method=score_method
     )
 
-    rank_per_metric = _get_rank_per_metric(
-        evaluations=evaluations, metrics=metrics
+
+def _is_numeric(*, values: Dict[Any, Tuple]) -> bool:
+    """Can the values be ranked exactly as an array of floats?"""
+    return all(
+        type(v) in (int, float) and abs(v) <= FLOAT_EXACT_INTEGER_LIMIT
+        for row in values.values()
+        for v in row
     )
 
+
+def _rank_values_python(
+    *, values: Dict[Any, Tuple], metrics: Tuple[Metric, ...], score_method
+) -> Positions:
+    """
+    Ranks the results from the values of their metrics.
+
+    Takes a dictionary where the key is the pk of the result and the value
+    is a tuple of the values of the metrics. The rank per metric is a
+    dictionary where the key is the path of the metric and the value is the
+    rank of this result for this metric.
+    """
+    metric_rank = {}
+    for idx, metric in enumerate(metrics):
+        metric_scores = {pk: v[idx] for pk, v in values.items()}
+        metric_rank[metric.path] = _scores_to_ranks(
+            scores=metric_scores, reverse=metric.reverse
+        )
+
+    rank_per_metric = {
+        pk: {
+            metric_path: ranks[pk]
+            for metric_path, ranks in metric_rank.items()
+        }
+        for pk in values
+    }
+
     rank_scores = {
         pk: score_method([m for m in metrics.values()])
         for pk, metrics in rank_per_metric.items()
@@ -53,68 +128,68 @@ def rank_results(
     )
 
 
-def _filter_valid_results(
-    *, evaluations: Iterable, metrics: Tuple[Metric, ...]
-) -> List:
-    """Ensure that all of the metrics are in every result."""
-    return [
-        e
-        for e in evaluations
-        if all(
-            get_jsonpath(
-                get(
-                    [
-                        o.value
-                        for o in e.outputs.all()
-                        if o.interface.slug == "metrics-json-file"
-                    ]
-                ),
-                m.path,
-            )
-            not in ["", None]
-            for m in metrics
+def _min_ranks(a: np.ndarray) -> np.ndarray:
+    """
+    Ranks the rows of a for each column in ascending order, rows with the
+    same value share the lowest rank.
+    """
+    ranks = np.empty(a.shape, dtype=np.int64)
+
+    for col in range(a.shape[1]):
+        _, inverse, counts = np.unique(
+            a[:, col], return_inverse=True, return_counts=True
         )
-    ]
+        ranks[:, col] = (np.cumsum(counts) - counts + 1)[inverse]
+
+    return ranks
 
 
-def _get_rank_per_metric(
-    *, evaluations: Iterable, metrics: Tuple[Metric, ...]
-) -> Dict[str, Dict[str, float]]:
+def _rank_values_numpy(
+    *, values: Dict[Any, Tuple], metrics: Tuple[Metric, ...], score_method
+) -> Positions:
     """
-    Takes results and calculates the rank for each of the individual metrics
+    Ranks the results from the values of their metrics with numpy.
 
-    Returns a dictionary where the key is the pk of the result, and the
-    values is another dictionary where the key is the path of the metric and
-    the value is the rank of this result for this metric
+    Gives the same positions as _rank_values_python for numeric values.
     """
-    metric_rank = {}
-    for metric in metrics:
-        # Extract the value of the metric for this primary key and sort on the
-        # value of the metric
-        metric_scores = {
-            e.pk: get_jsonpath(
-                get(
-                    [
-                        o.value
-                        for o in e.outputs.all()
-                        if o.interface.slug == "metrics-json-file"
-                    ]
-                ),
-                metric.path,
-            )
-            for e in evaluations
-        }
-        metric_rank[metric.path] = _scores_to_ranks(
-            scores=metric_scores, reverse=metric.reverse
+    # Metrics with the same path are only ranked once, as a dictionary
+    # keeps the first position and the last value of a key
+    unique_idx = {m.path: idx for idx, m in enumerate(metrics)}
+    paths = [*unique_idx]
+    columns = [*unique_idx.values()]
+
+    pks = [*values]
+    a = np.array([values[pk] for pk in pks], dtype=np.float64).reshape(
+        len(pks), len(metrics)
+    )[:, columns]
+
+    # Reverse the order of descending metrics
+    reverse = np.array([metrics[idx].reverse for idx in columns])
+    a[:, reverse] *= -1
+
+    metric_ranks = _min_ranks(a)
+
+    if score_method is absolute_score:
+        scores = metric_ranks[:, 0]
+    elif score_method is mean:
+        scores = metric_ranks.mean(axis=1)
+    elif score_method is median:
+        scores = np.median(metric_ranks, axis=1)
+    else:
+        scores = np.array(
+            [score_method(r) for r in metric_ranks.tolist()], dtype=np.float64
         )
 
-    return {
-        e.pk: {
-            metric_path: ranks[e.pk]
-            for metric_path, ranks in metric_rank.items()
-        }
-        for e in evaluations
-    }
+    ranks = _min_ranks(scores.reshape(-1, 1))[:, 0]
+
+    return Positions(
+        ranks=dict(zip(pks, ranks.tolist())),
+        rank_scores=dict(zip(pks, scores.tolist())),
+        rank_per_metric={
+            pk: dict(zip(paths, r))
+            for pk, r in zip(pks, metric_ranks.tolist())
+        },
+    )
 
 
 def _scores_to_ranks(
@@ -145,3 +220,237 @@ def _scores_to_ranks(
         ranks[pk] = current_rank
 
     return ranks
+
+
+def get_metric_values(
+    *, evaluation, metrics: Tuple[Metric, ...]
+) -> Optional[Tuple]:
+    """
+    Extracts the values of the metrics from the outputs of an evaluation.
+
+    Returns None if any of the metrics are missing.
+    """
+    result = _get_metrics_json(evaluation=evaluation)
+    values = tuple(get_jsonpath(result, m.path) for m in metrics)
+
+    if any(v in ["", None] for v in values):
+        return None
+
+    return values
+
+
+def _get_metrics_json(*, evaluation):
+    return get(
+        [
+            o.value
+            for o in evaluation.outputs.all()
+            if o.interface.slug == "metrics-json-file"
+        ]
+    )
+
+
+def get_leaderboard_paths(*, phase) -> Tuple[str, ...]:
+    """The paths of all of the metrics that are displayed on the leaderboard."""
+    paths = [phase.score_jsonpath, phase.score_error_jsonpath]
+
+    for col in phase.extra_results_columns:
+        paths.extend([col["path"], col.get("error_path", "")])
+
+    return tuple(OrderedDict.fromkeys(p for p in paths if p))
+
+
+def project_metrics(*, metrics, paths: Iterable[str]) -> Dict[str, Any]:
+    """
+    Selects the values at paths from the metrics of an evaluation.
+
+    The projection is a flat dictionary keyed by path, missing values are
+    left out.
+    """
+    projection = {}
+
+    for path in paths:
+        try:
+            value = get_jsonpath(metrics, path)
+        except TypeError:
+            # An intermediate value is not an object
+            continue
+
+        if value not in ["", None]:
+            projection[path] = value
+
+    return projection
+
+
+def get_metrics_projection(*, evaluation, paths: Iterable[str]) -> Dict:
+    """Projects the metrics json output of an evaluation onto paths."""
+    try:
+        metrics = _get_metrics_json(evaluation=evaluation)
+    except (ObjectDoesNotExist, MultipleObjectsReturned):
+        return {}
+
+    return project_metrics(metrics=metrics, paths=paths)
+
+
+def _leaderboard_version_key(*, challenge_pk, phase_slug):
+    return f"evaluation:leaderboard:{challenge_pk}:{phase_slug}:version"
+
+
+def get_leaderboard_version(*, challenge_pk, phase_slug) -> str:
+    """
+    Gets the version of the leaderboard of a phase.
+
+    The version changes every time that the phase is ranked, so it can be
+    used in the cache keys of the rendered leaderboard. The phase is
+    identified by its challenge and slug as these are known from the
+    request without a database query.
+    """
+    key = _leaderboard_version_key(
+        challenge_pk=challenge_pk, phase_slug=phase_slug
+    )
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def invalidate_leaderboard(*, challenge_pk, phase_slug):
+    """Changes the version of the leaderboard of a phase."""
+    cache.set(
+        _leaderboard_version_key(
+            challenge_pk=challenge_pk, phase_slug=phase_slug
+        ),
+        uuid.uuid4().hex,
+        timeout=None,
+    )
+
+
+def _column_ranks(*, column: List, reverse: bool) -> Dict:
+    """
+    Maps each value in the sorted column to its rank, ties share the lowest
+    rank.
+    """
+    ranks = {}
+
+    for idx, value in enumerate(reversed(column) if reverse else column):
+        ranks.setdefault(value, idx + 1)
+
+    return ranks
+
+
+class MetricTable:
+    """
+    The metric values of the published, successful evaluations of a phase.
+
+    The values of each metric are kept in a sorted column, so an evaluation
+    can be added or removed with a bisect, and the ranks for a metric are
+    read from its column without sorting.
+
+    The table also records the positions that were written to each
+    evaluation, so only the evaluations whose positions change need to be
+    updated.
+    """
+
+    def __init__(self, *, metrics: Tuple[Metric, ...]):
+        self.metrics = metrics
+        self.rows: Dict[Any, MetricRow] = {}
+        self.written: Dict[Any, Tuple] = {}
+        self._columns: List[List] = [[] for _ in metrics]
+
+    def add(self, *, pk, row: MetricRow):
+        self.remove(pk=pk)
+        self.rows[pk] = row
+
+        if row.values is not None:
+            for column, value in zip(self._columns, row.values):
+                insort(column, value)
+
+    def remove(self, *, pk):
+        row = self.rows.pop(pk, None)
+
+        if row is not None and row.values is not None:
+            for column, value in zip(self._columns, row.values):
+                del column[bisect_left(column, value)]
+
+    def most_recent_per_creator(self) -> List:
+        """The pks of the most recent evaluation of each creator."""
+        most_recent = {}
+
+        for pk, row in self.rows.items():
+            if (
+                row.creator not in most_recent
+                or row.created > self.rows[most_recent[row.creator]].created
+            ):
+                most_recent[row.creator] = pk
+
+        return [*most_recent.values()]
+
+    def best_per_creator(self, *, ranks: Dict) -> List:
+        """
+        The pks of the best ranked evaluation of each creator, the most
+        recent evaluation wins ties.
+        """
+        best = {}
+
+        for pk, row in sorted(
+            self.rows.items(), key=lambda r: r[1].created, reverse=True
+        ):
+            if pk not in ranks:
+                continue
+
+            if row.creator not in best or ranks[pk] < ranks[best[row.creator]]:
+                best[row.creator] = pk
+
+        return [*best.values()]
+
+    def rank(self, *, score_method: Callable, pks=None) -> Positions:
+        """
+        Ranks the evaluations in pks, or all evaluations if pks is None.
+
+        This gives the same positions as rank_results.
+        """
+        if pks is None:
+            pks = [
+                pk for pk, row in self.rows.items() if row.values is not None
+            ]
+            columns = self._columns
+        else:
+            pks = [pk for pk in pks if self.rows[pk].values is not None]
+            columns = [
+                sorted(self.rows[pk].values[idx] for pk in pks)
+                for idx in range(len(self.metrics))
+            ]
+
+        paths = [metric.path for metric in self.metrics]
+        metric_ranks = [
+            _column_ranks(column=column, reverse=metric.reverse)
+            for metric, column in zip(self.metrics, columns)
+        ]
+
+        rank_per_metric = {
+            pk: dict(
+                zip(
+                    paths,
+                    [r[v] for r, v in zip(metric_ranks, self.rows[pk].values)],
+                )
+            )
+            for pk in pks
+        }
+
+        rank_scores = {
+            pk: score_method([m for m in metrics.values()])
+            for pk, metrics in rank_per_metric.items()
+        }
+
+        score_ranks = _column_ranks(
+            column=sorted(rank_scores.values()), reverse=False
+        )
+        ranks = {pk: score_ranks[score] for pk, score in rank_scores.items()}
+
+        return Positions(
+            ranks=ranks,
+            rank_scores=rank_scores,
+            rank_per_metric=rank_per_metric,
+        )
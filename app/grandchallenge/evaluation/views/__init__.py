@@ -1,13 +1,17 @@
 from datetime import datetime, timedelta
+from hashlib import sha256
 from typing import Dict
+from urllib.parse import urlencode
 
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.contrib.messages.views import SuccessMessageMixin
-from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.files import File
 from django.db.models import Q
-from django.http import Http404
+from django.db.models.fields.json import KeyTransform
+from django.http import Http404, JsonResponse
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.utils.functional import cached_property
@@ -42,6 +46,7 @@ from grandchallenge.evaluation.models import (
     Submission,
 )
 from grandchallenge.evaluation.serializers import EvaluationSerializer
+from grandchallenge.evaluation.utils import get_leaderboard_version
 from grandchallenge.jqfileupload.widgets.uploader import StagedAjaxFile
 from grandchallenge.subdomains.utils import reverse, reverse_lazy
 from grandchallenge.teams.models import Team
@@ -436,6 +441,72 @@ class LeaderboardDetail(
             challenge=self.request.challenge, slug=self.kwargs["slug"]
         )
 
+    @cached_property
+    def table_cache_key(self):
+        """
+        The key of a page of the leaderboard in the cache.
+
+        The key contains the version of the leaderboard, which changes when
+        the phase is ranked, so the pages of older rankings are not used.
+        """
+        if self.request.challenge.hidden:
+            viewer = f"user:{self.request.user.pk}"
+        else:
+            # Everyone can see the published results of public challenges
+            viewer = "public"
+
+        # The draw counter and the cache buster of datatables are ignored
+        params = urlencode(
+            sorted(
+                (k, v)
+                for k, v in self.request.GET.lists()
+                if k not in ("draw", "_")
+            ),
+            doseq=True,
+        )
+        version = get_leaderboard_version(
+            challenge_pk=self.request.challenge.pk,
+            phase_slug=self.kwargs["slug"],
+        )
+
+        return (
+            f"evaluation:leaderboard:{self.request.challenge.pk}:"
+            f"{self.kwargs['slug']}:{version}:{viewer}:"
+            f"{sha256(params.encode('utf-8')).hexdigest()}"
+        )
+
+    def get(self, request, *args, **kwargs):
+        if self.is_table_request(request):
+            data = cache.get(self.table_cache_key)
+
+            if data is not None:
+                return JsonResponse(
+                    {"draw": int(request.GET.get("draw")), **data}
+                )
+
+        return super().get(request, *args, **kwargs)
+
+    def get_table_data(self, request):
+        data = super().get_table_data(request)
+        cache.set(
+            self.table_cache_key,
+            data,
+            timeout=settings.EVALUATION_LEADERBOARD_CACHE_TIMEOUT,
+        )
+        return data
+
+    def get_row_context(self, *, object_list):
+        return {"user_teams": self.user_teams}
+
+    @cached_property
+    def metric_sort_fields(self):
+        """Maps the paths of the metric columns to the fields they sort by."""
+        paths = [
+            self.phase.score_jsonpath,
+            *[c["path"] for c in self.phase.extra_results_columns],
+        ]
+        return {path: f"metric_{idx}" for idx, path in enumerate(paths)}
+
     @property
     def columns(self):
         columns = []
@@ -473,13 +544,20 @@ class LeaderboardDetail(
 
         if self.phase.scoring_method_choice == self.phase.ABSOLUTE:
             columns.append(
-                Column(title=self.phase.score_title, sort_field="rank")
+                Column(
+                    title=self.phase.score_title,
+                    sort_field=self.metric_sort_fields[
+                        self.phase.score_jsonpath
+                    ],
+                )
             )
         else:
             columns.append(
                 Column(
                     title=f"{self.phase.score_title} (Position)",
-                    sort_field="rank",
+                    sort_field=self.metric_sort_fields[
+                        self.phase.score_jsonpath
+                    ],
                     classes=("toggleable",),
                 )
             )
@@ -490,7 +568,7 @@ class LeaderboardDetail(
                     title=c["title"]
                     if self.phase.scoring_method_choice == self.phase.ABSOLUTE
                     else f"{c['title']} (Position)",
-                    sort_field="rank",
+                    sort_field=self.metric_sort_fields[c["path"]],
                     classes=("toggleable",),
                 )
             )
@@ -549,10 +627,10 @@ class LeaderboardDetail(
                 rank__gt=0,
             )
             .annotate(
-                metrics=ArrayAgg(
-                    "outputs__value",
-                    filter=Q(outputs__interface__slug="metrics-json-file"),
-                )
+                **{
+                    field: KeyTransform(path, "metrics")
+                    for path, field in self.metric_sort_fields.items()
+                }
             )
         )
         return queryset
@@ -1,8 +1,28 @@
+from uuid import UUID
+
 from celery import shared_task
 
-from grandchallenge.jqfileupload.widgets.uploader import cleanup_stale_files
+from grandchallenge.jqfileupload.models import StagedFile
+from grandchallenge.jqfileupload.widgets.uploader import (
+    StagedAjaxFile,
+    cleanup_stale_files,
+)
 
 
 @shared_task
 def cleanup_stale_uploads():
     cleanup_stale_files()
+
+
+@shared_task
+def assemble_staged_file(*, file_id):
+    StagedAjaxFile(UUID(str(file_id))).assemble()
+
+
+@shared_task
+def delete_staged_file_objects(*, names):
+    """Deletes the objects of staged files that no longer have a row."""
+    storage = StagedFile._meta.get_field("file").storage
+
+    for name in names:
+        storage.delete(name)
@@ -1,6 +1,7 @@
 import re
 from datetime import timedelta
 
+from django.db import transaction
 from django.utils.timezone import now
 from rest_framework import mixins
 from rest_framework.decorators import action
@@ -15,6 +16,8 @@ from grandchallenge.core.permissions.rest_framework import (
 )
 from grandchallenge.jqfileupload.models import StagedFile
 from grandchallenge.jqfileupload.serializers import StagedFileSerializer
+from grandchallenge.jqfileupload.tasks import assemble_staged_file
+from grandchallenge.jqfileupload.widgets.uploader import StagedAjaxFile
 
 
 class StagedFileViewSet(
@@ -38,6 +41,26 @@ class StagedFileViewSet(
                 )
         return super().create(request, *args, **kwargs)
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+
+        instances = serializer.instance
+        if not isinstance(instances, list):
+            instances = [instances]
+
+        # Combine the chunks once the last one of a chunked upload arrives
+        for file_id in {instance.file_id for instance in instances}:
+            staged_file = StagedAjaxFile(file_id)
+            if (
+                staged_file.staged_files.count() > 1
+                and staged_file.is_complete
+            ):
+                transaction.on_commit(
+                    lambda f=file_id: assemble_staged_file.apply_async(
+                        kwargs={"file_id": str(f)}
+                    )
+                )
+
     def get_serializer(self, *args, **kwargs):
         data = [
             self._handle_file(uploaded_file)
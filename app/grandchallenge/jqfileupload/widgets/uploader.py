@@ -1,13 +1,24 @@
 import hashlib
 import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from io import BufferedIOBase
+from time import perf_counter
 
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
 from django.forms.widgets import Widget
 from django.http.request import HttpRequest
 from django.utils import timezone
 
+from grandchallenge.core.storage import (
+    S3_MULTIPART_MAX_PARTS,
+    S3_MULTIPART_MIN_PART_SIZE,
+)
 from grandchallenge.jqfileupload.models import StagedFile
 from grandchallenge.jqfileupload.widgets.utils import IntervalMap
 
@@ -85,6 +96,42 @@ class AjaxUploadWidget(Widget):
         return context
 
 
+@dataclass
+class ReadStatistics:
+    """Counters for the reads of an :class:`OpenedStagedAjaxFile`."""
+
+    bytes_read: int = 0
+    bytes_fetched: int = 0
+    chunks_fetched: int = 0
+    handle_cache_hits: int = 0
+    # Time spent fetching chunks from storage, summed over the threads
+    fetch_seconds: float = 0.0
+    # Time the reader spent blocked waiting for chunks to be fetched
+    wait_seconds: float = 0.0
+
+    @property
+    def fetch_throughput(self):
+        """Bytes per second fetched from storage."""
+        if not self.fetch_seconds:
+            return None
+
+        return self.bytes_fetched / self.fetch_seconds
+
+
+def _fetch_chunk(chunk: StagedFile):
+    start = perf_counter()
+    handle = chunk.file.storage.open(chunk.file.name, "rb")
+    # Remote storages only download the object on the first read
+    handle.read(0)
+    return handle, perf_counter() - start
+
+
+def _close_fetched_chunk(future: Future):
+    if not future.cancelled() and future.exception() is None:
+        handle, _ = future.result()
+        handle.close()
+
+
 class OpenedStagedAjaxFile(BufferedIOBase):
     """
     A open file handle for a :class:`StagedAjaxFile`.
@@ -92,9 +139,14 @@ class OpenedStagedAjaxFile(BufferedIOBase):
     The file handle is strictly read-only. Under the hood, this class
     reconstructs the contingent file from the file chunks that have been
     uploaded.
+
+    When a chunk is read the next `read_ahead` chunks are fetched from
+    storage on a thread pool. The handles of recently used chunks are kept
+    open, so seeking back and forth across a chunk boundary does not
+    fetch the chunks again. Counters for the reads are kept in `statistics`.
     """
 
-    def __init__(self, _uuid):
+    def __init__(self, _uuid, *, read_ahead=None):
         super().__init__()
         self._uuid = _uuid
         self._chunks = list(
@@ -102,12 +154,24 @@ class OpenedStagedAjaxFile(BufferedIOBase):
         )
         self._chunks.sort(key=lambda x: x.start_byte)
         self._chunk_map = IntervalMap()
-        for chunk in self._chunks:
+        for index, chunk in enumerate(self._chunks):
             self._chunk_map.append_interval(
-                chunk.end_byte - chunk.start_byte + 1, chunk
+                chunk.end_byte - chunk.start_byte + 1, index
             )
         self._file_pointer = 0
-        self._current_chunk = None
+
+        if read_ahead is None:
+            read_ahead = settings.JQFILEUPLOAD_READ_AHEAD_CHUNKS
+        self._read_ahead = read_ahead
+        self._executor = (
+            ThreadPoolExecutor(max_workers=read_ahead) if read_ahead else None
+        )
+        # Maps chunk indices to futures of their handles, least recently
+        # used first
+        self._handles = OrderedDict()
+        # The indices of the chunks in _handles that have been read from
+        self._fetched = set()
+        self.statistics = ReadStatistics()
 
     @property
     def closed(self):
@@ -130,48 +194,109 @@ class OpenedStagedAjaxFile(BufferedIOBase):
     def seekable(self, *args, **kwargs):
         return True
 
-    def readinto(self, buffer):
-        read_bytes = self.read(len(buffer))
-        buffer[: len(read_bytes)] = read_bytes
-        return len(read_bytes)
+    def _submit_fetch(self, index):
+        chunk = self._chunks[index]
 
-    def read(self, size=-1):
-        if size < 0:
-            size = None
+        if self._executor is not None:
+            return self._executor.submit(_fetch_chunk, chunk)
+
+        future = Future()
+        try:
+            future.set_result(_fetch_chunk(chunk))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _get_handle(self, index):
+        upcoming = range(
+            index, min(index + self._read_ahead + 1, len(self._chunks))
+        )
+
+        if index in self._handles and index not in self._fetched:
+            # The first use of a chunk that was fetched ahead
+            self.statistics.handle_cache_hits += 1
+
+        for i in upcoming:
+            if i not in self._handles:
+                self._handles[i] = self._submit_fetch(i)
+            self._handles.move_to_end(i)
+
+        # Keep the upcoming chunks, and one previous chunk for seeks
+        # back across the chunk boundary
+        while len(self._handles) > len(upcoming) + 1:
+            evicted_index, evicted = self._handles.popitem(last=False)
+            self._fetched.discard(evicted_index)
+            evicted.cancel()
+            evicted.add_done_callback(_close_fetched_chunk)
+
+        future = self._handles[index]
+        # Move the current chunk to the back so that it is evicted last
+        self._handles.move_to_end(index)
+
+        start = perf_counter()
+        handle, elapsed = future.result()
+        self.statistics.wait_seconds += perf_counter() - start
+
+        if index not in self._fetched:
+            chunk = self._chunks[index]
+            self._fetched.add(index)
+            self.statistics.chunks_fetched += 1
+            self.statistics.bytes_fetched += (
+                chunk.end_byte - chunk.start_byte + 1
+            )
+            self.statistics.fetch_seconds += elapsed
+
+        return handle
+
+    def readinto(self, buffer):
         if self.closed:
             raise ValueError("file closed")
 
         if self.size <= self._file_pointer:
-            return b""
+            return 0
 
         if self._file_pointer < 0:
             raise IOError("invalid file pointer position")
 
-        if size is None:
-            size = self.size - self._file_pointer
-        result = b""
-        while len(result) < size:
-            if self._file_pointer >= len(self._chunk_map):
-                break
-
-            this_chunk = self._chunk_map[self._file_pointer]
-            if this_chunk is not self._current_chunk:
-                # we need to switch to a new chunk
-                if self._current_chunk is not None:
-                    self._current_chunk.file.close()
-                    self._current_chunk = None
-                this_chunk.file.open("rb")
-                this_chunk.file.seek(
-                    self._file_pointer - this_chunk.start_byte
-                )
-                self._current_chunk = this_chunk
+        view = memoryview(buffer).cast("B")
+        n_read = 0
+
+        while n_read < len(view) and self._file_pointer < self.size:
+            index = self._chunk_map[self._file_pointer]
+            chunk = self._chunks[index]
+            handle = self._get_handle(index)
+
             read_size = min(
-                size - len(result),
-                self._current_chunk.end_byte + 1 - self._file_pointer,
+                len(view) - n_read, chunk.end_byte + 1 - self._file_pointer,
             )
-            result += self._current_chunk.file.read(read_size)
-            self._file_pointer += read_size
-        return result
+            handle.seek(self._file_pointer - chunk.start_byte)
+            chunk_read = _readinto(handle, view[n_read : n_read + read_size])
+
+            if chunk_read == 0:
+                raise IOError(f"unexpected end of chunk {chunk.pk}")
+
+            n_read += chunk_read
+            self._file_pointer += chunk_read
+
+        self.statistics.bytes_read += n_read
+
+        return n_read
+
+    def read(self, size=-1):
+        if self.closed:
+            raise ValueError("file closed")
+
+        remaining = max(self.size - self._file_pointer, 0)
+        if size is None or size < 0:
+            size = remaining
+        else:
+            size = min(size, remaining)
+
+        buffer = bytearray(size)
+        n_read = self.readinto(buffer)
+        del buffer[n_read:]
+
+        return bytes(buffer)
 
     def read1(self, size=-1):
         return self.read(size=size)
@@ -193,12 +318,8 @@ class OpenedStagedAjaxFile(BufferedIOBase):
         if new_pointer < 0:
             raise IOError("invalid file pointer")
 
+        # The handles are positioned when they are next read from
         self._file_pointer = new_pointer
-        if self._file_pointer < self._chunk_map.len:
-            if self._chunk_map[self._file_pointer] is self._current_chunk:
-                self._current_chunk.file.seek(
-                    self._file_pointer - self._current_chunk.start_byte
-                )
         return self._file_pointer
 
     def tell(self, *args, **kwargs):
@@ -210,9 +331,27 @@ class OpenedStagedAjaxFile(BufferedIOBase):
     def close(self):
         if not self.closed:
             self._chunks = None
-            if self._current_chunk is not None:
-                self._current_chunk.file.close()
-                self._current_chunk = None
+            self._fetched.clear()
+            while self._handles:
+                _, future = self._handles.popitem()
+                future.cancel()
+                future.add_done_callback(_close_fetched_chunk)
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+def _readinto(handle, view):
+    readinto = getattr(handle, "readinto", None)
+
+    if readinto is not None:
+        return readinto(view)
+
+    # Some storage files, such as the spooled downloads from S3, do not
+    # implement readinto
+    data = handle.read(len(view))
+    view[: len(data)] = data
+    return len(data)
 
 
 class StagedAjaxFile:
@@ -306,6 +445,97 @@ class StagedAjaxFile:
             chunk.file.delete()
         query.delete()
 
+    def assemble(self):
+        """
+        Combines the chunks of a complete upload into a single chunk, so that
+        reading the file only requires one object from storage.
+
+        The chunks are concatenated in the storage itself when the storage
+        supports this, otherwise they are streamed into a new file.
+        """
+        if not self.is_complete:
+            raise IOError("incomplete upload")
+
+        chunks = list(self.staged_files.order_by("start_byte"))
+
+        if len(chunks) == 1:
+            return
+
+        first_chunk, last_chunk = chunks[0], chunks[-1]
+        assembled = StagedFile(
+            user_pk_str=first_chunk.user_pk_str,
+            client_id=first_chunk.client_id,
+            client_filename=first_chunk.client_filename,
+            file_id=self.__uuid,
+            timeout=max(c.timeout for c in chunks),
+            start_byte=0,
+            end_byte=last_chunk.end_byte,
+            total_size=last_chunk.end_byte + 1,
+        )
+
+        storage = first_chunk.file.storage
+
+        if _can_concatenate(storage=storage, chunks=chunks):
+            name = storage.get_available_name(
+                assembled.file.field.generate_filename(
+                    assembled, first_chunk.client_filename
+                )
+            )
+            storage.concatenate(
+                from_names=[c.file.name for c in chunks], to_name=name
+            )
+            assembled.file.name = name
+        else:
+            with self.open() as f:
+                assembled.file.save(
+                    first_chunk.client_filename, File(f), save=False
+                )
+
+        # Local import to avoid circular dependency
+        from grandchallenge.jqfileupload.tasks import (
+            delete_staged_file_objects,
+        )
+
+        with transaction.atomic():
+            # Another process could have assembled or deleted the chunks
+            # in the meantime, the rows are locked until the swap is done
+            locked_chunks = list(
+                StagedFile.objects.select_for_update().filter(
+                    pk__in=[c.pk for c in chunks]
+                )
+            )
+            is_current = len(locked_chunks) == len(chunks)
+
+            if is_current:
+                assembled.save()
+                StagedFile.objects.filter(
+                    pk__in=[c.pk for c in chunks]
+                ).delete()
+
+                # Readers that were opened before the swap still read from
+                # the chunks, they are all finished by the task time limit
+                chunk_names = [c.file.name for c in chunks]
+                transaction.on_commit(
+                    lambda: delete_staged_file_objects.apply_async(
+                        kwargs={"names": chunk_names},
+                        countdown=settings.CELERY_TASK_TIME_LIMIT,
+                    )
+                )
+
+        if not is_current:
+            assembled.file.delete(save=False)
+
+
+def _can_concatenate(*, storage, chunks):
+    return (
+        hasattr(storage, "concatenate")
+        and len(chunks) <= S3_MULTIPART_MAX_PARTS
+        and all(
+            c.end_byte - c.start_byte + 1 >= S3_MULTIPART_MIN_PART_SIZE
+            for c in chunks[:-1]
+        )
+    )
+
 
 class UploadedAjaxFileList(forms.Field):
     def to_python(self, value):
@@ -1425,7 +1425,8 @@ class Answer(UUIDModel):
             + [
                 self.created.isoformat(),
                 self.answer_text,
-                "; ".join(self.images.values_list("name", flat=True)),
+                # Uses the prefetched images if they are available
+                "; ".join(im.name for im in self.images.all()),
                 self.creator.username,
             ]
             + list(itertools.chain(*self.history_values))
@@ -1433,11 +1434,16 @@ class Answer(UUIDModel):
 
     @property
     def csv_headers(self):
-        return self._csv_headers + list(
+        return self.csv_headers_for(n_history=len(self.history_values))
+
+    @classmethod
+    def csv_headers_for(cls, *, n_history):
+        """The csv headers of an answer with n_history historical values."""
+        return cls._csv_headers + list(
             itertools.chain(
                 *[
                     [f"Answer-{x}", f"Modification_date-{x}"]
-                    for x in range(len(self.history_values))
+                    for x in range(n_history)
                 ]
             )
         )
@@ -1517,21 +1523,25 @@ class Answer(UUIDModel):
 
     @property
     def answer_text(self):
+        # The options are filtered in python so that prefetched options
+        # are used, for instance, when exporting many answers
         if self.question.answer_type == Question.ANSWER_TYPE_CHOICE:
-            return (
-                self.question.options.filter(pk=self.answer)
-                .values_list("title", flat=True)
-                .first()
-                or ""
+            return next(
+                (
+                    o.title
+                    for o in self.question.options.all()
+                    if o.pk == self.answer
+                ),
+                "",
             )
         if self.question.answer_type in (
             Question.ANSWER_TYPE_MULTIPLE_CHOICE,
             Question.ANSWER_TYPE_MULTIPLE_CHOICE_DROPDOWN,
         ):
             return ", ".join(
-                self.question.options.filter(pk__in=self.answer).values_list(
-                    "title", flat=True
-                )
+                o.title
+                for o in self.question.options.all()
+                if o.pk in self.answer
             )
         return self.answer
 
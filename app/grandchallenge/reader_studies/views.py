@@ -1,5 +1,6 @@
 import csv
 import re
+from collections import defaultdict
 
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
@@ -10,12 +11,14 @@ from django.core.exceptions import (
     ValidationError,
 )
 from django.db import transaction
+from django.db.models import Count, Max, Q
 from django.forms.utils import ErrorList
 from django.http import (
     Http404,
     HttpResponse,
     HttpResponseRedirect,
     JsonResponse,
+    StreamingHttpResponse,
 )
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
@@ -749,30 +752,45 @@ class ReaderStudyPermissionRequestUpdate(PermissionRequestUpdate):
         return context
 
 
+# The number of answers that are fetched per query when exporting
+EXPORT_BATCH_SIZE = 1000
+
+
+class Echo:
+    """A file like object that returns the value that is written to it."""
+
+    def write(self, value):
+        return value
+
+
 class ExportCSVMixin(object):
     def _create_dicts(self, headers, data):
         return map(lambda x: dict(zip(headers, x)), data)
 
+    def _preprocess_row(self, row):
+        return map(lambda x: re.sub(r"[\n\r\t]", " ", str(x)), row)
+
     def _preprocess_data(self, data):
-        processed = []
-        for entry in data:
-            processed.append(
-                map(lambda x: re.sub(r"[\n\r\t]", " ", str(x)), entry)
-            )
-        return processed
+        return [self._preprocess_row(entry) for entry in data]
 
     def _create_csv_response(self, data, headers, filename="export.csv"):
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        """
+        Streams the rows in data as csv, data can be a generator so that
+        the rows are only created when they are sent.
+        """
         writer = csv.DictWriter(
-            response,
-            quoting=csv.QUOTE_ALL,
-            escapechar="\\",
-            fieldnames=headers,
+            Echo(), quoting=csv.QUOTE_ALL, escapechar="\\", fieldnames=headers,
         )
-        writer.writeheader()
-        csv_dict = self._create_dicts(headers, self._preprocess_data(data))
-        writer.writerows(csv_dict)
+
+        def content():
+            yield writer.writeheader()
+            for row in self._create_dicts(
+                headers, map(self._preprocess_row, data)
+            ):
+                yield writer.writerow(row)
+
+        response = StreamingHttpResponse(content(), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
         return response
 
@@ -792,27 +810,81 @@ class ReaderStudyViewSet(ExportCSVMixin, ReadOnlyModelViewSet):
         if not (user and user.has_perm(self.change_permission, obj)):
             raise Http404()
 
-    # TODO JM @action(detail=True)
+    @action(detail=True)
     def export_answers(self, request, pk=None):
         reader_study = self.get_object()
         self._check_change_perms(request.user, reader_study)
-        data = []
-        headers = []
-        for answer in (
-            Answer.objects.select_related("question__reader_study")
-            .select_related("creator")
-            .prefetch_related("images")
-            .filter(question__reader_study=reader_study, is_ground_truth=False)
-        ):
-            data += [answer.csv_values]
-            if len(answer.csv_headers) > len(headers):
-                headers = answer.csv_headers
+
+        answers = Answer.objects.filter(
+            question__reader_study=reader_study, is_ground_truth=False
+        )
+
+        # The widest row is the answer with the longest history
+        max_history = (
+            Answer.history.model.objects.filter(id__in=answers.values("pk"))
+            .order_by()
+            .values("id")
+            .annotate(n=Count("history_id"))
+            .aggregate(max_history=Max("n"))["max_history"]
+        )
+        headers = Answer.csv_headers_for(n_history=max_history or 0)
+
         return self._create_csv_response(
-            data,
+            (a.csv_values for a in self._iter_answers(answers=answers)),
             headers,
             filename=f"{reader_study.slug}-answers-{timezone.now().isoformat()}.csv",
         )
 
+    def _iter_answers(self, *, answers):
+        """
+        Iterates over the answers in batches of EXPORT_BATCH_SIZE.
+
+        The batches are fetched with keyset pagination in the default
+        order of the answers, the images, options and history of each
+        batch are fetched with one query each.
+        """
+        answers = (
+            answers.select_related("question", "creator")
+            .prefetch_related("images", "question__options")
+            .order_by("creator_id", "created", "pk")
+        )
+        last = None
+
+        while True:
+            batch = answers
+
+            if last is not None:
+                batch = batch.filter(
+                    Q(creator_id__gt=last.creator_id)
+                    | Q(creator_id=last.creator_id, created__gt=last.created)
+                    | Q(
+                        creator_id=last.creator_id,
+                        created=last.created,
+                        pk__gt=last.pk,
+                    )
+                )
+
+            batch = list(batch[:EXPORT_BATCH_SIZE])
+
+            if not batch:
+                return
+
+            history = defaultdict(list)
+            for answer_pk, value, date in (
+                Answer.history.model.objects.filter(
+                    id__in=[a.pk for a in batch]
+                )
+                .order_by("-history_date", "-history_id")
+                .values_list("id", "answer", "history_date")
+            ):
+                history[answer_pk].append((value, date))
+
+            for answer in batch:
+                answer.history_values = history[answer.pk]
+                yield answer
+
+            last = batch[-1]
+
     @action(detail=True, methods=["patch"])
     def generate_hanging_list(self, request, pk=None):
         reader_study = self.get_object()
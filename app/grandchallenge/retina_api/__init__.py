@@ -0,0 +1 @@
+default_app_config = "grandchallenge.retina_api.apps.RetinaAPIConfig"
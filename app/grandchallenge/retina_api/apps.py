@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class RetinaAPIConfig(AppConfig):
+    name = "grandchallenge.retina_api"
+
+    def ready(self):
+        # noinspection PyUnresolvedReferences
+        import grandchallenge.retina_api.signals  # noqa: F401
@@ -0,0 +1,78 @@
+# Generated by Django 3.1.1 on 2026-10-18 19:02
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0001_initial"),
+        ("archives", "0005_archive_social_image"),
+        ("retina_api", "0002_auto_20201001_0758"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchiveSubtree",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "value",
+                    models.JSONField(
+                        editable=False,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+                (
+                    "etag",
+                    models.CharField(
+                        editable=False,
+                        help_text="The sha256 of the value, which changes with its content",
+                        max_length=64,
+                    ),
+                ),
+                ("modified", models.DateTimeField(auto_now=True)),
+                (
+                    "archive",
+                    models.ForeignKey(
+                        editable=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="archives.archive",
+                    ),
+                ),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="patients.patient",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="archivesubtree",
+            constraint=models.UniqueConstraint(
+                fields=("archive", "patient"), name="unique_archive_patient"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="archivesubtree",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(patient__isnull=True),
+                fields=("archive",),
+                name="unique_archive_images",
+            ),
+        ),
+    ]
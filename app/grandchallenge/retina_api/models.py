@@ -5,3 +5,43 @@ from django.db import models
 class ArchiveDataModel(models.Model):
     value = models.JSONField(encoder=DjangoJSONEncoder)
     modified = models.DateTimeField(auto_now=True)
+
+
+class ArchiveSubtree(models.Model):
+    """
+    A subtree of the archive data that is used by the legacy workstation.
+
+    There is a subtree for each patient in an archive, or a single subtree
+    without a patient that holds the images of an archive that does not
+    contain patients. The subtrees are updated when their images, studies
+    or patients change, and the archive data is assembled from them.
+    """
+
+    archive = models.ForeignKey(
+        "archives.Archive", on_delete=models.CASCADE, editable=False
+    )
+    patient = models.ForeignKey(
+        "patients.Patient",
+        null=True,
+        on_delete=models.CASCADE,
+        editable=False,
+    )
+    value = models.JSONField(encoder=DjangoJSONEncoder, editable=False)
+    etag = models.CharField(
+        max_length=64,
+        editable=False,
+        help_text="The sha256 of the value, which changes with its content",
+    )
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("archive", "patient"), name="unique_archive_patient"
+            ),
+            models.UniqueConstraint(
+                fields=("archive",),
+                condition=models.Q(patient__isnull=True),
+                name="unique_archive_images",
+            ),
+        )
@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from grandchallenge.archives.models import Archive
+from grandchallenge.cases.models import Image
+from grandchallenge.patients.models import Patient
+from grandchallenge.registrations.models import OctObsRegistration
+from grandchallenge.retina_api.tasks import update_archive_subtrees
+from grandchallenge.studies.models import Study
+
+
+def _update_archive_subtrees(*, patient_pks=(), archive_pks=()):
+    # The primary keys are evaluated now as the objects could be deleted
+    # when the transaction is committed
+    kwargs = {
+        "patient_pks": [str(pk) for pk in patient_pks if pk is not None],
+        "archive_pks": [str(pk) for pk in archive_pks],
+    }
+
+    if kwargs["patient_pks"] or kwargs["archive_pks"]:
+        transaction.on_commit(
+            lambda: update_archive_subtrees.apply_async(kwargs=kwargs)
+        )
+
+
+def _patient_pks(images):
+    return Study.objects.filter(
+        image__in=images, patient__isnull=False
+    ).values_list("patient_id", flat=True)
+
+
+def _retina_archive_pks(archives):
+    return archives.filter(
+        title__in=settings.RETINA_ARCHIVE_NAMES
+    ).values_list("pk", flat=True)
+
+
+@receiver(post_save, sender=Image)
+@receiver(pre_delete, sender=Image)
+def on_image_changed(instance, created=False, **_):
+    if created:
+        # A new image is not in an archive yet
+        return
+
+    archive_pks = _retina_archive_pks(instance.archive_set.all())
+
+    if archive_pks:
+        # Only the images in the retina archives are in the subtrees
+        _update_archive_subtrees(
+            patient_pks=_patient_pks([instance]) if instance.study_id else [],
+            archive_pks=archive_pks,
+        )
+
+
+@receiver(m2m_changed, sender=Archive.images.through)
+def on_archive_images_changed(instance, action, reverse, model, pk_set, **_):
+    if action not in ["post_add", "post_remove", "pre_clear"]:
+        # nothing to do for the other actions
+        return
+
+    if reverse:
+        images = [instance]
+        if pk_set is None:
+            # When using a _clear action, pk_set is None
+            archives = instance.archive_set.all()
+        else:
+            archives = model.objects.filter(pk__in=pk_set)
+    else:
+        archives = Archive.objects.filter(pk=instance.pk)
+        if pk_set is None:
+            images = instance.images.all()
+        else:
+            images = model.objects.filter(pk__in=pk_set)
+
+    archive_pks = _retina_archive_pks(archives)
+
+    if archive_pks:
+        _update_archive_subtrees(
+            patient_pks=_patient_pks(images), archive_pks=archive_pks
+        )
+
+
+@receiver(pre_save, sender=Study)
+def on_study_saving(instance, **_):
+    # The study could be moved to another patient, whose subtrees then
+    # need to be updated as well
+    instance._previous_patient_id = (
+        None
+        if instance._state.adding
+        else Study.objects.filter(pk=instance.pk)
+        .values_list("patient_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Study)
+@receiver(pre_delete, sender=Study)
+def on_study_changed(instance, created=False, **_):
+    if not created:
+        # A new study does not contain images yet
+        _update_archive_subtrees(
+            patient_pks={
+                instance.patient_id,
+                getattr(instance, "_previous_patient_id", None),
+            }
+        )
+
+
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+def on_patient_changed(instance, created=False, **_):
+    if not created:
+        # A new patient does not contain studies yet
+        _update_archive_subtrees(patient_pks=[instance.pk])
+
+
+@receiver(post_save, sender=OctObsRegistration)
+@receiver(pre_delete, sender=OctObsRegistration)
+def on_registration_changed(instance, **_):
+    _update_archive_subtrees(patient_pks=_patient_pks([instance.oct_image]))
@@ -1,17 +1,114 @@
+import json
+from collections import defaultdict
+from hashlib import sha256
+
 from celery import shared_task
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
 
 from grandchallenge.archives.models import Archive
 from grandchallenge.patients.models import Patient
-from grandchallenge.retina_api.models import ArchiveDataModel
+from grandchallenge.retina_api.models import ArchiveDataModel, ArchiveSubtree
+
+# The archive whose images are not organised by patient
+KAPPA_ARCHIVE_NAME = "kappadata"
+
+# The relations of the images that are used in their subtrees
+IMAGE_PREFETCHES = ("modality", "study", "oct_image__obs_image")
 
 
 @shared_task
 def cache_archive_data():
-    archive_data = create_archive_data_object()
+    """Rebuilds all of the archive subtrees and the archive data."""
+    update_archive_subtrees()
+
+
+@shared_task
+def update_archive_subtrees(*, patient_pks=None, archive_pks=None):
+    """
+    Updates the archive subtrees that are affected by a change.
+
+    The subtrees of the patients in patient_pks are updated in all of the
+    retina archives, and the images of the archives in archive_pks without
+    patients are updated. All of the subtrees are rebuilt if neither is
+    given, and all of the subtrees of an archive are built if it has none
+    yet. The archive data is then assembled from the stored subtrees.
+    """
+    rebuild = patient_pks is None and archive_pks is None
+    archive_pks = {str(pk) for pk in archive_pks or []}
+
+    archives = Archive.objects.filter(title__in=settings.RETINA_ARCHIVE_NAMES)
+
+    for archive in archives:
+        # The subtrees of an archive that has not been indexed yet, for
+        # instance, right after they were introduced, are all built
+        build_archive = (
+            rebuild
+            or not ArchiveSubtree.objects.filter(archive=archive).exists()
+        )
+
+        if archive.name == KAPPA_ARCHIVE_NAME:
+            if build_archive or str(archive.pk) in archive_pks:
+                _set_subtree(
+                    archive=archive,
+                    patient=None,
+                    value=dict(
+                        generate_images(
+                            archive.images.prefetch_related(*IMAGE_PREFETCHES)
+                        )
+                    ),
+                )
+        elif build_archive or patient_pks:
+            _update_patient_subtrees(
+                archive=archive,
+                patient_pks=None if build_archive else patient_pks,
+            )
+
+    if rebuild:
+        ArchiveSubtree.objects.exclude(archive__in=archives).delete()
+
     ArchiveDataModel.objects.update_or_create(
-        pk=1, defaults={"value": archive_data}
+        pk=1, defaults={"value": create_archive_data_object()}
+    )
+
+
+def _update_patient_subtrees(*, archive, patient_pks):
+    patients = Patient.objects.filter(study__image__archive=archive).distinct()
+    subtrees = ArchiveSubtree.objects.filter(
+        archive=archive, patient__isnull=False
+    )
+
+    if patient_pks is not None:
+        patients = patients.filter(pk__in=patient_pks)
+        subtrees = subtrees.filter(patient__in=patient_pks)
+
+    patients = list(
+        patients.prefetch_related(
+            "study_set",
+            *[f"study_set__image_set__{p}" for p in IMAGE_PREFETCHES],
+        )
+    )
+
+    for patient in patients:
+        _set_subtree(
+            archive=archive,
+            patient=patient,
+            value=generate_patient(archive, patient),
+        )
+
+    # These patients no longer have images in the archive
+    subtrees.exclude(patient__in=patients).delete()
+
+
+def _set_subtree(*, archive, patient, value):
+    content = json.dumps(value, cls=DjangoJSONEncoder, sort_keys=True)
+    ArchiveSubtree.objects.update_or_create(
+        archive=archive,
+        patient=patient,
+        defaults={
+            "value": value,
+            "etag": sha256(content.encode("utf-8")).hexdigest(),
+        },
     )
 
 
@@ -20,17 +117,18 @@ def create_archive_data_object():
     # in RETINA_ARCHIVES_NAMES. This is used for the legacy workstation
     # and should be removed when it is not in use anymore.
     archives = Archive.objects.filter(title__in=settings.RETINA_ARCHIVE_NAMES)
-    patients = Patient.objects.prefetch_related(
-        "study_set",
-        "study_set__image_set",
-        "study_set__image_set__modality",
-        "study_set__image_set__obs_image",
-        "study_set__image_set__oct_image",
-        "study_set__image_set__archive_set",
-    )
+
+    subtrees = defaultdict(list)
+    for subtree in ArchiveSubtree.objects.filter(
+        archive__in=archives
+    ).order_by("pk"):
+        subtrees[subtree.archive_id].append(subtree)
 
     return {
-        "subfolders": dict(generate_archives(archives, patients)),
+        "subfolders": {
+            archive.name: generate_archive(archive, subtrees[archive.pk])
+            for archive in archives
+        },
         "info": "level 2",
         "name": "Archives",
         "id": "none",
@@ -38,46 +136,45 @@ def create_archive_data_object():
     }
 
 
-def generate_archives(archive_list, patients):
-    for archive in archive_list:
-        if archive.name == "kappadata":
-            subfolders = {}
-            images = dict(generate_images(archive.images))
+def generate_archive(archive, subtrees):
+    subfolders = {}
+    images = {}
+
+    for subtree in subtrees:
+        if subtree.patient_id is None:
+            images = subtree.value
         else:
-            subfolders = dict(generate_patients(archive, patients))
-            images = {}
-
-        yield archive.name, {
-            "subfolders": subfolders,
-            "info": "level 3",
-            "name": archive.name,
-            "id": archive.id,
-            "images": images,
-        }
+            subfolders[subtree.value["name"]] = subtree.value
+
+    return {
+        "subfolders": subfolders,
+        "info": "level 3",
+        "name": archive.name,
+        "id": archive.id,
+        "images": images,
+    }
 
 
-def generate_patients(archive, patients):
-    patient_list = patients.filter(study__image__archive=archive).distinct()
-    for patient in patient_list:
-        if archive.name == settings.RETINA_EXCEPTION_ARCHIVE:
-            image_set = {}
-            for study in patient.study_set.all():
-                image_set.update(dict(generate_images(study.image_set)))
-            yield patient.name, {
-                "subfolders": {},
-                "info": "level 4",
-                "name": patient.name,
-                "id": patient.id,
-                "images": image_set,
-            }
-        else:
-            yield patient.name, {
-                "subfolders": dict(generate_studies(patient.study_set)),
-                "info": "level 4",
-                "name": patient.name,
-                "id": patient.id,
-                "images": {},
-            }
+def generate_patient(archive, patient):
+    if archive.name == settings.RETINA_EXCEPTION_ARCHIVE:
+        image_set = {}
+        for study in patient.study_set.all():
+            image_set.update(dict(generate_images(study.image_set)))
+        return {
+            "subfolders": {},
+            "info": "level 4",
+            "name": patient.name,
+            "id": patient.id,
+            "images": image_set,
+        }
+    else:
+        return {
+            "subfolders": dict(generate_studies(patient.study_set)),
+            "info": "level 4",
+            "name": patient.name,
+            "id": patient.id,
+            "images": {},
+        }
 
 
 def generate_studies(study_list):
@@ -96,15 +193,14 @@ def generate_images(image_list):
         if image.modality.modality == settings.MODALITY_OCT:
             # oct image add info
             obs_image_id = "no info"
-            try:
-                oct_obs_registration = image.oct_image.get()
+            obs_registration_flat = []
+            # Uses the prefetched registrations
+            for oct_obs_registration in image.oct_image.all()[:1]:
                 obs_image_id = oct_obs_registration.obs_image.id
                 obs_list = oct_obs_registration.registration_values
                 obs_registration_flat = [
                     val for sublist in obs_list for val in sublist
                 ]
-            except ObjectDoesNotExist:
-                obs_registration_flat = []
 
             # leave voxel_size always empty because this info is in mhd file
             voxel_size = [0, 0, 0]
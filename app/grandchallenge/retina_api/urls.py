@@ -38,6 +38,16 @@ annotation_router.register(
 )
 urlpatterns = [
     path("archives/", views.ArchiveView.as_view(), name="archives-api-view"),
+    path(
+        "archives/<uuid:archive_pk>/",
+        views.ArchiveSubtreeView.as_view(),
+        name="archive-subtree-api-view",
+    ),
+    path(
+        "archives/<uuid:archive_pk>/<uuid:patient_pk>/",
+        views.ArchiveSubtreeView.as_view(),
+        name="archive-subtree-api-view",
+    ),
     path(
         "archive_data/",
         views.ArchiveAPIView.as_view(),
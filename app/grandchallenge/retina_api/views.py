@@ -1,5 +1,6 @@
 import json
 from enum import Enum
+from hashlib import sha256
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -8,10 +9,12 @@ from django.core.exceptions import (
     ObjectDoesNotExist,
     ValidationError,
 )
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from django.views import View
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django_filters import rest_framework as drf_filters
@@ -51,6 +54,7 @@ from grandchallenge.annotations.serializers import (
 )
 from grandchallenge.archives.models import Archive
 from grandchallenge.cases.models import Image
+from grandchallenge.cases.thumbnails import THUMBNAIL_ERRORS, get_thumbnail
 from grandchallenge.core.serializers import UserSerializer
 from grandchallenge.modalities.models import ImagingModality
 from grandchallenge.patients.models import Patient
@@ -67,10 +71,9 @@ from grandchallenge.retina_api.mixins import (
     RetinaAdminAPIPermission,
     RetinaOwnerAPIPermission,
 )
-from grandchallenge.retina_api.models import ArchiveDataModel
+from grandchallenge.retina_api.models import ArchiveDataModel, ArchiveSubtree
 from grandchallenge.retina_api.renderers import Base64Renderer
 from grandchallenge.retina_api.serializers import (
-    BytesImageSerializer,
     ImageLevelAnnotationsForImageSerializer,
     TreeImageSerializer,
     TreeObjectSerializer,
@@ -101,6 +104,81 @@ class ArchiveView(APIView):
         return Response(archive_data_object.value)
 
 
+def _conditional_response(request, *, etag, data):
+    """Responds with data, or with not modified if the client has it."""
+    etag = quote_etag(etag)
+    response = Response(data)
+    response["ETag"] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+class ArchiveSubtreeView(APIView):
+    """
+    Serves the archive data of a single archive or patient.
+
+    The patients of an archive only contain their name, id and etag, so the
+    legacy workstation can fetch the subtree of each patient when it is
+    needed. Both responses have an ETag so unchanged subtrees are not sent
+    again.
+    """
+
+    permission_classes = (RetinaAPIPermission,)
+    authentication_classes = (authentication.SessionAuthentication,)
+    pagination_class = None
+
+    def get(self, request, archive_pk, patient_pk=None):
+        if patient_pk is None:
+            return self._get_archive(request, archive_pk=archive_pk)
+
+        subtree = get_object_or_404(
+            ArchiveSubtree, archive__pk=archive_pk, patient__pk=patient_pk
+        )
+
+        return _conditional_response(
+            request, etag=subtree.etag, data=subtree.value
+        )
+
+    def _get_archive(self, request, *, archive_pk):
+        archive = get_object_or_404(
+            Archive, pk=archive_pk, title__in=settings.RETINA_ARCHIVE_NAMES
+        )
+        subtrees = ArchiveSubtree.objects.filter(archive=archive).order_by(
+            "pk"
+        )
+
+        images = {}
+        subfolders = {}
+        etags = [archive.name]
+
+        for subtree in subtrees.select_related("patient").defer("value"):
+            etags.append(subtree.etag)
+
+            if subtree.patient is None:
+                # The images of an archive without patients are included
+                images = subtrees.get(pk=subtree.pk).value
+            else:
+                subfolders[subtree.patient.name] = {
+                    "subfolders": {},
+                    "info": "level 4",
+                    "name": subtree.patient.name,
+                    "id": subtree.patient.id,
+                    "images": {},
+                    "etag": subtree.etag,
+                }
+
+        return _conditional_response(
+            request,
+            etag=sha256(json.dumps(etags).encode("utf-8")).hexdigest(),
+            data={
+                "subfolders": subfolders,
+                "info": "level 3",
+                "name": archive.name,
+                "id": archive.id,
+                "images": images,
+            },
+        )
+
+
 class ImageView(RetinaAPIPermissionMixin, View):
     authentication_classes = (authentication.SessionAuthentication,)
 
@@ -871,15 +949,20 @@ class B64ThumbnailAPIView(RetrieveAPIView):
     authentication_classes = (authentication.TokenAuthentication,)
     renderer_classes = (Base64Renderer,)
     queryset = Image.objects.all()
-    serializer_class = BytesImageSerializer
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         width = kwargs.get("width", settings.RETINA_DEFAULT_THUMBNAIL_SIZE)
         height = kwargs.get("height", settings.RETINA_DEFAULT_THUMBNAIL_SIZE)
-        serializer_context = {"width": width, "height": height}
-        serializer = BytesImageSerializer(instance, context=serializer_context)
-        return Response(serializer.data)
+
+        try:
+            thumbnail = get_thumbnail(
+                image=instance, width=width, height=height
+            )
+        except THUMBNAIL_ERRORS:
+            raise Http404
+
+        return Response(thumbnail)
 
 
 class ImageTextAnnotationViewSet(viewsets.ModelViewSet):
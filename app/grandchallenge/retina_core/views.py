@@ -41,15 +41,8 @@ class ThumbnailView(RetinaAPIPermissionMixin, View):
         if not request.user.has_perm("view_image", image_object):
             return HttpResponse(status=status.HTTP_403_FORBIDDEN)
 
-        image_itk = image_object.get_sitk_image()
-        if image_itk is None:
-            return HttpResponse(status=status.HTTP_404_NOT_FOUND)
-        depth = image_itk.GetDepth()
-        image_nparray = SimpleITK.GetArrayFromImage(image_itk)
-        if depth > 0:
-            # Get middle slice of image if 3D
-            image_nparray = image_nparray[depth // 2]
-        image = PILImage.fromarray(image_nparray)
+        # Get middle slice of image if 3D
+        image = PILImage.fromarray(image_object.get_slice_array())
         image.thumbnail(
             (
                 settings.RETINA_DEFAULT_THUMBNAIL_SIZE,
@@ -1,8 +1,11 @@
+import json
+import mimetypes
 import posixpath
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.utils._os import safe_join
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.exceptions import AuthenticationFailed
@@ -30,6 +33,45 @@ def protected_storage_redirect(*, name):
     return response
 
 
+def _get_pack_index(*, name):
+    if not internal_protected_s3_storage.exists(name=name):
+        return None
+
+    with internal_protected_s3_storage.open(name, "rb") as f:
+        return json.loads(f.read().decode("utf-8"))
+
+
+def packed_storage_response(*, name):
+    # Files from a folder that was uploaded as a pack are read from a byte
+    # range of the pack, see cases.models.FolderUpload
+    folder = posixpath.dirname(posixpath.dirname(name))
+    index_name = f"{folder}.json"
+
+    index = cache.get_or_set(
+        f"serving:pack-index:{index_name}",
+        lambda: _get_pack_index(name=index_name),
+        timeout=settings.SERVING_PACK_INDEX_CACHE_TIMEOUT,
+    )
+
+    try:
+        offset, length = index[posixpath.relpath(name, folder)]
+    except (KeyError, TypeError):
+        raise Http404("File not found.")
+
+    content = (
+        internal_protected_s3_storage.read_range(
+            name=f"{folder}.zip", offset=offset, length=length
+        )
+        if length
+        else b""
+    )
+    content_type, _ = mimetypes.guess_type(name)
+
+    return HttpResponse(
+        content, content_type=content_type or "application/octet-stream"
+    )
+
+
 def serve_images(request, *, pk, path, pa="", pb=""):
     document_root = safe_join(
         f"/{settings.IMAGE_FILES_SUBDIRECTORY}", pa, pb, str(pk)
@@ -51,7 +93,10 @@ def serve_images(request, *, pk, path, pa="", pb=""):
         create_download.apply_async(
             kwargs={"creator_id": user.pk, "image_id": image.pk}
         )
-        return protected_storage_redirect(name=name)
+        try:
+            return protected_storage_redirect(name=name)
+        except Http404:
+            return packed_storage_response(name=name)
 
     raise PermissionDenied
 
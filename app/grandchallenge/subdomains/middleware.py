@@ -4,6 +4,7 @@ import re
 from django.conf import settings
 from django.http import HttpResponseRedirect
 
+from grandchallenge.challenges.cache import get_challenge
 from grandchallenge.challenges.models import Challenge
 
 logger = logging.getLogger(__name__)
@@ -44,11 +45,7 @@ def challenge_subdomain_middleware(get_response):
             request.challenge = None
         else:
             try:
-                request.challenge = (
-                    Challenge.objects.select_related("forum")
-                    .prefetch_related("phase_set")
-                    .get(short_name__iexact=subdomain)
-                )
+                request.challenge = get_challenge(short_name=subdomain)
             except Challenge.DoesNotExist:
                 logger.warning(f"Could not find challenge {subdomain}")
                 domain = request.site.domain.lower()
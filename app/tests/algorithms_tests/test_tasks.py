@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pytest
+from guardian.shortcuts import get_perms
 
 from grandchallenge.algorithms.models import DEFAULT_INPUT_INTERFACE_SLUG, Job
 from grandchallenge.algorithms.tasks import (
@@ -98,6 +99,40 @@ class TestCreateAlgorithmJobs:
         for g in groups:
             assert jobs[0].viewer_groups.filter(pk=g.pk).exists()
 
+    def test_assigns_permissions(self):
+        ai = AlgorithmImageFactory()
+        creator = UserFactory()
+        group = GroupFactory()
+        images = [ImageFactory(), ImageFactory()]
+
+        jobs = create_algorithm_jobs(
+            algorithm_image=ai,
+            images=images,
+            creator=creator,
+            extra_viewer_groups=[group],
+        )
+
+        for job, image in zip(jobs, images):
+            assert creator.has_perm("view_job", job)
+            assert creator.has_perm("change_job", job)
+            assert creator.has_perm("view_image", image)
+            assert "view_job" in get_perms(group, job)
+            assert "view_image" in get_perms(group, image)
+
+    def test_number_of_queries_is_constant(
+        self, django_assert_max_num_queries
+    ):
+        ai = AlgorithmImageFactory()
+        images = [ImageFactory() for _ in range(20)]
+        groups = [GroupFactory()]
+
+        with django_assert_max_num_queries(20):
+            jobs = create_algorithm_jobs(
+                algorithm_image=ai, images=images, extra_viewer_groups=groups
+            )
+
+        assert len(jobs) == 20
+
     def test_create_jobs_is_limited(self):
         user, editor = UserFactory(), UserFactory()
 
@@ -166,6 +201,30 @@ class TestCreateJobsWorkflow:
         workflow = execute_jobs(algorithm_image=ai, images=images)
         assert workflow is not None
 
+    def test_batched_jobs_workflow(self, mocker):
+        group = mocker.patch("grandchallenge.algorithms.tasks.group")
+        ai = AlgorithmImageFactory(algorithm__execution_batch_size=2)
+        images = [ImageFactory(), ImageFactory(), ImageFactory()]
+
+        execute_jobs(algorithm_image=ai, images=images)
+
+        signatures = list(group.call_args[0][0])
+        assert [len(s.kwargs["job_pks"]) for s in signatures] == [2, 1]
+        assert {pk for s in signatures for pk in s.kwargs["job_pks"]} == set(
+            Job.objects.values_list("pk", flat=True)
+        )
+
+    def test_batched_jobs_workflow_batch_size_limit(self, mocker, settings):
+        settings.COMPONENTS_MAXIMUM_JOB_BATCH_SIZE = 2
+        group = mocker.patch("grandchallenge.algorithms.tasks.group")
+        ai = AlgorithmImageFactory(algorithm__execution_batch_size=3)
+        images = [ImageFactory(), ImageFactory(), ImageFactory()]
+
+        execute_jobs(algorithm_image=ai, images=images)
+
+        signatures = list(group.call_args[0][0])
+        assert [len(s.kwargs["job_pks"]) for s in signatures] == [2, 1]
+
 
 @pytest.mark.django_db
 def test_algorithm(client, algorithm_image, settings):
@@ -1,4 +1,5 @@
 from pathlib import Path
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 
@@ -392,6 +393,50 @@ def test_filter_images_api_view(client):
     assert response.json()["results"][0]["pk"] == str(im.pk)
 
 
+@pytest.mark.django_db
+def test_image_list_cursor_pagination(client, django_assert_max_num_queries):
+    alg = AlgorithmFactory()
+    user = UserFactory()
+    alg.add_editor(user=user)
+
+    jobs = AlgorithmJobFactory.create_batch(
+        5, algorithm_image__algorithm=alg, creator=user
+    )
+    expected = {
+        str(civ.image.pk): [job.api_url]
+        for job in jobs
+        for civ in job.inputs.all()
+    }
+
+    data = {"cursor": "", "limit": 2, "fields": "pk,job_set"}
+    results = []
+
+    while True:
+        with django_assert_max_num_queries(10):
+            response = get_view_for_user(
+                viewname="api:image-list",
+                client=client,
+                user=user,
+                data=data,
+                content_type="application/json",
+            )
+        assert response.status_code == 200
+
+        page = response.json()
+        assert "count" not in page
+        results.extend(page["results"])
+
+        if page["next"] is None:
+            break
+
+        data = {
+            k: v[0] for k, v in parse_qs(urlparse(page["next"]).query).items()
+        }
+
+    assert all(set(r) == {"pk", "job_set"} for r in results)
+    assert {r["pk"]: r["job_set"] for r in results} == expected
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "obj,factory",
@@ -5,8 +5,10 @@ from typing import Dict, List, Tuple
 
 import SimpleITK
 import pytest
+from billiard import Process, Queue
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
+from django.db import connections
 
 from grandchallenge.cases.image_builders.metaio_utils import (
     ADDITIONAL_HEADERS,
@@ -19,7 +21,11 @@ from grandchallenge.cases.models import (
     RawImageFile,
     RawImageUploadSession,
 )
-from grandchallenge.cases.tasks import check_compressed_and_extract
+from grandchallenge.cases.tasks import (
+    check_compressed_and_extract,
+    import_images,
+    populate_provisioning_directory,
+)
 from grandchallenge.jqfileupload.widgets.uploader import StagedAjaxFile
 from tests.cases_tests import RESOURCE_PATH
 from tests.factories import UserFactory
@@ -397,6 +403,41 @@ def test_check_compressed_and_extract_same_name(tmpdir, file_name):
     assert actual == expected
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("chunk_size", (None, 1000))
+def test_populate_provisioning_directory_streams_archives(tmpdir, chunk_size):
+    raw_files = []
+    for file_name in ("test.zip", "test.tar", "test_rgb.png"):
+        staged_file = create_file_from_filepath(
+            RESOURCE_PATH / file_name, chunk_size=chunk_size
+        )
+        raw_files.append(
+            RawImageFile(
+                filename=staged_file.name, staged_file_id=staged_file.uuid
+            )
+        )
+
+    tmpdir_path = Path(tmpdir)
+    populate_provisioning_directory(raw_files, tmpdir_path)
+
+    actual = sorted(
+        os.path.relpath(os.path.join(root, file), tmpdir_path)
+        for root, _, files in os.walk(tmpdir_path)
+        for file in files
+    )
+    # Both archives contain the same files, the archives themselves are
+    # not written to the directory
+    assert actual == [
+        "folder-0/file-0.txt",
+        "folder-0/folder-1/file-1.txt",
+        "folder-0/folder-1/folder-2/file-2.txt",
+        "folder-0/folder-1/folder-2/folder-3/file-3.txt",
+        "test_rgb.png",
+    ]
+    with open(tmpdir_path / "test_rgb.png", "rb") as f:
+        assert f.read() == (RESOURCE_PATH / "test_rgb.png").read_bytes()
+
+
 @pytest.mark.django_db
 def test_build_zip_file(settings):
     settings.task_eager_propagates = (True,)
@@ -478,3 +519,58 @@ def test_failed_dicom_files_are_retained(settings):
     assert Image.objects.count() == 1
     assert all(RawImageFile.objects.values_list("staged_file_id", flat=True))
     RawImageFile.objects.all().delete()
+
+
+@pytest.mark.django_db
+def test_import_images_in_parallel():
+    files = {
+        RESOURCE_PATH / f
+        for f in [
+            "image10x10x10.mha",
+            "image10x10x10.mhd",
+            "image10x10x10.zraw",
+            "image10x11x12.nii",
+            "test_rgb.png",
+            "corrupt.png",
+        ]
+    }
+
+    sequential = import_images(files=files, max_workers=1)
+    parallel = import_images(files=files, max_workers=2)
+
+    assert parallel.consumed_files == sequential.consumed_files
+    assert parallel.file_errors == sequential.file_errors
+    assert sorted(i.name for i in parallel.new_images) == sorted(
+        i.name for i in sequential.new_images
+    )
+    assert Image.objects.count() == 8
+    for image in parallel.new_images:
+        assert image.files.count() == 1
+        assert image.get_sitk_image() is not None
+
+
+def _import_images(files, queue):
+    result = import_images(files=files, max_workers=2)
+    queue.put(sorted(str(f) for f in result.consumed_files))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_images_in_parallel_from_daemonic_process():
+    files = {
+        RESOURCE_PATH / f
+        for f in ["image10x10x10.mha", "image10x11x12.nii", "test_rgb.png"]
+    }
+
+    # The child opens its own database connection
+    connections.close_all()
+
+    # Celery runs the tasks in the daemonic processes of its prefork pool
+    queue = Queue()
+    process = Process(target=_import_images, args=(files, queue), daemon=True)
+    process.start()
+    consumed_files = queue.get(timeout=60)
+    process.join()
+
+    assert process.exitcode == 0
+    assert consumed_files == sorted(str(f) for f in files)
+    assert Image.objects.count() == 3
@@ -1,7 +1,9 @@
 import os
+from io import BytesIO
 from pathlib import Path
 from unittest import mock
 
+import SimpleITK
 import numpy as np
 import pydicom
 import pytest
@@ -10,9 +12,13 @@ from pydicom.pixel_data_handlers.gdcm_handler import (
 )
 
 from grandchallenge.cases.image_builders.dicom import (
+    DicomSeries,
+    _create_itk_from_dcm,
+    _extract_direction,
     _get_headers_by_study,
     _validate_dicom_files,
     format_error,
+    group_files_by_study,
     image_builder_dicom,
 )
 from grandchallenge.cases.image_builders.metaio_utils import parse_mh_header
@@ -30,7 +36,7 @@ def test_get_headers_by_study():
     studies, _ = _get_headers_by_study(files)
     assert len(studies) == 1
     for key in studies:
-        assert [str(x["file"]) for x in studies[key]["headers"]] == [
+        assert [str(x.file) for x in studies[key].headers] == [
             f"{DICOM_DIR}/{x}.dcm" for x in range(1, 77)
         ]
 
@@ -42,6 +48,69 @@ def test_get_headers_by_study():
     assert len(studies) == 0
 
 
+def test_group_files_by_study():
+    files = {Path(d[0]).joinpath(f) for d in os.walk(DICOM_DIR) for f in d[2]}
+    not_dicom = RESOURCE_PATH / "image10x10x10.mha"
+
+    groups = group_files_by_study(files | {not_dicom})
+
+    assert groups == [files, {not_dicom}]
+
+
+@pytest.mark.benchmark
+def test_get_headers_by_study_large_series(tmpdir):
+    n_slices = 10_000
+    template = pydicom.dcmread(str(DICOM_DIR / "1.dcm"))
+    # A placeholder of fixed width, so that the file contents can be patched
+    template.InstanceNumber = "99999"
+    studies = []
+
+    for study in range(2):
+        template.StudyInstanceUID = f"1.2.3.{study}"
+        with BytesIO() as f:
+            template.save_as(f)
+            studies.append(f.getvalue())
+
+    files = set()
+    for i in range(n_slices):
+        # Two studies with interleaved files, in reverse instance order
+        file = Path(tmpdir) / f"{i}.dcm"
+        file.write_bytes(
+            studies[i % 2].replace(b"99999", f"{n_slices - i:05d}".encode())
+        )
+        files.add(file)
+
+    with mock.patch(
+        "grandchallenge.cases.image_builders.dicom.pydicom.filereader.read_partial",
+        wraps=pydicom.filereader.read_partial,
+    ) as read_partial:
+        studies, errors = _get_headers_by_study(files)
+
+    # Each file is read once, and the pixel data is skipped
+    assert read_partial.call_count == n_slices
+    assert errors == {}
+    assert len(studies) == 2
+    for series in studies.values():
+        assert series.index == 0
+        assert len(series.headers) == n_slices // 2
+        instance_numbers = [int(h.data.InstanceNumber) for h in series.headers]
+        assert instance_numbers == sorted(instance_numbers)
+        assert all("PixelData" not in h.data for h in series.headers)
+
+
+def test_extract_direction():
+    ds = pydicom.dcmread(str(DICOM_DIR / "1.dcm"), stop_before_pixels=True)
+    # Rotated by 90 degrees around the z axis
+    ds.ImageOrientationPatient = [0, 1, 0, -1, 0, 0]
+    dicom_ds = mock.Mock(headers=[mock.Mock(data=ds)])
+
+    direction = _extract_direction(dicom_ds, np.eye(4))
+
+    assert np.array_equal(
+        direction, [[0, -1, 0, 0], [1, 0, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]],
+    )
+
+
 def test_validate_dicom_files():
     files = [Path(d[0]).joinpath(f) for d in os.walk(DICOM_DIR) for f in d[2]]
     studies, _ = _validate_dicom_files(files)
@@ -52,15 +121,12 @@ def test_validate_dicom_files():
         assert study.n_slices == 4
     with mock.patch(
         "grandchallenge.cases.image_builders.dicom._get_headers_by_study",
-        return_value=(
-            {"foo": {"headers": headers[1:], "file": "bar", "index": 1}},
-            {},
-        ),
+        return_value=({"foo": DicomSeries(headers=headers[1:], index=1)}, {},),
     ):
         studies, errors = _validate_dicom_files(files)
         assert len(studies) == 0
         for header in headers[1:]:
-            assert errors[header["file"]] == format_error(
+            assert errors[header.file] == format_error(
                 "Number of slices per time point differs"
             )
 
@@ -157,3 +223,164 @@ def test_dicom_window_level():
     image_obj = result.new_images.pop()
     assert image_obj.window_center == 30.0
     assert image_obj.window_width == 200.0
+
+
+def _write_dicom_series(
+    path, *, n_time=1, n_slices, z_spacing=0.5, rescale=None
+):
+    """
+    Writes a series of 2x3 slices in instance order, the pixel values of
+    the slice at time point t and position z are 100 * t + 10 * z + (0..5).
+
+    rescale optionally maps the instance index to a (slope, intercept).
+    """
+    ds = pydicom.dcmread(str(DICOM_DIR / "1.dcm"))
+    if n_time == 1:
+        del ds.TemporalPositionIndex
+    files = set()
+
+    for index in range(n_time * n_slices):
+        t, z = divmod(index, n_slices)
+        ds.InstanceNumber = index + 1
+        ds.ImagePositionPatient = [0, 0, z * z_spacing]
+        ds.ContentTime = str(214501 + t)
+        ds.Exposure = 100 * (t + 1)
+        if n_time > 1:
+            ds.TemporalPositionIndex = n_time
+        ds.RescaleSlope, ds.RescaleIntercept = (rescale or {}).get(
+            index, (1, 0)
+        )
+        ds.PixelData = (
+            (100 * t + 10 * z + np.arange(6, dtype=np.int16))
+            .astype(np.int16)
+            .tobytes()
+        )
+        file = Path(path) / f"{index + 1}.dcm"
+        ds.save_as(str(file))
+        files.add(file)
+
+    return files
+
+
+def _create_itk_from_files(files, *, z_i):
+    studies, errors = _validate_dicom_files(files)
+    assert errors == {}
+    (dicom_ds,) = studies
+    dimensions = 4 if dicom_ds.n_time and dicom_ds.n_time > 1 else 3
+    pixel_dims = (dicom_ds.n_slices, 2, 3)
+    if dimensions == 4:
+        pixel_dims = (dicom_ds.n_time,) + pixel_dims
+    content_times = []
+    exposures = []
+
+    img = _create_itk_from_dcm(
+        content_times=content_times,
+        dicom_ds=dicom_ds,
+        dimensions=dimensions,
+        exposures=exposures,
+        pixel_dims=pixel_dims,
+        z_i=z_i,
+    )
+
+    return img, content_times, exposures
+
+
+def _expected_slice(t, z):
+    return (100 * t + 10 * z + np.arange(6)).reshape((2, 3))
+
+
+@pytest.mark.parametrize("z_spacing", [0.5, -0.5])
+def test_create_itk_from_dcm_3d_slice_order(tmpdir, z_spacing):
+    files = _write_dicom_series(tmpdir, n_slices=5, z_spacing=z_spacing)
+
+    img, _, _ = _create_itk_from_files(files, z_i=z_spacing)
+
+    array = SimpleITK.GetArrayFromImage(img)
+    assert img.GetPixelID() == SimpleITK.sitkInt16
+    assert array.shape == (5, 2, 3)
+    for z in range(5):
+        # Slices are stored with ascending positions along the z axis
+        position = z if z_spacing > 0 else 4 - z
+        assert np.array_equal(array[position], _expected_slice(0, z))
+
+
+@pytest.mark.parametrize("z_spacing", [0.5, -0.5])
+def test_create_itk_from_dcm_4d_slice_order(tmpdir, z_spacing):
+    files = _write_dicom_series(
+        tmpdir, n_time=3, n_slices=4, z_spacing=z_spacing
+    )
+
+    img, content_times, exposures = _create_itk_from_files(
+        files, z_i=z_spacing
+    )
+
+    array = SimpleITK.GetArrayFromImage(img)
+    assert img.GetPixelID() == SimpleITK.sitkInt16
+    assert array.shape == (3, 4, 2, 3)
+    for t in range(3):
+        for z in range(4):
+            position = z if z_spacing > 0 else 3 - z
+            assert np.array_equal(array[t, position], _expected_slice(t, z))
+    assert content_times == ["214501", "214502", "214503"]
+    assert exposures == ["100", "200", "300"]
+
+
+@pytest.mark.parametrize(
+    "rescale,pixel_id",
+    [
+        ({}, SimpleITK.sitkInt16),
+        ({1: (1.5, 0)}, SimpleITK.sitkFloat32),
+        ({1: (1, -1024)}, SimpleITK.sitkFloat32),
+        ({i: (2, 0.25) for i in range(4)}, SimpleITK.sitkFloat32),
+    ],
+)
+def test_create_itk_from_dcm_rescaling(tmpdir, rescale, pixel_id):
+    files = _write_dicom_series(tmpdir, n_slices=4, rescale=rescale)
+
+    img, _, _ = _create_itk_from_files(files, z_i=0.5)
+
+    array = SimpleITK.GetArrayFromImage(img)
+    assert img.GetPixelID() == pixel_id
+    for z in range(4):
+        slope, intercept = rescale.get(z, (1, 0))
+        assert np.allclose(array[z], slope * _expected_slice(0, z) + intercept)
+
+
+@pytest.mark.parametrize("rescale", [False, True])
+def test_create_itk_from_dcm_single_file_volume(tmpdir, rescale):
+    ds = pydicom.dcmread(str(DICOM_DIR / "1.dcm"))
+    del ds.TemporalPositionIndex
+    ds.NumberOfFrames = 5
+    ds.RescaleSlope, ds.RescaleIntercept = (2, -1) if rescale else (1, 0)
+    volume = np.stack([_expected_slice(0, z) for z in range(5)])
+    ds.PixelData = volume.astype(np.int16).tobytes()
+    file = Path(tmpdir) / "volume.dcm"
+    ds.save_as(str(file))
+
+    img, _, _ = _create_itk_from_files({file}, z_i=1.0)
+
+    array = SimpleITK.GetArrayFromImage(img)
+    if rescale:
+        assert img.GetPixelID() == SimpleITK.sitkFloat32
+        assert np.allclose(array, 2 * volume - 1)
+    else:
+        assert img.GetPixelID() == SimpleITK.sitkInt16
+        assert np.array_equal(array, volume)
+
+
+@pytest.mark.parametrize("z_spacing", [0.5, -0.5])
+def test_create_itk_from_dcm_single_decode_worker(settings, tmpdir, z_spacing):
+    files = _write_dicom_series(
+        tmpdir, n_time=3, n_slices=4, z_spacing=z_spacing
+    )
+
+    settings.DICOM_DECODE_MAX_WORKERS = 1
+    serial = _create_itk_from_files(files, z_i=z_spacing)
+    settings.DICOM_DECODE_MAX_WORKERS = 4
+    threaded = _create_itk_from_files(files, z_i=z_spacing)
+
+    assert np.array_equal(
+        SimpleITK.GetArrayFromImage(serial[0]),
+        SimpleITK.GetArrayFromImage(threaded[0]),
+    )
+    assert serial[1:] == threaded[1:]
@@ -1,15 +1,22 @@
+import json
+import os
 import uuid
 from pathlib import Path
 
+import SimpleITK
 import factory
+import numpy as np
 import pytest
 from django.conf import settings
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.core.files import File
 
+from grandchallenge.cases.image_files import ImageFileCache
+from grandchallenge.cases.models import FolderUpload
 from grandchallenge.core.management.commands.init_gc_demo import (
     get_temporary_image,
 )
+from grandchallenge.core.storage import protected_s3_storage
 from tests.cases_tests.factories import (
     ImageFactory,
     ImageFactoryWithImageFile,
@@ -132,6 +139,60 @@ class TestGetSitkImage:
         )
 
 
+@pytest.mark.django_db
+class TestGetSliceArray:
+    @pytest.mark.parametrize("is_vector", (True, False))
+    def test_uncompressed_slice_is_read_with_range(
+        self, tmpdir, mocker, is_vector
+    ):
+        array = np.arange(4 * 5 * 6 * 3, dtype=np.uint16).reshape(4, 5, 6, 3)
+        if not is_vector:
+            array = array[..., 0]
+        mha = Path(tmpdir) / "image.mha"
+        SimpleITK.WriteImage(
+            SimpleITK.GetImageFromArray(array, isVector=is_vector),
+            str(mha),
+            False,
+        )
+
+        image = ImageFactory()
+        ImageFileFactory(
+            image=image, file=factory.django.FileField(from_path=mha)
+        )
+
+        get_sitk_image = mocker.patch.object(image, "get_sitk_image")
+
+        assert np.array_equal(image.get_slice_array(), array[2])
+        assert np.array_equal(image.get_slice_array(index=0), array[0])
+        get_sitk_image.assert_not_called()
+
+        with pytest.raises(IndexError):
+            image.get_slice_array(index=4)
+
+    def test_compressed_image_is_loaded_in_full(self):
+        image = ImageFactoryWithImageFile3D()
+        expected = SimpleITK.GetArrayFromImage(image.get_sitk_image())
+        assert np.array_equal(
+            image.get_slice_array(), expected[expected.shape[0] // 2]
+        )
+
+
+@pytest.mark.django_db
+def test_get_sitk_image_uses_file_cache(settings, tmpdir, mocker):
+    settings.IMAGE_FILE_CACHE_DIR = str(tmpdir)
+    settings.IMAGE_FILE_CACHE_MAX_SIZE = 1_000_000_000
+
+    image = ImageFactoryWithImageFile()
+    download = mocker.spy(protected_s3_storage, "download_fileobj")
+
+    first = image.get_sitk_image()
+    second = image.get_sitk_image()
+
+    assert first.GetSize() == second.GetSize()
+    assert download.call_count == 2  # The mhd and raw file, once
+    assert len(list(Path(tmpdir).iterdir())) == 2
+
+
 @pytest.mark.django_db
 class TestImageSpacing:
     @pytest.mark.parametrize(
@@ -231,3 +292,69 @@ def test_image_file_cleanup():
     i.delete()
 
     assert not storage.exists(name=filepath)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("pack", (True, False))
+def test_folder_upload(tmpdir, pack):
+    image = ImageFactory()
+    folder = Path(tmpdir) / f"{image.pk}_files"
+    tiles = {
+        f"{level}/{col}_0.jpeg": f"tile {level} {col}".encode("utf-8")
+        * (col + 1)
+        for level in range(3)
+        for col in range(4)
+    }
+    for name, content in tiles.items():
+        (folder / name).parent.mkdir(parents=True, exist_ok=True)
+        (folder / name).write_bytes(content)
+
+    progress = []
+    upload = FolderUpload(image=image, folder=str(folder), pack=pack)
+    upload.save(progress_callback=lambda *args: progress.append(args))
+
+    assert progress[-1] == (len(tiles), len(tiles))
+
+    if pack:
+        with protected_s3_storage.open(upload.pack_index_filename) as f:
+            index = json.loads(f.read().decode("utf-8"))
+
+        assert set(index) == set(tiles)
+
+        for name, (offset, length) in index.items():
+            with protected_s3_storage.open(upload.pack_filename) as f:
+                f.seek(offset)
+                assert f.read(length) == tiles[name]
+    else:
+        for name, content in tiles.items():
+            with protected_s3_storage.open(
+                upload.destination_filename(folder / name)
+            ) as f:
+                assert f.read() == content
+
+
+@pytest.mark.django_db
+def test_image_file_cache_entry_evicted_while_linked(tmpdir, mocker):
+    cache = ImageFileCache(
+        directory=Path(tmpdir) / "cache", max_size=1_000_000_000
+    )
+    cache.directory.mkdir()
+    image_file = ImageFactoryWithImageFile().files.first()
+
+    # Another process evicts the new entry as soon as it is visible
+    replace = os.replace
+
+    def replace_and_evict(src, dst):
+        replace(src, dst)
+        os.unlink(dst)
+
+    mocker.patch(
+        "grandchallenge.cases.image_files.os.replace",
+        side_effect=replace_and_evict,
+    )
+
+    to = Path(tmpdir) / "linked"
+    cache.link(image_file, to=to)
+
+    with image_file.file.open("rb") as f:
+        assert to.read_bytes() == f.read()
@@ -1,13 +1,17 @@
 import pytest
 from django.conf import settings
 from django.contrib.auth.models import Group
-from guardian.shortcuts import get_perms
+from guardian.shortcuts import assign_perm, get_perms
 
+from grandchallenge.cases.models import update_viewer_groups_permissions
 from tests.algorithms_tests.factories import AlgorithmJobFactory
 from tests.archives_tests.factories import ArchiveFactory
 from tests.components_tests.factories import ComponentInterfaceValueFactory
-from tests.factories import ImageFactory
-from tests.reader_studies_tests.factories import ReaderStudyFactory
+from tests.factories import GroupFactory, ImageFactory
+from tests.reader_studies_tests.factories import (
+    AnswerFactory,
+    ReaderStudyFactory,
+)
 
 
 @pytest.mark.django_db
@@ -167,3 +171,43 @@ def test_view_permission_when_reused(in_archive, in_rs, in_job):
 
     for g in job.viewer_groups.all():
         assert ("view_image" in get_perms(g, im)) is in_job
+
+
+@pytest.mark.django_db
+def test_update_viewer_groups_permissions_in_bulk(
+    django_assert_max_num_queries,
+):
+    images = ImageFactory.create_batch(5)
+    archive = ArchiveFactory()
+    archive.images.add(*images[:3])
+    answer = AnswerFactory(answer_image=images[3])
+    job = AlgorithmJobFactory()
+    civ = ComponentInterfaceValueFactory(image=images[4])
+    job.outputs.add(civ)
+
+    stale_group = GroupFactory()
+    for im in images:
+        assign_perm("view_image", stale_group, im)
+
+    with django_assert_max_num_queries(8):
+        update_viewer_groups_permissions(image_pks=[im.pk for im in images])
+
+    for im in images:
+        assert "view_image" not in get_perms(stale_group, im)
+        assert ("view_image" in get_perms(archive.users_group, im)) is (
+            im in images[:3]
+        )
+        assert (
+            "view_image"
+            in get_perms(answer.question.reader_study.editors_group, im)
+        ) is (im == images[3])
+        for g in job.viewer_groups.all():
+            assert ("view_image" in get_perms(g, im)) is (im == images[4])
+
+    update_viewer_groups_permissions(
+        image_pks=[im.pk for im in images], exclude_jobs=[job]
+    )
+
+    for g in job.viewer_groups.all():
+        assert "view_image" not in get_perms(g, images[4])
+    assert "view_image" in get_perms(archive.users_group, images[0])
@@ -0,0 +1,101 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image as PILImage
+
+from grandchallenge.cases.tasks import generate_thumbnails
+from grandchallenge.cases.thumbnails import (
+    _read_thumbnail,
+    create_thumbnail,
+    get_thumbnail,
+    get_thumbnail_name,
+)
+from grandchallenge.core.storage import private_s3_storage
+from tests.cases_tests.factories import (
+    ImageFactoryWithImageFile2DLarge,
+    ImageFactoryWithImageFile3DLarge3Slices,
+    ImageFactoryWithoutImageFile,
+)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "factory",
+    [
+        ImageFactoryWithImageFile2DLarge,
+        ImageFactoryWithImageFile3DLarge3Slices,
+    ],
+)
+def test_get_thumbnail(factory, mocker, settings):
+    settings.IMAGE_THUMBNAIL_STORED_SIZES = {(64, 32)}
+    image = factory()
+    name = get_thumbnail_name(image_pk=image.pk, width=64, height=32)
+
+    thumbnail = get_thumbnail(image=image, width=64, height=32)
+
+    assert thumbnail == create_thumbnail(image=image, width=64, height=32)
+    assert private_s3_storage.read(name=name) == thumbnail
+
+    width, height = PILImage.open(BytesIO(thumbnail)).size
+    assert width <= 64 and height <= 32
+
+    # Stored thumbnails are served without reading the image
+    _read_thumbnail.cache_clear()
+    mocker.patch.object(
+        image, "get_slice_array", side_effect=AssertionError("Not cached")
+    )
+
+    assert get_thumbnail(image=image, width=64, height=32) == thumbnail
+    assert get_thumbnail(image=image, width=64, height=32) == thumbnail
+    assert _read_thumbnail.cache_info().hits == 1
+
+
+@pytest.mark.django_db
+def test_get_thumbnail_other_size_is_not_stored(settings):
+    settings.IMAGE_THUMBNAIL_STORED_SIZES = {(64, 32)}
+    image = ImageFactoryWithImageFile2DLarge()
+
+    thumbnail = get_thumbnail(image=image, width=65, height=32)
+
+    assert thumbnail == create_thumbnail(image=image, width=65, height=32)
+    assert not private_s3_storage.exists(
+        get_thumbnail_name(image_pk=image.pk, width=65, height=32)
+    )
+
+
+@pytest.mark.django_db
+def test_generate_thumbnails(settings):
+    size = settings.RETINA_DEFAULT_THUMBNAIL_SIZE
+    image, image_without_files = (
+        ImageFactoryWithImageFile2DLarge(),
+        ImageFactoryWithoutImageFile(),
+    )
+
+    generate_thumbnails(image_pks=[image.pk, image_without_files.pk])
+
+    assert private_s3_storage.exists(
+        get_thumbnail_name(image_pk=image.pk, width=size, height=size)
+    )
+    assert not private_s3_storage.exists(
+        get_thumbnail_name(
+            image_pk=image_without_files.pk, width=size, height=size
+        )
+    )
+
+    image.delete()
+
+    assert not private_s3_storage.exists(
+        get_thumbnail_name(image_pk=image.pk, width=size, height=size)
+    )
+
+
+@pytest.mark.django_db
+def test_generate_thumbnails_raises_unexpected_errors(mocker):
+    image = ImageFactoryWithImageFile2DLarge()
+    mocker.patch(
+        "grandchallenge.cases.tasks.get_thumbnail",
+        side_effect=RuntimeError("Storage is down"),
+    )
+
+    with pytest.raises(RuntimeError):
+        generate_thumbnails(image_pks=[image.pk])
@@ -271,7 +271,10 @@ def test_tiff_image_entry_creation(
 
 # Integration test of all features being accessed through the image builder
 @pytest.mark.django_db
-def test_image_builder_tiff(tmpdir_factory,):
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_image_builder_tiff(tmpdir_factory, settings, max_workers):
+    settings.TIFF_BUILDER_MAX_WORKERS = max_workers
+
     # Copy resource files to writable temp folder
     temp_dir = Path(tmpdir_factory.mktemp("temp") / "resources")
     shutil.copytree(
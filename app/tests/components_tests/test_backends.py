@@ -1,11 +1,24 @@
+import io
 import os
+import tarfile
+import time
+from pathlib import Path
+from uuid import uuid4
 
 import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from docker.errors import ImageNotFound
 
 from grandchallenge.components.backends.docker import (
+    BatchExecutor,
+    ComponentException,
     DockerConnection,
+    Executor,
+    extract_directory,
+    tar_stream,
     user_error,
 )
+from grandchallenge.components.backends.image_cache import DockerImageCache
 
 
 class FakeJobClass:
@@ -62,3 +75,359 @@ def test_user_error(with_timestamp):
         user_error(obj=f"{timestamp}\n{timestamp}\n")
         == "No errors were reported in the logs."
     )
+
+
+class FakeImage:
+    def __init__(self, *, id, size):
+        self.id = id
+        self.attrs = {"Size": size}
+
+
+class FakeImages:
+    def __init__(self):
+        self.loaded = {}
+        self.n_loads = 0
+
+    def get(self, *, name):
+        try:
+            return self.loaded[name]
+        except KeyError:
+            raise ImageNotFound(name)
+
+    def list(self):
+        return list(self.loaded.values())
+
+    def load(self, data):
+        image_id, size = b"".join(data).decode().split(",")
+        self.loaded[image_id] = FakeImage(id=image_id, size=int(size))
+        self.n_loads += 1
+
+    def remove(self, *, image):
+        del self.loaded[image]
+
+
+class FakeDockerClient:
+    def __init__(self):
+        self.images = FakeImages()
+        self.api = type("API", (), {"timeout": 60})()
+        self._id = str(uuid4())
+
+    def info(self):
+        return {"ID": self._id}
+
+
+class FakeImageFile:
+    def __init__(self, *, image_sha256, size):
+        self.name = image_sha256
+        self._content = f"{image_sha256},{size}".encode()
+        self.storage = self
+
+    def stream(self, *, name, chunk_size):
+        yield self._content
+
+
+def test_docker_image_cache():
+    client = FakeDockerClient()
+    image_cache = DockerImageCache(client=client, max_size=25)
+
+    images = {
+        f"sha256:{n}": FakeImageFile(image_sha256=f"sha256:{n}", size=10)
+        for n in range(3)
+    }
+
+    for image_sha256 in ["sha256:0", "sha256:1", "sha256:0", "sha256:0"]:
+        image_cache.load(image_sha256=image_sha256, image=images[image_sha256])
+
+    assert client.images.n_loads == 2
+    assert image_cache.metrics == {"hits": 2, "misses": 2, "evictions": 0}
+
+    # The least recently used image is removed to stay within the budget
+    image_cache.load(image_sha256="sha256:2", image=images["sha256:2"])
+
+    assert set(client.images.loaded) == {"sha256:0", "sha256:2"}
+    assert image_cache.metrics == {"hits": 2, "misses": 3, "evictions": 1}
+    assert client.api.timeout == 60
+
+
+def test_docker_image_cache_ignores_other_images():
+    client = FakeDockerClient()
+    client.images.loaded["sha256:io"] = FakeImage(id="sha256:io", size=100)
+
+    image_cache = DockerImageCache(client=client, max_size=15)
+    image_cache.load(
+        image_sha256="sha256:0",
+        image=FakeImageFile(image_sha256="sha256:0", size=10),
+    )
+
+    assert set(client.images.loaded) == {"sha256:io", "sha256:0"}
+    assert image_cache.metrics["evictions"] == 0
+
+
+class FakeStorageFile:
+    def __init__(self, *, name, content):
+        self.name = name
+        self.size = len(content)
+        self._content = content
+        self.storage = self
+
+    def stream(self, *, name, chunk_size):
+        for start in range(0, len(self._content), chunk_size):
+            yield self._content[start : start + chunk_size]
+
+
+def test_tar_stream():
+    files = {
+        "1/a.mha": FakeStorageFile(
+            name="images/1/a.mha", content=os.urandom(1_500_000)
+        ),
+        "b.json": FakeStorageFile(name="b.json", content=b'{"foo": 1}'),
+        "empty.txt": FakeStorageFile(name="empty.txt", content=b""),
+    }
+    progress = []
+
+    content = b"".join(
+        tar_stream(
+            files=files,
+            progress_callback=lambda copied, total: progress.append(
+                (copied, total)
+            ),
+        )
+    )
+
+    with tarfile.open(fileobj=io.BytesIO(content), mode="r") as tar:
+        assert tar.getnames() == ["1/a.mha", "b.json", "empty.txt"]
+        for name, file in files.items():
+            assert tar.extractfile(name).read() == file._content
+
+    total = sum(f.size for f in files.values())
+    assert progress[-1] == (total, total)
+    assert [c for c, _ in progress] == sorted(c for c, _ in progress)
+
+
+def test_tar_stream_in_memory_file():
+    file = SimpleUploadedFile("predictions.json", b'{"foo": 1}')
+
+    content = b"".join(tar_stream(files={"submission-src-0": file}))
+
+    with tarfile.open(fileobj=io.BytesIO(content), mode="r") as tar:
+        assert tar.extractfile("submission-src-0").read() == b'{"foo": 1}'
+
+    # An in memory file cannot be reopened, so it must be left open
+    assert not file.closed
+
+
+def test_tar_stream_size_changed():
+    file = FakeStorageFile(name="a.mha", content=b"foo")
+    file.size = 4
+
+    with pytest.raises(OSError):
+        b"".join(tar_stream(files={"a.mha": file}))
+
+
+class FakeReaderContainer:
+    def __init__(self, *, files):
+        self._files = files
+
+    def get_archive(self, path):
+        f = io.BytesIO()
+
+        with tarfile.open(fileobj=f, mode="w") as tar:
+            directory = tarfile.TarInfo(name=Path(path).name)
+            directory.type = tarfile.DIRTYPE
+            tar.addfile(directory)
+
+            for name, content in self._files.items():
+                tarinfo = tarfile.TarInfo(name=f"{Path(path).name}/{name}")
+                tarinfo.size = len(content)
+                tar.addfile(tarinfo, fileobj=io.BytesIO(content))
+
+        content = f.getvalue()
+        chunks = (content[i : i + 1000] for i in range(0, len(content), 1000))
+
+        return chunks, {"size": 4096}
+
+
+def test_extract_directory(tmpdir):
+    files = {
+        "image.mhd": b"ElementDataFile = image.raw",
+        "sub/image.raw": os.urandom(100_000),
+    }
+
+    extracted = set(
+        extract_directory(
+            container=FakeReaderContainer(files=files),
+            src=Path("/output/images"),
+            dest=Path(tmpdir),
+            max_size=200_000,
+        )
+    )
+
+    assert extracted == {Path(tmpdir) / name for name in files}
+    for name, content in files.items():
+        assert (Path(tmpdir) / name).read_bytes() == content
+
+
+def test_extract_directory_size_limit(tmpdir):
+    files = {"a.mha": b"a" * 10, "b.mha": b"b" * 10}
+
+    with pytest.raises(ComponentException):
+        list(
+            extract_directory(
+                container=FakeReaderContainer(files=files),
+                src=Path("/output/images"),
+                dest=Path(tmpdir),
+                max_size=15,
+            )
+        )
+
+
+class FakeContainer:
+    def put_archive(self, path, data):
+        b"".join(data)
+
+    def wait(self):
+        return {"StatusCode": 0}
+
+    def logs(self, **_):
+        return b""
+
+    def remove(self, **_):
+        pass
+
+
+class FakeContainers:
+    def __init__(self, *, latency=0):
+        self.latency = latency
+        self.n_runs = 0
+
+    def run(self, *, detach=False, **_):
+        # Simulates the overhead of the lifecycle of a container
+        time.sleep(self.latency)
+        self.n_runs += 1
+        return FakeContainer() if detach else None
+
+    def list(self, **_):
+        return []
+
+    def prune(self, **_):
+        pass
+
+
+class FakeVolumes:
+    def create(self, **_):
+        pass
+
+    def prune(self, **_):
+        pass
+
+
+def test_batch_executor_inputs(mocker):
+    mocker.patch(
+        "grandchallenge.components.backends.docker.docker.DockerClient",
+        return_value=FakeDockerClient(),
+    )
+
+    executor = BatchExecutor(
+        job_id="batch",
+        job_class=FakeJobClass,
+        jobs={
+            "1": (FakeStorageFile(name="images/1/a.mha", content=b"a"),),
+            "2": (FakeStorageFile(name="images/2/a.mha", content=b"b"),),
+        },
+        output_interfaces=None,
+        exec_image=None,
+        exec_image_sha256="",
+    )
+
+    assert executor._job_ids == ["1", "2"]
+    assert {
+        name: f._content for name, f in executor._input_members.items()
+    } == {"1/a.mha": b"a", "2/a.mha": b"b"}
+
+
+def test_batch_executor_runs_containers_once(settings, mocker):
+    settings.COMPONENTS_IO_IMAGE = "sha256:io"
+
+    client = FakeDockerClient()
+    client.images.loaded["sha256:io"] = FakeImage(id="sha256:io", size=1)
+    client.containers = FakeContainers()
+    client.volumes = FakeVolumes()
+
+    mocker.patch(
+        "grandchallenge.components.backends.docker.docker.DockerClient",
+        return_value=client,
+    )
+    # Outputs and progress are stored on the jobs in the database
+    mocker.patch.object(Executor, "_create_outputs")
+    mocker.patch.object(BatchExecutor, "_create_outputs")
+    mocker.patch.object(Executor, "_update_provisioning_progress")
+
+    input_files = {
+        str(n): (FakeStorageFile(name=f"{n}.mha", content=b"a"),)
+        for n in range(5)
+    }
+    kwargs = {
+        "job_class": FakeJobClass,
+        "output_interfaces": None,
+        "exec_image": FakeImageFile(image_sha256="sha256:algorithm", size=10),
+        "exec_image_sha256": "sha256:algorithm",
+    }
+
+    with Executor(job_id="1", input_files=input_files["1"], **kwargs) as ev:
+        ev.execute()
+    single_job_runs = client.containers.n_runs
+
+    client.containers.n_runs = 0
+
+    with BatchExecutor(job_id="batch", jobs=input_files, **kwargs) as ev:
+        ev.execute()
+
+    assert client.containers.n_runs == single_job_runs
+
+
+@pytest.mark.benchmark
+def test_batch_executor_overhead_benchmark(settings, mocker):
+    settings.COMPONENTS_IO_IMAGE = "sha256:io"
+    n_images = 20
+
+    client = FakeDockerClient()
+    client.images.loaded["sha256:io"] = FakeImage(id="sha256:io", size=1)
+    # The time that docker takes to create, start and remove a container
+    client.containers = FakeContainers(latency=0.05)
+    client.volumes = FakeVolumes()
+
+    mocker.patch(
+        "grandchallenge.components.backends.docker.docker.DockerClient",
+        return_value=client,
+    )
+    # Outputs and progress are stored on the jobs in the database
+    mocker.patch.object(Executor, "_create_outputs")
+    mocker.patch.object(BatchExecutor, "_create_outputs")
+    mocker.patch.object(Executor, "_update_provisioning_progress")
+
+    # The inputs are streamed to the containers, so their size is real work
+    input_files = {
+        str(n): (
+            FakeStorageFile(name=f"{n}.mha", content=os.urandom(1_000_000)),
+        )
+        for n in range(n_images)
+    }
+    kwargs = {
+        "job_class": FakeJobClass,
+        "output_interfaces": None,
+        "exec_image": FakeImageFile(image_sha256="sha256:algorithm", size=10),
+        "exec_image_sha256": "sha256:algorithm",
+    }
+
+    start = time.perf_counter()
+    for job_id, files in input_files.items():
+        with Executor(job_id=job_id, input_files=files, **kwargs) as ev:
+            ev.execute()
+    per_image_overhead = (time.perf_counter() - start) / n_images
+
+    start = time.perf_counter()
+    with BatchExecutor(job_id="batch", jobs=input_files, **kwargs) as ev:
+        ev.execute()
+    batch_overhead = (time.perf_counter() - start) / n_images
+
+    assert batch_overhead < per_image_overhead
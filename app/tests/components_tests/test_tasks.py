@@ -4,9 +4,16 @@ import pytest
 from django.utils import timezone
 
 from grandchallenge.algorithms.models import Job as AlgorithmJob
-from grandchallenge.components.tasks import mark_long_running_jobs_failed
+from grandchallenge.components.backends.docker import ComponentException
+from grandchallenge.components.tasks import (
+    execute_job_batch,
+    mark_long_running_jobs_failed,
+)
 from grandchallenge.evaluation.models import Evaluation as EvaluationJob
-from tests.algorithms_tests.factories import AlgorithmJobFactory
+from tests.algorithms_tests.factories import (
+    AlgorithmImageFactory,
+    AlgorithmJobFactory,
+)
 from tests.evaluation_tests.factories import EvaluationFactory
 
 
@@ -58,3 +65,78 @@ def test_mark_long_running_jobs_failed():
     assert j2.status == EvaluationJob.FAILURE
     assert j3.status == EvaluationJob.PENDING
     assert a.status == AlgorithmJob.STARTED
+
+
+class FakeBatchExecutor:
+    """Fails the job with the lowest pk, or the whole batch on error."""
+
+    error = None
+
+    def __init__(self, *, jobs, **_):
+        self._jobs = jobs
+        self.stdout = "out"
+        self.stderr = "err"
+        self.errors = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+    def execute(self):
+        if self.error is not None:
+            raise self.error
+
+        self.errors[min(self._jobs)] = "Output is not valid."
+
+
+@pytest.mark.django_db
+def test_execute_job_batch_job_failure(mocker):
+    mocker.patch(
+        "grandchallenge.components.tasks.BatchExecutor", FakeBatchExecutor
+    )
+    ai = AlgorithmImageFactory(ready=True)
+    jobs = AlgorithmJobFactory.create_batch(3, algorithm_image=ai)
+    failed_pk = min(str(j.pk) for j in jobs)
+
+    execute_job_batch(
+        job_pks=[j.pk for j in jobs],
+        job_app_label="algorithms",
+        job_model_name="job",
+    )
+
+    for j in jobs:
+        j.refresh_from_db()
+        assert j.stdout == "out"
+        assert j.stderr == "err"
+
+        if str(j.pk) == failed_pk:
+            assert j.status == AlgorithmJob.FAILURE
+            assert j.error_message == "Output is not valid."
+        else:
+            assert j.status == AlgorithmJob.SUCCESS
+            assert j.error_message == ""
+
+
+@pytest.mark.django_db
+def test_execute_job_batch_container_failure(mocker):
+    executor = type(
+        "FailingBatchExecutor",
+        (FakeBatchExecutor,),
+        {"error": ComponentException("Container failed.")},
+    )
+    mocker.patch("grandchallenge.components.tasks.BatchExecutor", executor)
+    ai = AlgorithmImageFactory(ready=True)
+    jobs = AlgorithmJobFactory.create_batch(2, algorithm_image=ai)
+
+    execute_job_batch(
+        job_pks=[j.pk for j in jobs],
+        job_app_label="algorithms",
+        job_model_name="job",
+    )
+
+    for j in jobs:
+        j.refresh_from_db()
+        assert j.status == AlgorithmJob.FAILURE
+        assert j.error_message == "Container failed."
@@ -0,0 +1,71 @@
+import io
+import os
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from grandchallenge.core.utils.transfer import copy_fileobj, file_from_path
+
+
+@pytest.mark.parametrize("in_memory", (True, False))
+def test_copy_fileobj(tmpdir, in_memory):
+    content = os.urandom(3_000_000)
+
+    src_path = Path(tmpdir) / "src"
+    src_path.write_bytes(content)
+
+    with open(src_path, "rb") as src, open(Path(tmpdir) / "dst", "wb+") as dst:
+        if in_memory:
+            src = io.BytesIO(content)
+
+        # Buffered positions in both files must be respected
+        src.read(11)
+        dst.write(b"header")
+
+        copy_fileobj(src, dst)
+
+        assert src.tell() == len(content)
+        dst.write(b"footer")
+
+        dst.seek(0)
+        assert dst.read() == b"header" + content[11:] + b"footer"
+
+
+def test_file_from_path_outlives_directory():
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "image.mha"
+        path.write_bytes(b"image content")
+
+        f = file_from_path(path)
+
+    assert not path.exists()
+    assert f.name == "image.mha"
+    assert f.read() == b"image content"
+
+    f.close()
+
+
+@pytest.mark.benchmark
+def test_copy_fileobj_benchmark(tmpdir):
+    src_path = Path(tmpdir) / "src"
+    src_path.write_bytes(os.urandom(64 * 1024 * 1024))
+
+    def copy_1k(src, dst):
+        buffer = True
+        while buffer:
+            buffer = src.read(1024)
+            dst.write(buffer)
+
+    def timed(copy):
+        with open(src_path, "rb") as src, open(
+            Path(tmpdir) / "dst", "wb"
+        ) as dst:
+            start = time.perf_counter()
+            copy(src, dst)
+            return time.perf_counter() - start
+
+    timed(copy_fileobj)  # Warm the page cache
+
+    assert timed(copy_fileobj) < timed(copy_1k)
@@ -1,8 +1,17 @@
+import io
+import tarfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, override_settings
 
 from grandchallenge.algorithms.models import Job
+from grandchallenge.evaluation.models import SubmissionEvaluator
 from tests.algorithms_tests.factories import AlgorithmImageFactory
 from tests.archives_tests.factories import ArchiveFactory
+from tests.components_tests.test_backends import (
+    FakeDockerClient,
+    FakeJobClass,
+)
 from tests.evaluation_tests.factories import MethodFactory, SubmissionFactory
 from tests.factories import ImageFactory
 
@@ -36,3 +45,55 @@ class TestSubmission(TestCase):
         s.create_evaluation()
 
         assert Job.objects.count() == 2
+
+
+class FakeWriterContainer:
+    def __init__(self):
+        self.archives = []
+        self.commands = []
+
+    def put_archive(self, path, data):
+        self.archives.append((path, b"".join(data)))
+
+    def exec_run(self, cmd):
+        self.commands.append(cmd)
+
+
+def test_submission_evaluator_copies_inputs_in_one_archive(mocker, settings):
+    settings.COMPONENTS_BATCHED_INPUT_PROVISIONING = True
+    mocker.patch(
+        "grandchallenge.components.backends.docker.docker.DockerClient",
+        return_value=FakeDockerClient(),
+    )
+    progress = mocker.patch.object(
+        SubmissionEvaluator, "_update_provisioning_progress"
+    )
+
+    evaluator = SubmissionEvaluator(
+        job_id="1",
+        job_class=FakeJobClass,
+        input_files=(
+            SimpleUploadedFile(
+                "predictions.json",
+                b'{"foo": 1}',
+                content_type="application/json",
+            ),
+        ),
+        output_interfaces=None,
+        exec_image=None,
+        exec_image_sha256="",
+    )
+    writer = FakeWriterContainer()
+
+    evaluator._copy_input_files(writer=writer)
+
+    assert len(writer.archives) == 1
+    path, data = writer.archives[0]
+    assert path == "/tmp/"
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r") as tar:
+        assert tar.extractfile("submission-src-0").read() == b'{"foo": 1}'
+
+    progress.assert_called_with(10, 10)
+    assert writer.commands == [
+        "mv /tmp/submission-src-0 /input/predictions.json"
+    ]
@@ -1,3 +1,7 @@
+import random
+import time
+from statistics import mean, median
+
 import pytest
 
 from grandchallenge.components.models import (
@@ -6,6 +10,12 @@ from grandchallenge.components.models import (
 )
 from grandchallenge.evaluation.models import Evaluation, Phase
 from grandchallenge.evaluation.tasks import calculate_ranks
+from grandchallenge.evaluation.utils import (
+    Metric,
+    _rank_values_numpy,
+    _rank_values_python,
+    absolute_score,
+)
 from tests.evaluation_tests.factories import EvaluationFactory, PhaseFactory
 from tests.factories import UserFactory
 
@@ -249,6 +259,160 @@ def test_null_results():
     assert_ranks(queryset, expected_ranks)
 
 
+@pytest.mark.django_db
+def test_calculate_ranks_incremental(django_assert_max_num_queries):
+    phase = PhaseFactory(score_jsonpath="a")
+    interface = ComponentInterface.objects.get(slug="metrics-json-file")
+
+    def create_evaluation(a):
+        e = EvaluationFactory(
+            submission__phase=phase, status=Evaluation.SUCCESS
+        )
+        e.outputs.add(
+            ComponentInterfaceValue.objects.create(
+                interface=interface, value={"a": a}
+            )
+        )
+        return e
+
+    queryset = [create_evaluation(a) for a in (0.1, 0.5, 0.3)]
+
+    calculate_ranks(phase_pk=phase.pk)
+    assert_ranks(queryset, [3, 1, 2])
+
+    queryset.append(create_evaluation(0.4))
+
+    # Only the new row is read, and only the changed rows are written
+    with django_assert_max_num_queries(7):
+        calculate_ranks(phase_pk=phase.pk, evaluation_pk=queryset[-1].pk)
+    assert_ranks(queryset, [4, 1, 3, 2])
+
+    queryset[1].published = False
+    queryset[1].save()
+
+    calculate_ranks(phase_pk=phase.pk, evaluation_pk=queryset[1].pk)
+    assert_ranks(queryset, [3, 0, 2, 1])
+
+    # Deleted evaluations cause the table to be rebuilt
+    queryset.pop(2).delete()
+
+    calculate_ranks(phase_pk=phase.pk, evaluation_pk=queryset[0].pk)
+    assert_ranks(queryset, [2, 0, 1])
+
+    # As does deleting one evaluation and adding another one
+    queryset.pop(2).delete()
+    queryset.append(create_evaluation(0.2))
+
+    calculate_ranks(phase_pk=phase.pk, evaluation_pk=queryset[-1].pk)
+    assert_ranks(queryset, [2, 0, 1])
+
+
+@pytest.mark.django_db
+def test_calculate_ranks_stores_metrics():
+    phase = PhaseFactory(
+        score_jsonpath="dice.mean",
+        score_error_jsonpath="dice.std",
+        extra_results_columns=[
+            {"title": "Jaccard", "path": "jaccard", "order": "desc"},
+            {"title": "Missing", "path": "missing.mean", "order": "desc"},
+        ],
+    )
+    evaluation = EvaluationFactory(
+        submission__phase=phase, status=Evaluation.SUCCESS
+    )
+    evaluation.outputs.add(
+        ComponentInterfaceValue.objects.create(
+            interface=ComponentInterface.objects.get(slug="metrics-json-file"),
+            value={
+                "dice": {"mean": 0.8, "std": 0.1},
+                "jaccard": 0.7,
+                "cases": [{"dice": 0.8}],
+            },
+        )
+    )
+
+    calculate_ranks(phase_pk=phase.pk, evaluation_pk=evaluation.pk)
+
+    evaluation.refresh_from_db()
+    assert evaluation.metrics == {
+        "dice.mean": 0.8,
+        "dice.std": 0.1,
+        "jaccard": 0.7,
+    }
+
+    phase.score_error_jsonpath = ""
+    phase.save()
+
+    calculate_ranks(phase_pk=phase.pk)
+
+    evaluation.refresh_from_db()
+    assert evaluation.metrics == {"dice.mean": 0.8, "jaccard": 0.7}
+
+
+def random_values(*, n_results, n_metrics):
+    # Few distinct values so that there are many ties
+    return {
+        pk: tuple(
+            random.choice([random.randint(-3, 3), random.randint(0, 8) / 4])
+            for _ in range(n_metrics)
+        )
+        for pk in range(n_results)
+    }
+
+
+@pytest.mark.parametrize(
+    "score_method", (absolute_score, mean, median, lambda x: max(x))
+)
+def test_rank_values_numpy(score_method):
+    random.seed(42)
+
+    metrics = (
+        Metric(path="a", reverse=False),
+        Metric(path="b", reverse=True),
+        Metric(path="c", reverse=False),
+        # Duplicate paths are only ranked once
+        Metric(path="a", reverse=True),
+    )
+
+    for n_results in (0, 1, 2, 50):
+        values = random_values(n_results=n_results, n_metrics=len(metrics))
+
+        expected = _rank_values_python(
+            values=values, metrics=metrics, score_method=score_method
+        )
+        positions = _rank_values_numpy(
+            values=values, metrics=metrics, score_method=score_method
+        )
+
+        assert positions == expected
+        assert all(type(r) is int for r in positions.ranks.values())
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("score_method", (absolute_score, mean, median))
+def test_rank_values_benchmark(score_method):
+    random.seed(42)
+
+    n_metrics = 20
+    metrics = tuple(
+        Metric(path=f"m{n}", reverse=bool(n % 2)) for n in range(n_metrics)
+    )
+    values = random_values(n_results=100_000, n_metrics=n_metrics)
+
+    def timed(rank_values):
+        start = time.perf_counter()
+        positions = rank_values(
+            values=values, metrics=metrics, score_method=score_method
+        )
+        return time.perf_counter() - start, positions
+
+    python_time, expected = timed(_rank_values_python)
+    numpy_time, positions = timed(_rank_values_numpy)
+
+    assert positions == expected
+    assert numpy_time < python_time / 5
+
+
 def assert_ranks(queryset, expected_ranks, expected_rank_scores=None):
     for r in queryset:
         r.refresh_from_db()
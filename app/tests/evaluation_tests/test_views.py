@@ -6,7 +6,13 @@ from django.db.models import signals
 from django.utils import timezone
 from guardian.shortcuts import assign_perm, remove_perm
 
+from grandchallenge.components.models import (
+    ComponentInterface,
+    ComponentInterfaceValue,
+)
 from grandchallenge.evaluation.models import Evaluation
+from grandchallenge.evaluation.tasks import calculate_ranks
+from grandchallenge.evaluation.views import LeaderboardDetail
 from tests.evaluation_tests.factories import (
     EvaluationFactory,
     MethodFactory,
@@ -270,6 +276,112 @@ class TestViewFilters:
         assert {e1.pk} == {o.pk for o in response.context[-1]["object_list"]}
 
 
+@pytest.mark.django_db
+def test_leaderboard_sorts_by_metric(client):
+    phase = PhaseFactory(
+        challenge=ChallengeFactory(hidden=False),
+        score_jsonpath="dice.mean",
+        extra_results_columns=[
+            {"title": "Jaccard", "path": "jaccard", "order": "desc"}
+        ],
+    )
+    evaluations = [
+        EvaluationFactory(
+            submission__phase=phase,
+            method__phase=phase,
+            status=Evaluation.SUCCESS,
+            rank=rank,
+            metrics={"dice.mean": dice, "jaccard": jaccard},
+        )
+        for rank, dice, jaccard in (
+            (1, 0.9, 0.2),
+            (2, 0.8, 0.4),
+            (3, 0.7, 0.3),
+        )
+    ]
+
+    def sorted_pks(column, direction):
+        response = get_view_for_user(
+            client=client,
+            viewname="evaluation:leaderboard",
+            reverse_kwargs={
+                "challenge_short_name": phase.challenge.short_name,
+                "slug": phase.slug,
+            },
+            data={
+                "length": 10,
+                "draw": 1,
+                "order[0][dir]": direction,
+                "order[0][column]": column,
+            },
+            **{"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"},
+        )
+        rows = response.json()["data"]
+        return [
+            next(e.pk for e in evaluations if str(e.pk) in row[3])
+            for row in rows
+        ]
+
+    # The columns are the position, user, created, score and jaccard
+    assert sorted_pks(3, "desc") == [e.pk for e in evaluations]
+    assert sorted_pks(4, "desc") == [evaluations[i].pk for i in (1, 2, 0)]
+    assert sorted_pks(4, "asc") == [evaluations[i].pk for i in (0, 2, 1)]
+
+
+@pytest.mark.django_db
+def test_leaderboard_is_cached(client, mocker):
+    phase = PhaseFactory(
+        challenge=ChallengeFactory(hidden=False), score_jsonpath="a"
+    )
+    evaluation = EvaluationFactory(
+        submission__phase=phase,
+        method__phase=phase,
+        status=Evaluation.SUCCESS,
+        rank=1,
+    )
+    evaluation.outputs.add(
+        ComponentInterfaceValue.objects.create(
+            interface=ComponentInterface.objects.get(slug="metrics-json-file"),
+            value={"a": 0.5},
+        )
+    )
+
+    spy = mocker.spy(LeaderboardDetail, "get_table_data")
+
+    def draw(n):
+        response = get_view_for_user(
+            client=client,
+            viewname="evaluation:leaderboard",
+            reverse_kwargs={
+                "challenge_short_name": phase.challenge.short_name,
+                "slug": phase.slug,
+            },
+            data={
+                "length": 10,
+                "draw": n,
+                "order[0][dir]": "desc",
+                "order[0][column]": 0,
+                "_": n,
+            },
+            **{"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"},
+        )
+        return response.json()
+
+    first = draw(1)
+    assert first["recordsTotal"] == 1
+    assert spy.call_count == 1
+
+    # The unchanged leaderboard is served from the cache
+    assert draw(2) == {**first, "draw": 2}
+    assert spy.call_count == 1
+
+    # Ranking the phase invalidates the cached pages
+    calculate_ranks(phase_pk=phase.pk)
+
+    assert draw(3) == {**first, "draw": 3}
+    assert spy.call_count == 2
+
+
 @pytest.mark.django_db
 def test_submission_time_limit(client, two_challenge_sets):
     phase = two_challenge_sets.challenge_set_1.challenge.phase_set.get()
@@ -6,10 +6,15 @@ import pytest
 from django.core import files
 from django.utils import timezone
 
-from grandchallenge.core.storage import private_s3_storage
+from grandchallenge.core.storage import (
+    S3_MULTIPART_MIN_PART_SIZE,
+    private_s3_storage,
+)
 from grandchallenge.jqfileupload.models import StagedFile
+from grandchallenge.jqfileupload.tasks import delete_staged_file_objects
 from grandchallenge.jqfileupload.widgets.uploader import (
     NotFoundError,
+    OpenedStagedAjaxFile,
     StagedAjaxFile,
     cleanup_stale_files,
 )
@@ -159,6 +164,77 @@ def test_uploaded_multi_chunk_file():
     do_default_content_tests(tested_file, file_content)
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("read_ahead", (0, 1, 3))
+def test_read_ahead(read_ahead):
+    file_content = b"HelloWorld" * 5
+    chunks = [4, 8, 10, 11, len(file_content)]
+    uploaded_file_uuid = create_uploaded_file(file_content, chunks=chunks)
+
+    with OpenedStagedAjaxFile(
+        uploaded_file_uuid, read_ahead=read_ahead
+    ) as file:
+        assert file.read() == file_content
+        # Seeking back across the last chunk boundary reuses the open handles
+        for offset in (10, 12):
+            file.seek(offset)
+            assert file.read(3) == file_content[offset : offset + 3]
+
+        statistics = file.statistics
+
+    assert statistics.bytes_read == len(file_content) + 6
+    assert statistics.chunks_fetched == len(chunks)
+    assert statistics.bytes_fetched == len(file_content)
+    # Every chunk but the first is fetched ahead, the seeks reuse the
+    # handles and are not counted
+    assert statistics.handle_cache_hits == (
+        len(chunks) - 1 if read_ahead else 0
+    )
+    assert statistics.fetch_throughput > 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "chunk_size",
+    (
+        # Smaller than the minimum multipart part size, so streamed
+        11,
+        # Large enough to use a multipart copy
+        S3_MULTIPART_MIN_PART_SIZE,
+    ),
+)
+def test_assemble(chunk_size):
+    file_content = (bytes(range(256)) * (chunk_size // 128 + 4))[
+        : 2 * chunk_size + 1000
+    ]
+    chunks = [chunk_size, 2 * chunk_size, len(file_content)]
+
+    uploaded_file_uuid = create_uploaded_file(
+        file_content, chunks=chunks, client_filename="assembled"
+    )
+    tested_file = StagedAjaxFile(uploaded_file_uuid)
+    chunk_names = [c.file.name for c in tested_file.staged_files]
+    assert len(chunk_names) == 3
+
+    with tested_file.open() as reader:
+        tested_file.assemble()
+
+        # Readers that were opened before the assembly can still be read
+        assert reader.read() == file_content
+
+    assert tested_file.staged_files.count() == 1
+    assert tested_file.name == "assembled"
+    do_default_content_tests(tested_file, file_content)
+
+    for name in chunk_names:
+        assert private_s3_storage.exists(name)
+
+    delete_staged_file_objects(names=chunk_names)
+
+    for name in chunk_names:
+        assert not private_s3_storage.exists(name)
+
+
 @pytest.mark.django_db
 def test_file_cleanup():
     file_content = b"HelloWorld" * 5
@@ -822,7 +822,7 @@ def test_csv_export(now, client, answer_type, answer):
     )
 
     headers = str(response.serialize_headers())
-    content = str(response.content)
+    content = str(b"".join(response.streaming_content))
 
     assert response.status_code == 200
     assert "Content-Type: text/csv" in headers
@@ -886,6 +886,66 @@ def test_csv_export_preprocessing(tmp_path, data, elements, lines):
         assert reader.line_num == lines
 
 
+@pytest.mark.django_db
+def test_csv_export_in_batches(client, django_assert_max_num_queries):
+    rs = ReaderStudyFactory()
+    editor = UserFactory()
+    rs.add_editor(editor)
+
+    images = ImageFactory.create_batch(2)
+    rs.images.add(*images)
+
+    q = QuestionFactory(
+        reader_study=rs, answer_type=Question.ANSWER_TYPE_CHOICE
+    )
+    options = CategoricalOptionFactory.create_batch(2, question=q)
+
+    answers = []
+    for creator in UserFactory.create_batch(2):
+        for image in images:
+            a = AnswerFactory(
+                question=q, creator=creator, answer=options[0].pk
+            )
+            a.images.add(image)
+            answers.append(a)
+
+    # Only this answer has a history of two values
+    answers[2].answer = options[1].pk
+    answers[2].save()
+
+    # The answer of the ground truth is not exported
+    AnswerFactory(question=q, is_ground_truth=True)
+
+    with mock.patch(
+        "grandchallenge.reader_studies.views.EXPORT_BATCH_SIZE", 3
+    ):
+        response = get_view_for_user(
+            viewname="api:reader-study-export-answers",
+            reverse_kwargs={"pk": rs.pk},
+            user=editor,
+            client=client,
+            method=client.get,
+            content_type="application/json",
+        )
+
+        # The number of queries does not depend on the number of answers
+        with django_assert_max_num_queries(12):
+            content = b"".join(response.streaming_content).decode("utf-8")
+
+    rows = list(csv.reader(content.splitlines()))
+
+    assert rows[0] == Answer.csv_headers_for(n_history=2)
+    assert len(rows) == len(answers) + 1
+
+    expected = sorted(answers, key=lambda a: (a.creator_id, a.created, a.pk))
+    for row, answer in zip(rows[1:], expected):
+        answer = Answer.objects.get(pk=answer.pk)
+        assert row[: len(answer.csv_values)] == [
+            str(v) for v in answer.csv_values
+        ]
+        assert len(row) == len(rows[0])
+
+
 def test_csv_export_create_dicts():
     exporter = ExportCSVMixin()
     headers = ["foo", "bar"]
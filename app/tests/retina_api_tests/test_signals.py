@@ -0,0 +1,59 @@
+import pytest
+
+from tests.archives_tests.factories import ArchiveFactory
+from tests.factories import ImageFactory
+from tests.patients_tests.factories import PatientFactory
+from tests.studies_tests.factories import StudyFactory
+
+
+@pytest.fixture
+def update_archive_subtrees(mocker):
+    return mocker.patch(
+        "grandchallenge.retina_api.signals.update_archive_subtrees"
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_image_changed_outside_retina_archives(update_archive_subtrees):
+    image = ImageFactory(study=StudyFactory())
+    ArchiveFactory(title="Not retina").images.add(image)
+
+    image.save()
+    image.delete()
+
+    assert not update_archive_subtrees.apply_async.called
+
+
+@pytest.mark.django_db(transaction=True)
+def test_image_changed_in_retina_archive(update_archive_subtrees):
+    study = StudyFactory()
+    image = ImageFactory(study=study)
+    archive = ArchiveFactory(title="RS1")
+    archive.images.add(image)
+    update_archive_subtrees.reset_mock()
+
+    image.save()
+
+    update_archive_subtrees.apply_async.assert_called_once_with(
+        kwargs={
+            "patient_pks": [str(study.patient.pk)],
+            "archive_pks": [str(archive.pk)],
+        }
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_study_moved_to_another_patient(update_archive_subtrees):
+    study = StudyFactory()
+    old_patient, new_patient = study.patient, PatientFactory()
+    update_archive_subtrees.reset_mock()
+
+    study.patient = new_patient
+    study.save()
+
+    update_archive_subtrees.apply_async.assert_called_once()
+    kwargs = update_archive_subtrees.apply_async.call_args[1]["kwargs"]
+    assert set(kwargs["patient_pks"]) == {
+        str(old_patient.pk),
+        str(new_patient.pk),
+    }
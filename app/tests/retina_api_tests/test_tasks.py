@@ -1,8 +1,12 @@
 import pytest
 from django.core.cache import cache
 
-from grandchallenge.retina_api.models import ArchiveDataModel
-from grandchallenge.retina_api.tasks import cache_archive_data
+from grandchallenge.retina_api.models import ArchiveDataModel, ArchiveSubtree
+from grandchallenge.retina_api.tasks import (
+    cache_archive_data,
+    update_archive_subtrees,
+)
+from tests.cases_tests.factories import ImageFactory
 from tests.retina_api_tests.helpers import create_datastructures_data
 
 
@@ -255,3 +259,84 @@ class TestCacheArchiveDataTasks:
             pytest.fail("Response object structure is not correct")
 
         assert archive_data == expected_archive_data
+
+
+@pytest.mark.django_db
+def test_update_archive_subtrees():
+    (datastructures, datastructures_aus, _, _) = create_datastructures_data(
+        archive_pars={"title": "RS1"}
+    )
+    cache_archive_data()
+
+    etags = dict(ArchiveSubtree.objects.values_list("patient", "etag"))
+    assert set(etags) == {
+        datastructures["patient"].pk,
+        datastructures_aus["patient"].pk,
+    }
+
+    image = ImageFactory(
+        study=datastructures["study"],
+        modality=datastructures["image_cf"].modality,
+    )
+    update_archive_subtrees(patient_pks=[str(datastructures["patient"].pk)])
+
+    # Only the subtree of the patient is updated
+    new_etags = dict(ArchiveSubtree.objects.values_list("patient", "etag"))
+    assert (
+        new_etags[datastructures["patient"].pk]
+        != etags[datastructures["patient"].pk]
+    )
+    assert (
+        new_etags[datastructures_aus["patient"].pk]
+        == etags[datastructures_aus["patient"].pk]
+    )
+
+    archive_data = ArchiveDataModel.objects.get(pk=1).value
+    patient_data = archive_data["subfolders"][datastructures["archive"].name][
+        "subfolders"
+    ][datastructures["patient"].name]
+    assert patient_data["subfolders"][datastructures["study"].name][
+        "images"
+    ] == {
+        datastructures["image_cf"].name: str(datastructures["image_cf"].pk),
+        image.name: str(image.pk),
+    }
+
+    # The assembled data is the same as the rebuilt data
+    cache_archive_data()
+    assert ArchiveDataModel.objects.get(pk=1).value == archive_data
+
+    # Patients without images in the archive are removed
+    datastructures["archive"].images.clear()
+    update_archive_subtrees(patient_pks=[str(datastructures["patient"].pk)])
+
+    assert not ArchiveSubtree.objects.filter(
+        patient=datastructures["patient"]
+    ).exists()
+    assert (
+        ArchiveDataModel.objects.get(pk=1).value["subfolders"][
+            datastructures["archive"].name
+        ]["subfolders"]
+        == {}
+    )
+
+
+@pytest.mark.django_db
+def test_update_archive_subtrees_builds_unindexed_archives():
+    (datastructures, datastructures_aus, _, _) = create_datastructures_data(
+        archive_pars={"title": "RS1"}
+    )
+    cache_archive_data()
+    archive_data = ArchiveDataModel.objects.get(pk=1).value
+
+    # The archives have not been indexed yet, as after the deploy that
+    # introduced the subtrees
+    ArchiveSubtree.objects.all().delete()
+
+    update_archive_subtrees(patient_pks=[str(datastructures["patient"].pk)])
+
+    assert set(ArchiveSubtree.objects.values_list("patient", flat=True)) == {
+        datastructures["patient"].pk,
+        datastructures_aus["patient"].pk,
+    }
+    assert ArchiveDataModel.objects.get(pk=1).value == archive_data
@@ -19,7 +19,10 @@ from grandchallenge.retina_api.serializers import (
     TreeImageSerializer,
     TreeObjectSerializer,
 )
-from grandchallenge.retina_api.tasks import cache_archive_data
+from grandchallenge.retina_api.tasks import (
+    cache_archive_data,
+    update_archive_subtrees,
+)
 from grandchallenge.subdomains.utils import reverse
 from tests.cases_tests.factories import (
     ImageFactoryWithImageFile,
@@ -117,6 +120,60 @@ class TestArchiveIndexAPIEndpoints:
         assert response_data == test_data
 
 
+@pytest.mark.django_db
+def test_archive_subtree_view(client):
+    datastructures, _, _, _ = create_datastructures_data(
+        archive_pars={"title": "RS1"}
+    )
+    cache_archive_data()
+
+    client, _ = client_login(client, user="retina_user")
+
+    archive_url = reverse(
+        "retina:api:archive-subtree-api-view",
+        args=[datastructures["archive"].pk],
+    )
+    patient_url = reverse(
+        "retina:api:archive-subtree-api-view",
+        args=[datastructures["archive"].pk, datastructures["patient"].pk],
+    )
+
+    response = client.get(archive_url, HTTP_ACCEPT="application/json")
+    assert response.status_code == status.HTTP_200_OK
+    archive_etag = response["ETag"]
+    patient_stub = response.json()["subfolders"][
+        datastructures["patient"].name
+    ]
+    assert patient_stub["id"] == str(datastructures["patient"].pk)
+    assert patient_stub["subfolders"] == {}
+
+    response = client.get(patient_url, HTTP_ACCEPT="application/json")
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] == f'"{patient_stub["etag"]}"'
+    assert datastructures["study"].name in response.json()["subfolders"]
+
+    # Unchanged subtrees are not sent again
+    for url, etag in (
+        (archive_url, archive_etag),
+        (patient_url, response["ETag"]),
+    ):
+        response = client.get(
+            url, HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    datastructures["study"].name = "renamed"
+    datastructures["study"].save()
+    update_archive_subtrees(patient_pks=[str(datastructures["patient"].pk)])
+
+    response = client.get(
+        archive_url,
+        HTTP_ACCEPT="application/json",
+        HTTP_IF_NONE_MATCH=archive_etag,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
 @pytest.mark.django_db
 class TestImageAPIEndpoint:
     # test methods are added dynamically
@@ -1,10 +1,14 @@
+from pathlib import Path
 from textwrap import dedent
 
 import pytest
 from guardian.shortcuts import assign_perm
 
+from grandchallenge.cases.models import FolderUpload
+from grandchallenge.core.storage import protected_s3_storage
 from tests.evaluation_tests.factories import SubmissionFactory
 from tests.factories import (
+    ImageFactory,
     ImageFileFactory,
     UserFactory,
 )
@@ -82,6 +86,35 @@ def test_image_response(client, settings, cloudfront, tmpdir):
         assert "Expires" in redirect
 
 
+@pytest.mark.django_db
+def test_packed_image_response(client, settings, tmpdir):
+    settings.PROTECTED_S3_STORAGE_USE_CLOUDFRONT = False
+
+    image = ImageFactory()
+    user = UserFactory()
+    assign_perm("view_image", user, image)
+
+    folder = Path(tmpdir) / f"{image.pk}_files"
+    tile = folder / "0" / "0_0.jpeg"
+    tile.parent.mkdir(parents=True)
+    tile.write_bytes(b"tile content")
+
+    upload = FolderUpload(image=image, folder=str(folder), pack=True)
+    upload.save()
+
+    url = protected_s3_storage.url(upload.destination_filename(tile))
+
+    response = get_view_for_user(url=url, client=client, user=user)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "image/jpeg"
+    assert response.content == b"tile content"
+
+    response = get_view_for_user(
+        url=url.replace("0_0.jpeg", "1_0.jpeg"), client=client, user=user
+    )
+    assert response.status_code == 404
+
+
 @pytest.mark.django_db
 def test_submission_download(client, two_challenge_sets):
     """Only the challenge admin should be able to download submissions."""
@@ -156,3 +156,53 @@ def test_url_conf_set(
         assert request.challenge == c
     else:
         assert request.challenge is None
+
+
+@pytest.mark.django_db
+def test_challenge_is_cached(settings, rf, django_assert_num_queries):
+    settings.ALLOWED_HOSTS = [f".{SITE_DOMAIN}"]
+    c = ChallengeFactory(short_name="cachedchallenge")
+
+    def get_challenge():
+        request = rf.get("/")
+        request.subdomain = "CachedChallenge"
+        request = CurrentSiteMiddleware(lambda x: x)(request)
+        return challenge_subdomain_middleware(lambda x: x)(request).challenge
+
+    assert get_challenge() == c
+    pages = list(c.page_set.all())
+    phases = list(c.phase_set.all())
+
+    with django_assert_num_queries(0):
+        challenge = get_challenge()
+        assert list(challenge.page_set.all()) == pages
+        assert list(challenge.phase_set.all()) == phases
+
+    c.page_set.all().delete()
+    c.description = "New description"
+    c.save()
+
+    challenge = get_challenge()
+    assert challenge.description == "New description"
+    assert list(challenge.page_set.all()) == []
+
+
+@pytest.mark.django_db
+def test_renamed_challenge_is_not_cached(settings, rf):
+    settings.ALLOWED_HOSTS = [f".{SITE_DOMAIN}"]
+    c = ChallengeFactory(short_name="oldchallenge")
+
+    def get_challenge(subdomain):
+        request = rf.get("/")
+        request.subdomain = subdomain
+        request = CurrentSiteMiddleware(lambda x: x)(request)
+        return challenge_subdomain_middleware(lambda x: x)(request)
+
+    assert get_challenge("oldchallenge").challenge == c
+
+    c.short_name = "newchallenge"
+    c.save()
+
+    assert get_challenge("newchallenge").challenge == c
+    # The previous subdomain no longer serves the challenge
+    assert isinstance(get_challenge("oldchallenge"), HttpResponseRedirect)